@@ -0,0 +1,54 @@
+"""
+Per-chunk delta conversion: json.loads(delta.json()) vs. model_to_dict.
+
+Converts every delta of a mock stream both ways, then times a full
+run_and_stream over the same stream with the mock client.
+
+    python -m benchmarks.bench_delta
+"""
+import json
+import time
+
+from swarm import Swarm, Agent
+from swarm.util import model_to_dict
+from tests.mock_client import MockOpenAIClient, create_mock_stream
+
+CONTENT = "streamed token " * 2000
+
+
+def timed(fn, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    chunks = create_mock_stream(
+        {"role": "assistant", "content": CONTENT},
+        [{"name": "lookup", "args": {"query": "x" * 2000}}],
+    )
+    deltas = [chunk.choices[0].delta for chunk in chunks]
+
+    round_trip = timed(lambda: [json.loads(d.model_dump_json()) for d in deltas])
+    direct = timed(lambda: [model_to_dict(d) for d in deltas])
+    print(f"chunks: {len(deltas)}")
+    print(f"json round-trip: {round_trip / len(deltas) * 1e6:.2f} us/chunk")
+    print(f"model_to_dict:   {direct / len(deltas) * 1e6:.2f} us/chunk")
+
+    mock_client = MockOpenAIClient()
+    mock_client.set_response(chunks)
+    client = Swarm(client=mock_client)
+    agent = Agent()
+
+    def stream_once():
+        for _ in client.run(agent=agent, messages=[], stream=True, execute_tools=False):
+            pass
+
+    print(f"run_and_stream:  {timed(stream_once) / len(deltas) * 1e6:.2f} us/chunk")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Import-time cost of swarm, measured with `python -X importtime`.
+
+Each statement runs in a fresh interpreter. The cost is the cumulative
+import time of the top-level modules it pulls in, minus what a bare
+interpreter already imports at startup. The script also reports whether
+heavy dependencies (openai, httpx) were loaded, and exits with status 1
+if any statement is over its budget or loads a dependency it should not.
+
+    python -m benchmarks.bench_import
+    python -m benchmarks.bench_import --scale 2   # slower machine
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+HEAVY_MODULES = ("openai", "httpx")
+
+# (statement, budget in ms on a reference machine, whether it may load HEAVY_MODULES)
+# Agent is a pydantic model, so anything touching it pays for pydantic.
+STATEMENTS = [
+    ("import swarm", 50, False),
+    ("from swarm.util import function_to_json", 50, False),
+    ("from swarm import Agent", 250, False),
+    ("from swarm import Swarm; Swarm()", 400, False),
+    ("from swarm import Swarm; Swarm().client", None, True),
+]
+
+
+def _top_level(stderr: str) -> dict:
+    """Parse -X importtime output into {top-level module: cumulative microseconds}."""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line.split("|")
+        if name.startswith(" ") and not name.startswith("  "):
+            try:
+                modules[name.strip()] = int(cumulative)
+            except ValueError:
+                continue  # the header line
+    return modules
+
+
+def _run(statement: str) -> tuple:
+    probe = f"{statement}\nimport sys\nprint(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    # constructing the client needs a key, but no request is ever sent
+    env.setdefault("OPENAI_API_KEY", "sk-import-benchmark")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", probe],
+        capture_output=True, text=True, env=env,
+    )
+    if result.returncode:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    heavy = [m for m in result.stdout.strip().split(",") if m]
+    return _top_level(result.stderr), heavy
+
+
+def import_time(statement: str, repeat: int = 3) -> dict:
+    """
+    Measure one statement; the fastest of `repeat` fresh interpreters is kept.
+    Returns {"ms": ..., "heavy": [...]}.
+    """
+    best, heavy = float("inf"), []
+    baseline = set(_run("pass")[0])
+    for _ in range(repeat):
+        modules, heavy = _run(statement)
+        total = sum(us for name, us in modules.items() if name not in baseline)
+        best = min(best, total / 1000)
+    return {"ms": round(best, 2), "heavy": heavy}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help="multiply every budget, e.g. for a slower machine")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    report, failures = {}, []
+    for statement, budget, heavy_allowed in STATEMENTS:
+        try:
+            result = import_time(statement, args.repeat)
+        except RuntimeError as e:
+            report[statement] = {"error": str(e)}
+            failures.append(statement)
+            continue
+        if budget is not None:
+            result["budget_ms"] = budget * args.scale
+        report[statement] = result
+        if (result["heavy"] and not heavy_allowed) or result["ms"] > result.get("budget_ms", float("inf")):
+            failures.append(statement)
+    json.dump({"results": report, "failures": failures}, sys.stdout, indent=2)
+    print()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
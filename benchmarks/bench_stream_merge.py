@@ -0,0 +1,77 @@
+"""
+Streaming delta accumulation: merge_chunk vs. StreamAccumulator.
+
+Feeds N content chunks followed by N tool-call argument chunks through the
+old merge_chunk/merge_fields path (string += per token) and through
+StreamAccumulator (fragment lists joined once at the message boundary).
+
+    python -m benchmarks.bench_stream_merge
+"""
+import time
+from collections import defaultdict
+
+from swarm.util import StreamAccumulator, merge_chunk
+
+CHUNK_COUNTS = [1000, 10000]
+TOKEN = "token "
+
+
+def make_deltas(n):
+    deltas = [{"role": "assistant", "content": "", "tool_calls": None}]
+    deltas += [{"content": TOKEN, "tool_calls": None} for _ in range(n)]
+    deltas.append({"content": None, "tool_calls": [
+        {"index": 0, "id": "call_1", "type": "function",
+         "function": {"name": "submit", "arguments": "{\"text\": \""}}]})
+    deltas += [{"content": None, "tool_calls": [
+        {"index": 0, "id": None, "type": None,
+         "function": {"name": None, "arguments": TOKEN}}]} for _ in range(n)]
+    return deltas
+
+
+def merge_path(deltas):
+    message = {
+        "content": "",
+        "sender": "Agent",
+        "role": "assistant",
+        "function_call": None,
+        "tool_calls": defaultdict(
+            lambda: {"function": {"arguments": "", "name": ""}, "id": "", "type": ""}
+        ),
+    }
+    for delta in deltas:
+        delta = dict(delta)
+        delta.pop("role", None)
+        if delta["tool_calls"]:
+            delta["tool_calls"] = [dict(delta["tool_calls"][0])]
+        merge_chunk(message, delta)
+    message["tool_calls"] = list(message["tool_calls"].values())
+    return message
+
+
+def accumulator_path(deltas):
+    accumulator = StreamAccumulator("Agent")
+    for delta in deltas:
+        accumulator.add(delta)
+    return accumulator.message()
+
+
+def timed(fn, deltas, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(deltas)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    print(f"{'chunks':>8} {'merge_chunk (ms)':>17} {'accumulator (ms)':>17}")
+    for n in CHUNK_COUNTS:
+        deltas = make_deltas(n)
+        assert merge_path(deltas) == accumulator_path(deltas)
+        print(f"{n:>8} {timed(merge_path, deltas) * 1e3:>17.2f} "
+              f"{timed(accumulator_path, deltas) * 1e3:>17.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Benchmark cases for the orchestrator's own overhead.
+
+Every case drives Swarm against ScriptedOpenAIClient, so the numbers are the
+framework's cost only: building params, copying state, dispatching tools,
+accumulating stream deltas and switching agents. Each case yields
+(name, microseconds, unit) tuples; see benchmarks.suite for the runner.
+"""
+import copy
+
+from swarm import Agent, Swarm
+from tests.mock_client import ScriptedOpenAIClient, create_mock_response, create_mock_stream
+
+HISTORY_LENGTHS = [10, 100, 1000, 5000]
+STREAM_CHUNKS = [100, 1000]
+TOOL_COUNTS = [1, 10, 50, 200]
+CONTEXT_SIZES = [10, 100, 1000]
+HANDOFF_CHAIN = [1, 5, 20]
+
+
+def final(content="ok"):
+    return create_mock_response({"role": "assistant", "content": content})
+
+
+def make_history(n):
+    history = []
+    for i in range(n):
+        if i % 2:
+            history.append(
+                {"role": "assistant", "content": f"reply {i}", "sender": "Agent",
+                 "tool_calls": None, "function_call": None}
+            )
+        else:
+            history.append({"role": "user", "content": f"message {i} " * 8})
+    return history
+
+
+def make_transfer(target):
+    def transfer():
+        return target
+
+    return transfer
+
+
+def make_tool(name):
+    def tool(query: str):
+        return "ok"
+
+    tool.__name__ = name
+    return tool
+
+
+def history_length(measure):
+    """
+    Swarm.run vs. history length, next to a deepcopy of the same history.
+
+    Each run copies the caller's history once, into the request list, so
+    history/run still grows slowly with n. Later turns of the same run only
+    append to that list: history/run2 (a tool call, then a reply) should stay
+    the same distance above history/run at every n.
+    """
+    agent = Agent(functions=[make_tool("tool_0")])
+    tool_call = create_mock_response({"role": "assistant", "content": ""},
+                                     [{"name": "tool_0", "args": {"query": "x"}}])
+    for n in HISTORY_LENGTHS:
+        messages = make_history(n)
+        one_turn = Swarm(client=ScriptedOpenAIClient([final()]))
+        two_turns_client = ScriptedOpenAIClient([tool_call, final()])
+        two_turns = Swarm(client=two_turns_client)
+
+        def run_two_turns():
+            two_turns_client.reset()
+            two_turns.run(agent=agent, messages=messages)
+
+        yield f"history/run/{n}", measure(lambda: one_turn.run(agent=agent, messages=messages)), "us/run"
+        yield f"history/run2/{n}", measure(run_two_turns), "us/run"
+        yield f"history/deepcopy/{n}", measure(lambda: copy.deepcopy(messages)), "us/copy"
+
+
+def streaming(measure):
+    """run_and_stream cost per chunk of a streamed reply."""
+    for n in STREAM_CHUNKS:
+        chunks = create_mock_stream({"role": "assistant", "content": "tok " * n}, chunk_size=4)
+        client = Swarm(client=ScriptedOpenAIClient([chunks]))
+        agent = Agent()
+
+        def stream_once():
+            for _ in client.run(agent=agent, messages=[], stream=True):
+                pass
+
+        yield f"stream/{len(chunks)}", measure(stream_once) / len(chunks), "us/chunk"
+
+
+def tool_dispatch(measure):
+    """A run with one tool call vs. the number of tools on the agent."""
+    for n in TOOL_COUNTS:
+        agent = Agent(functions=[make_tool(f"tool_{i}") for i in range(n)])
+        mock_client = ScriptedOpenAIClient([
+            create_mock_response({"role": "assistant", "content": ""},
+                                 [{"name": "tool_0", "args": {"query": "x"}}]),
+            final(),
+        ])
+        client = Swarm(client=mock_client)
+
+        def run_once():
+            mock_client.reset()
+            client.run(agent=agent, messages=[])
+
+        yield f"tools/{n}", measure(run_once), "us/run"
+
+
+def context_variables(measure):
+    """A single-turn run vs. the size of context_variables (deep-copied once per run)."""
+    client = Swarm(client=ScriptedOpenAIClient([final()]))
+    agent = Agent()
+    for n in CONTEXT_SIZES:
+        context = {f"key_{i}": {"id": i, "tags": ["a", "b"], "name": f"value {i}"}
+                   for i in range(n)}
+        yield f"context/{n}", measure(
+            lambda: client.run(agent=agent, messages=[], context_variables=context)), "us/run"
+
+
+def handoff_chain(measure):
+    """A run that hands off through a chain of n agents before answering."""
+    for n in HANDOFF_CHAIN:
+        agents = [Agent(name=f"agent_{i}") for i in range(n + 1)]
+        for current, target in zip(agents, agents[1:]):
+            current.functions = [make_transfer(target)]
+        handoff = create_mock_response({"role": "assistant", "content": ""},
+                                       [{"name": "transfer"}])
+        mock_client = ScriptedOpenAIClient([handoff] * n + [final()])
+        client = Swarm(client=mock_client)
+
+        def run_once():
+            mock_client.reset()
+            client.run(agent=agents[0], messages=[])
+
+        yield f"handoff/{n}", measure(run_once), "us/run"
+
+
+CASES = {
+    "history": history_length,
+    "stream": streaming,
+    "tools": tool_dispatch,
+    "context": context_variables,
+    "handoff": handoff_chain,
+}
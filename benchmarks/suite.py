@@ -0,0 +1,123 @@
+"""
+Orchestrator overhead benchmark suite.
+
+Runs the cases in benchmarks.cases and prints the results as JSON. With
+--baseline it compares against a previously saved result file and exits
+with status 1 if any case got slower than the threshold allows, so a
+regression in core.py/util.py shows up as a failing command.
+
+    python -m benchmarks --output baseline.json
+    python -m benchmarks --baseline baseline.json --threshold 0.2
+    python -m benchmarks --cases history,stream --quick
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+
+from .cases import CASES
+
+
+def make_measure(repeat, min_time):
+    """
+    Return measure(fn) -> best microseconds per call.
+    Each of `repeat` rounds calls fn enough times to take at least `min_time`
+    seconds; the fastest round is reported, which filters out scheduler noise.
+    """
+
+    def measure(fn):
+        fn()  # warm caches (compiled tools, imports) before timing
+        number = 1
+        while True:
+            start = time.perf_counter()
+            for _ in range(number):
+                fn()
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time:
+                break
+            number *= 2
+        best = elapsed / number
+        for _ in range(repeat - 1):
+            start = time.perf_counter()
+            for _ in range(number):
+                fn()
+            best = min(best, (time.perf_counter() - start) / number)
+        return best * 1e6
+
+    return measure
+
+
+def run_suite(cases=None, repeat=5, min_time=0.05) -> dict:
+    measure = make_measure(repeat, min_time)
+    results = {}
+    for case in cases or CASES:
+        for name, value, unit in CASES[case](measure):
+            results[name] = {"value": round(value, 3), "unit": unit}
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "repeat": repeat,
+            "min_time": min_time,
+        },
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> dict:
+    """
+    Compare two suite results case by case.
+    A case regresses when current > baseline * (1 + threshold).
+    """
+    rows = {}
+    regressions = []
+    for name, result in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None or not base["value"]:
+            continue
+        ratio = result["value"] / base["value"]
+        rows[name] = {"baseline": base["value"], "current": result["value"],
+                      "ratio": round(ratio, 3)}
+        if ratio > 1 + threshold:
+            regressions.append(name)
+    return {"threshold": threshold, "cases": rows, "regressions": regressions}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cases", help=f"comma-separated subset of: {','.join(CASES)}")
+    parser.add_argument("--output", help="write the results JSON to this file")
+    parser.add_argument("--baseline", help="compare against a saved results JSON")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="allowed slowdown ratio before a case counts as a regression")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--quick", action="store_true", help="fewer, shorter rounds")
+    args = parser.parse_args(argv)
+
+    cases = args.cases.split(",") if args.cases else None
+    unknown = set(cases or ()) - set(CASES)
+    if unknown:
+        parser.error(f"unknown cases: {', '.join(sorted(unknown))}")
+
+    repeat, min_time = (2, 0.01) if args.quick else (args.repeat, 0.05)
+    report = run_suite(cases, repeat=repeat, min_time=min_time)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    status = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            report["comparison"] = compare(report, json.load(f), args.threshold)
+        status = 1 if report["comparison"]["regressions"] else 0
+
+    json.dump(report, sys.stdout, indent=2)
+    print()
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
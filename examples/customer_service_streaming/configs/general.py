@@ -12,6 +12,8 @@ class Colors:
 
 test_root = 'tests'
 test_file = 'test_prompts.jsonl'
+# JSON report of the last test run (a JUnit .xml is written next to it)
+test_report_path = 'tests/test_runs/test_report.json'
 tasks_path = 'configs/swarm_tasks.json'
 
 #Options are 'assistants' or 'local'
@@ -19,4 +21,7 @@ engine_name = 'local'
 
 max_iterations = 5
 
+# Tasks deployed at once when persist is False
+task_concurrency = 1
+
 persist = False
@@ -1,11 +1,7 @@
-from openai import OpenAI
-from src.utils import get_completion
-import qdrant_client
+from src.utils import get_completion, get_openai_client, get_qdrant_client
 import re
 
-# # # Initialize connections
-client = OpenAI()
-qdrant = qdrant_client.QdrantClient(host='localhost')#, prefer_grpc=True)
+# # # Connections are shared across calls and survive handler reloads
 
 # # Set embedding model
 # # TODO: Add this to global config
@@ -17,12 +13,12 @@ collection_name = 'help_center'
 # # # Query function for qdrant
 def query_qdrant(query, collection_name, vector_name='article', top_k=5):
     # Creates embedding vector from user query
-    embedded_query = client.embeddings.create(
+    embedded_query = get_openai_client().embeddings.create(
         input=query,
         model=EMBEDDING_MODEL,
     ).data[0].embedding
 
-    query_results = qdrant.search(
+    query_results = get_qdrant_client().search(
         collection_name=collection_name,
         query_vector=(
             vector_name, embedded_query
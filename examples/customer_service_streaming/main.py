@@ -16,7 +16,7 @@ def main():
         raise Exception("Validation failed")
 
     swarm = Swarm(
-        engine_name=engine_name, persist=persist)
+        engine_name=engine_name, persist=persist, concurrency=args.concurrency)
 
     if args.test is not None:
         test_files = args.test
@@ -24,7 +24,8 @@ def main():
             test_file_paths = [f"{test_root}/{test_file}"]
         else:
             test_file_paths = [f"{test_root}/{file}" for file in test_files]
-        swarm = Swarm(engine_name='local')
+        swarm = Swarm(engine_name='local', concurrency=args.concurrency,
+                      report_path=args.report, resume=args.resume)
         swarm.deploy(test_mode=True, test_file_paths=test_file_paths)
 
     elif args.input:
@@ -10,5 +10,8 @@ def parse_args():
     parser.add_argument("--evaluate", action="store_true", help="Set the evaluate flag for the new task.")
     parser.add_argument("--iterate", action="store_true", help="Set the iterate flag for the new task.")
     parser.add_argument("--input", action="store_true", help="If we want CLI")
+    parser.add_argument("--concurrency", type=int, help="Number of tasks the local engine runs at once.")
+    parser.add_argument("--report", type=str, help="Path of the JSON test report (a JUnit .xml is written next to it).")
+    parser.add_argument("--resume", action="store_true", help="Skip tests that already have a result in the report.")
 
     return parser.parse_args()
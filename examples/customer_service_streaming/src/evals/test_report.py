@@ -0,0 +1,106 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import xml.etree.ElementTree as ET
+
+CATEGORIES = ('groundtruth', 'planning', 'assistant')
+
+
+def case_key(task):
+    """Stable id for a test case, so a resumed run can match it to its earlier result."""
+    payload = json.dumps([task.description, task.groundtruth, task.expected_plan,
+                          task.expected_assistant], sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode()).hexdigest()[:16]
+
+
+class TestReport:
+    """
+    Results of a test run, saved as JSON after every finished case.
+
+    Each case records its checks ({category: passed}), duration and error, if any.
+    A run started with resume=True loads the existing file and skips cases that already
+    have a result; cases that ended with an error (e.g. an API failure) are run again.
+    write_junit() writes the same results as JUnit XML for CI.
+    """
+
+    __test__ = False  # not a pytest class
+
+    def __init__(self, path, resume=False):
+        self.path = path
+        self.cases = {}
+        self.started = time.time()
+        self._lock = threading.Lock()
+        if resume and path and os.path.exists(path):
+            with open(path, 'r') as file:
+                self.cases = {case['key']: case for case in json.load(file).get('cases', [])}
+
+    def done(self, key):
+        case = self.cases.get(key)
+        return case is not None and not case.get('error')
+
+    def restrict(self, keys):
+        """
+        Keep only the loaded cases whose key is in keys ({key: current index}), so cases
+        removed from the test files no longer count, and renumber them to their current index.
+        """
+        with self._lock:
+            self.cases = {key: dict(case, index=keys[key])
+                          for key, case in self.cases.items() if key in keys}
+
+    def add(self, case):
+        with self._lock:
+            self.cases[case['key']] = case
+            self.save()
+
+    def summary(self):
+        summary = {}
+        for category in CATEGORIES:
+            results = [case['checks'][category] for case in self.cases.values()
+                       if category in case['checks']]
+            if results:
+                passed = sum(results)
+                summary[category] = {'passed': passed, 'total': len(results),
+                                     'rate': passed / len(results)}
+        return summary
+
+    def to_dict(self):
+        cases = sorted(self.cases.values(), key=lambda case: case['index'])
+        return {
+            'summary': self.summary(),
+            'errors': sum(1 for case in cases if case.get('error')),
+            'duration': sum(case['duration'] for case in cases),
+            'cases': cases,
+        }
+
+    def save(self):
+        if not self.path:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as file:
+            json.dump(self.to_dict(), file, indent=2, default=str)
+        os.replace(tmp_path, self.path)
+
+    def write_junit(self, path):
+        report = self.to_dict()
+        suite = ET.Element('testsuite', name='swarm', tests=str(len(report['cases'])),
+                           time=f"{report['duration']:.3f}")
+        failures = errors = 0
+        for case in report['cases']:
+            testcase = ET.SubElement(suite, 'testcase', classname=case['category'],
+                                     name=case['description'], time=f"{case['duration']:.3f}")
+            if case.get('error'):
+                errors += 1
+                ET.SubElement(testcase, 'error', message=case['error'])
+            elif not case['passed']:
+                failures += 1
+                failed = [category for category, passed in case['checks'].items() if not passed]
+                ET.SubElement(testcase, 'failure', message=f"failed: {', '.join(failed)}").text = (
+                    f"Expected: {case['expected']}\nGot: {case['got']}")
+        suite.set('failures', str(failures))
+        suite.set('errors', str(errors))
+        ET.ElementTree(suite).write(path, encoding='utf-8', xml_declaration=True)
@@ -0,0 +1,52 @@
+import threading
+
+
+class ContextLog:
+    """
+    Append-only log of the messages every assistant adds to its history.
+
+    record(assistant) appends only the messages added since the last call for that
+    history, and a step is stored as (assistant name, end offset) instead of a snapshot.
+    Cursors are kept per history list rather than per name. Assistant.pass_context shares
+    one list between assistants, so those messages are logged once, under whichever
+    assistant recorded them first. Memory and serialization are linear in the number of
+    messages, not in steps times history length.
+    """
+
+    def __init__(self):
+        self.events = []   # (assistant name, message)
+        self.steps = []    # (assistant name, event offset after the step)
+        self._cursors = {}  # id(history list) -> [history list, messages already logged]
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.events)
+
+    def record(self, assistant):
+        """Append the messages added to assistant's history since it was last recorded."""
+        history = assistant.context['history']
+        with self._lock:
+            cursor = self._cursors.get(id(history))
+            if cursor is None or cursor[0] is not history:
+                cursor = self._cursors[id(history)] = [history, 0]
+            # the history may have been reset in place; only log what is new
+            start = min(cursor[1], len(history))
+            self.events.extend((assistant.name, message) for message in history[start:])
+            cursor[1] = len(history)
+            self.steps.append((assistant.name, len(self.events)))
+            return len(self.events)
+
+    def since(self, offset):
+        """Events appended after offset, for consumers that keep their own cursor."""
+        return self.events[offset:]
+
+    def history(self, assistant_name=None, end=None):
+        """Logged messages up to event offset end, optionally only those of one assistant."""
+        return [message for name, message in self.events[:end]
+                if assistant_name is None or name == assistant_name]
+
+    def to_dict(self):
+        return {
+            'events': [{'assistant': name, 'message': message} for name, message in self.events],
+            'steps': [list(step) for step in self.steps],
+        }
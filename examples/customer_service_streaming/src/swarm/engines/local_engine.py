@@ -1,18 +1,26 @@
-import importlib
+import contextlib
+import copy
 import json
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from configs.prompts import TRIAGE_MESSAGE_PROMPT, TRIAGE_SYSTEM_PROMPT, EVAL_GROUNDTRUTH_PROMPT, EVAL_PLANNING_PROMPT, ITERATE_PROMPT
 from src.utils import get_completion, is_dict_empty
-from configs.general import Colors, max_iterations
+from configs.general import Colors, max_iterations, task_concurrency, test_report_path
 from src.swarm.assistants import Assistant
+from src.swarm.context_log import ContextLog
+from src.swarm.handlers import HandlerRegistry
+from src.swarm.manifest import Manifest
+from src.swarm.task_output import TaskOutput
 from src.swarm.tool import Tool
 from src.tasks.task import EvaluationTask
+from src.evals.test_report import TestReport, case_key
 from src.runs.run import Run
 
 
 
 class LocalEngine:
-    def __init__(self, client, tasks, persist=False):
+    def __init__(self, client, tasks, persist=False, concurrency=None):
         self.client = client
         self.assistants = []
         self.last_assistant = None
@@ -20,50 +28,43 @@ class LocalEngine:
         self.tasks = tasks
         self.tool_functions = []
         self.global_context = {}
+        self.handlers = HandlerRegistry()
+        self.manifest = Manifest()
+        # Number of tasks deploy runs at once; persistent engines always run tasks in order
+        self.concurrency = concurrency or task_concurrency
+        self.output = None
 
     def load_tools(self):
-        tools_path = 'configs/tools'
-
+        # Tool definitions come from the cached manifest; JSON is only re-parsed when a file changed
+        self.manifest.load()
         self.tool_functions = []
-        for tool_dir in os.listdir(tools_path):
-            dir_path = os.path.join(tools_path, tool_dir)
-            if os.path.isdir(dir_path):
-                for tool_name in os.listdir(dir_path):
-                    if tool_name.endswith('.json'):
-                        with open(os.path.join(dir_path, tool_name), 'r') as file:
-                            try:
-                                tool_def = json.load(file)
-                                tool = Tool(type=tool_def['type'], function=tool_def['function'], human_input=tool_def.get('human_input', False))
-                                self.tool_functions.append(tool)
-                            except json.JSONDecodeError as e:
-                                print(f"Error decoding JSON for tool {tool_name}: {e}")
+        for tool_dir, tool_name, tool_def, error in self.manifest.tool_files():
+            if error:
+                print(f"Error decoding JSON for tool {tool_name}: {error}")
+                continue
+            tool = Tool(type=tool_def['type'], function=tool_def['function'], human_input=tool_def.get('human_input', False))
+            self.tool_functions.append(tool)
 
     def load_all_assistants(self):
-        base_path = 'configs/assistants'
         self.load_tools()
-        tool_defs = {tool.function.name: tool.function.dict() for tool in self.tool_functions}
 
-        for assistant_dir in os.listdir(base_path):
-            if '__pycache__' in assistant_dir:
+        for assistant_dir, assistant_config_path, assistant_configs, error in self.manifest.assistant_configs():
+            if error:
+                print(f"Error loading assistant configuration from {assistant_config_path}: {error}")
                 continue
-            assistant_config_path = os.path.join(base_path, assistant_dir, "assistant.json")
-            if os.path.exists(assistant_config_path):
-                try:
-                    with open(assistant_config_path, "r") as file:
-                        assistant_config = json.load(file)[0]
-                        assistant_tools_names = assistant_config.get('tools', [])
-                        assistant_name = assistant_config.get('name', assistant_dir)
-                        assistant_tools = [tool for tool in self.tool_functions if tool.function.name in assistant_tools_names]
-
-                        log_flag = assistant_config.pop('log_flag', False)
-                        sub_assistants = assistant_config.get('assistants', None)
-                        planner = assistant_config.get('planner', 'sequential') #default is sequential
-                        print(f"Assistant '{assistant_name}' created.\n")
-                        asst_object = Assistant(name=assistant_name, log_flag=log_flag, instance=None, tools=assistant_tools, sub_assistants=sub_assistants, planner=planner)
-                        asst_object.initialize_history()
-                        self.assistants.append(asst_object)
-                except (IOError, json.JSONDecodeError) as e:
-                    print(f"Error loading assistant configuration from {assistant_config_path}: {e}")
+            # copy, so popping log_flag does not modify the cached manifest
+            assistant_config = dict(assistant_configs[0])
+            assistant_tools_names = assistant_config.get('tools', [])
+            assistant_name = assistant_config.get('name', assistant_dir)
+            assistant_tools = [tool for tool in self.tool_functions if tool.function.name in assistant_tools_names]
+
+            log_flag = assistant_config.pop('log_flag', False)
+            sub_assistants = assistant_config.get('assistants', None)
+            planner = assistant_config.get('planner', 'sequential') #default is sequential
+            print(f"Assistant '{assistant_name}' created.\n")
+            asst_object = Assistant(name=assistant_name, log_flag=log_flag, instance=None, tools=assistant_tools, sub_assistants=sub_assistants, planner=planner)
+            asst_object.initialize_history()
+            self.assistants.append(asst_object)
 
 
     def initialize_and_display_assistants(self):
@@ -180,8 +181,8 @@ class LocalEngine:
                 if human_input_flag:
                     print(f"\n{Colors.HEADER}Tool {step['tool']} requires human input:{Colors.HEADER}")
                     print(f"{Colors.GREY}Tool arguments:{Colors.ENDC} {step['args']}\n")
-
-                    user_confirmation = input(f"Type 'yes' to execute tool, anything else to skip: ")
+                    with self.interaction():
+                        user_confirmation = input(f"Type 'yes' to execute tool, anything else to skip: ")
                     if user_confirmation.lower() != 'yes':
                         assistant.add_assistant_message(f"Tool {step['tool']} execution skipped by user.")
                         print(f"{Colors.GREY}Skipping tool execution.{Colors.ENDC}")
@@ -205,15 +206,10 @@ class LocalEngine:
 
     def handle_tool_call(self,assistant, tool_call, test_mode=False):
         tool_name = tool_call['tool']
-        tool_dir = os.path.join(os.getcwd(), 'configs/tools', tool_name)
-        handler_path = os.path.join(tool_dir, 'handler.py')
-
-        # Dynamically import the handler function from the handler.py file
-        if os.path.isfile(handler_path):
-            spec = importlib.util.spec_from_file_location(f"{tool_name}_handler", handler_path)
-            tool_module = importlib.util.module_from_spec(spec)
-            spec.loader.exec_module(tool_module)
-            tool_handler = getattr(tool_module, tool_name)
+
+        # Handler modules are imported once and re-imported only when handler.py changes
+        tool_handler = self.handlers.get(tool_name)
+        if tool_handler is not None:
             # Call the handler function with arguments
             try:
                 tool_response = tool_handler(**tool_call['args'])
@@ -288,69 +284,101 @@ class LocalEngine:
             return original_plan, plan_log
 
 
-    def run_tests(self):
-        total_groundtruth = 0
-        total_planning = 0
-        total_assistant = 0
-        groundtruth_pass = 0
-        planning_pass = 0
-        assistant_pass = 0
-        for task in self.tasks:
-            original_plan, plan_log = self.run_task(task, test_mode=True)
+    def run_tests(self, report_path=None, resume=False):
+        """
+        Runs and grades the test tasks, up to self.concurrency at a time.
+        The JSON report at report_path is rewritten after every case, and a JUnit XML file
+        is written next to it at the end. With resume=True, cases already in the report
+        that passed or failed are not run again; cases that errored are retried.
+        """
+        report = TestReport(report_path, resume=resume)
+        keys = {case_key(task): index for index, task in enumerate(self.tasks)}
+        report.restrict(keys)
+        pending = [(index, task) for index, task in enumerate(self.tasks) if not report.done(case_key(task))]
+        if len(pending) < len(self.tasks):
+            print(f"Resuming: {len(self.tasks) - len(pending)} of {len(self.tasks)} tests already in {report_path}\n")
+
+        if self.concurrency <= 1 or len(pending) <= 1:
+            for index, task in pending:
+                report.add(self.run_test_case(index, task))
+        else:
+            with TaskOutput.install() as output:
+                self.output = output
+                engines = [self.isolated_copy() for _ in pending]
+                try:
+                    with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+                        futures = [pool.submit(engine.run_test_captured, index, task)
+                                   for engine, (index, task) in zip(engines, pending)]
+                        for future in as_completed(futures):
+                            report.add(future.result())
+                finally:
+                    self.output = None
+            for engine in engines:
+                self.merge_history(engine)
+
+        summary = report.summary()
+        for category, label in (('groundtruth', 'groundtruth'), ('planning', 'planning'), ('assistant', 'assistant')):
+            if category in summary:
+                result = summary[category]
+                print(f"{Colors.OKGREEN}Passed {result['passed']} {label} tests out of {result['total']} tests. Success rate: {result['rate'] * 100}%{Colors.ENDC}\n")
+        if report_path:
+            report.write_junit(os.path.splitext(report_path)[0] + '.xml')
+            print(f"Test report written to {report_path}")
+        print("Completed testing the swarm\n\n")
+        return report
+
+    def run_test_captured(self, index, task):
+        with self.output.capture():
+            return self.run_test_case(index, task)
+
+    def grade(self, prompt):
+        response = get_completion(self.client, [{"role": "user", "content": prompt}])
+        return response.content.lower() == 'true'
+
+    def run_test_case(self, index, task):
+        """Runs one test task and returns its report entry."""
+        start = time.perf_counter()
+        case = {'key': case_key(task), 'index': index, 'description': task.description,
+                'category': 'assistant', 'checks': {}, 'expected': None, 'got': None, 'error': None}
+        try:
+            result = self.run_task(task, test_mode=True)
+            original_plan = result[0] if result else None
+            case['got'] = original_plan
 
             if task.groundtruth:
-                total_groundtruth += 1
-                # Assuming get_completion returns a response object with a content attribute
-                response = get_completion(self.client, [{"role": "user", "content": EVAL_GROUNDTRUTH_PROMPT.format(original_plan, task.groundtruth)}])
-                if response.content.lower() == 'true':
-                    groundtruth_pass += 1
+                case['category'] = 'groundtruth'
+                case['expected'] = task.groundtruth
+                passed = case['checks']['groundtruth'] = self.grade(EVAL_GROUNDTRUTH_PROMPT.format(original_plan, task.groundtruth))
+                if passed:
                     print(f"{Colors.OKGREEN}✔ Groundtruth test passed for: {Colors.ENDC}{task.description}{Colors.OKBLUE}. Expected: {Colors.ENDC}{task.groundtruth}{Colors.OKBLUE}, Got: {Colors.ENDC}{original_plan}{Colors.ENDC}")
                 else:
                     print(f"{Colors.RED}✘ Test failed for: {Colors.ENDC}{task.description}{Colors.OKBLUE}. Expected: {Colors.ENDC}{task.groundtruth}{Colors.OKBLUE}, Got: {Colors.ENDC}{original_plan}{Colors.ENDC}")
-
-                total_assistant += 1
-                if task.assistant == task.expected_assistant:
-                    assistant_pass += 1
-                    print(f"{Colors.OKGREEN}✔ Correct assistant assigned. {Colors.ENDC}{Colors.OKBLUE} Expected: {Colors.ENDC}{task.expected_assistant}{Colors.OKBLUE}, Got: {Colors.ENDC}{task.assistant}{Colors.ENDC}\n")
-                else:
-                    print(f"{Colors.RED}✘ Incorrect assistant assigned. {Colors.ENDC}{Colors.OKBLUE} Expected: {Colors.ENDC}{task.expected_assistant}{Colors.OKBLUE}, Got: {Colors.ENDC}{task.assistant}{Colors.ENDC}\n")
-
-
             elif task.expected_plan:
-                total_planning += 1
-                # Assuming get_completion returns a response object with a content attribute
-                response = get_completion(self.client, [{"role": "user", "content": EVAL_PLANNING_PROMPT.format(original_plan, task.expected_plan)}])
-
-                if response.content.lower() == 'true':
-                    planning_pass += 1
+                case['category'] = 'planning'
+                case['expected'] = task.expected_plan
+                passed = case['checks']['planning'] = self.grade(EVAL_PLANNING_PROMPT.format(original_plan, task.expected_plan))
+                if passed:
                     print(f"{Colors.OKGREEN}✔ Planning test passed for: {Colors.ENDC}{task.description}{Colors.OKBLUE}. Expected: {Colors.ENDC}{task.expected_plan}{Colors.OKBLUE}, Got: {Colors.ENDC}{original_plan}{Colors.ENDC}")
                 else:
                     print(f"{Colors.RED}✘ Test failed for: {Colors.ENDC}{task.description}{Colors.OKBLUE}. Expected: {Colors.ENDC}{task.expected_plan}{Colors.OKBLUE}, Got: {Colors.ENDC}{original_plan}{Colors.ENDC}")
+            else:
+                case['expected'] = task.expected_assistant
+                case['got'] = task.assistant
 
-                total_assistant += 1
-                if task.assistant == task.expected_assistant:
-                    assistant_pass += 1
-                    print(f"{Colors.OKGREEN}✔ Correct assistant assigned.  {Colors.ENDC}{Colors.OKBLUE}Expected: {Colors.ENDC}{task.expected_assistant}{Colors.OKBLUE}, Got: {Colors.ENDC}{task.assistant}{Colors.ENDC}\n")
-                else:
-                    print(f"{Colors.RED}✘ Incorrect assistant assigned for. {Colors.ENDC}{Colors.OKBLUE} Expected: {Colors.ENDC}{task.expected_assistant}{Colors.OKBLUE}, Got: {Colors.ENDC}{task.assistant}{Colors.ENDC}\n")
-
+            passed = case['checks']['assistant'] = task.assistant == task.expected_assistant
+            if passed:
+                print(f"{Colors.OKGREEN}✔ Correct assistant assigned for: {Colors.ENDC}{task.description}{Colors.OKBLUE}. Expected: {Colors.ENDC}{task.expected_assistant}{Colors.OKBLUE}, Got: {Colors.ENDC}{task.assistant}{Colors.ENDC}\n")
             else:
-                total_assistant += 1
-                if task.assistant == task.expected_assistant:
-                    assistant_pass += 1
-                    print(f"{Colors.OKGREEN}✔ Correct assistant assigned for: {Colors.ENDC}{task.description}{Colors.OKBLUE}. Expected: {Colors.ENDC}{task.expected_assistant}{Colors.OKBLUE}, Got: {Colors.ENDC}{task.assistant}{Colors.ENDC}\n")
-                else:
-                    print(f"{Colors.RED}✘ Incorrect assistant assigned for: {Colors.ENDC}{task.description}{Colors.OKBLUE}. Expected: {Colors.ENDC}{task.expected_assistant}{Colors.OKBLUE}, Got: {Colors.ENDC}{task.assistant}{Colors.ENDC}\n")
-
-        if total_groundtruth > 0:
-            print(f"\n{Colors.OKGREEN}Passed {groundtruth_pass} groundtruth tests out of {total_groundtruth} tests. Success rate: {groundtruth_pass / total_groundtruth * 100}%{Colors.ENDC}\n")
-        if total_planning > 0:
-            print(f"{Colors.OKGREEN}Passed {planning_pass} planning tests out of {total_planning} tests. Success rate: {planning_pass / total_planning * 100}%{Colors.ENDC}\n")
-        if total_assistant > 0:
-            print(f"{Colors.OKGREEN}Passed {assistant_pass} assistant tests out of {total_assistant} tests. Success rate: {assistant_pass / total_assistant * 100}%{Colors.ENDC}\n")
-        print("Completed testing the swarm\n\n")
+                print(f"{Colors.RED}✘ Incorrect assistant assigned for: {Colors.ENDC}{task.description}{Colors.OKBLUE}. Expected: {Colors.ENDC}{task.expected_assistant}{Colors.OKBLUE}, Got: {Colors.ENDC}{task.assistant}{Colors.ENDC}\n")
+        except Exception as e:
+            case['error'] = f"{type(e).__name__}: {e}"
+            print(f"{Colors.RED}✘ Error running test: {Colors.ENDC}{task.description}{Colors.OKBLUE}: {Colors.ENDC}{case['error']}\n")
 
-    def deploy(self, client, test_mode=False, test_file_path=None):
+        case['passed'] = case['error'] is None and all(case['checks'].values())
+        case['duration'] = time.perf_counter() - start
+        return case
+
+    def deploy(self, client, test_mode=False, test_file_path=None, report_path=None, resume=False):
         """
         Processes all tasks in the order they are listed in self.tasks.
         """
@@ -359,7 +387,7 @@ class LocalEngine:
             print("\nTesting the swarm\n\n")
             self.load_test_tasks(test_file_path)
             self.initialize_and_display_assistants()
-            self.run_tests()
+            self.run_tests(report_path or test_report_path, resume=resume)
             for assistant in self.assistants:
                 if assistant.name == 'user_interface':
                     assistant.save_conversation(test=True)
@@ -367,16 +395,83 @@ class LocalEngine:
             print("\n🐝🐝🐝 Deploying the swarm 🐝🐝🐝\n\n")
             self.initialize_and_display_assistants()
             print("\n" + "-" * 100 + "\n")
-            for task in self.tasks:
-                print('Task',task.id)
-                print(f"{Colors.BOLD}Running task{Colors.ENDC}")
-                self.run_task(task, test_mode)
-                print("\n" + "-" * 100 + "\n")
+            if self.persist or self.concurrency <= 1 or len(self.tasks) <= 1:
+                results = [self.deploy_task(task, test_mode) for task in self.tasks]
+            else:
+                results = self.deploy_concurrently(test_mode)
             #save the session
             for assistant in self.assistants:
                 if assistant.name == 'user_interface':
                     assistant.save_conversation()
              #assistant.print_conversation()
+            return results
+
+    def deploy_task(self, task, test_mode=False):
+        print('Task',task.id)
+        print(f"{Colors.BOLD}Running task{Colors.ENDC}")
+        result = self.run_task(task, test_mode)
+        print("\n" + "-" * 100 + "\n")
+        return result
+
+    def deploy_concurrently(self, test_mode=False):
+        """
+        Runs self.tasks on a pool of self.concurrency threads.
+        Each task gets its own copies of the assistants, its printed output is flushed in one
+        piece when it finishes, and the results come back in task order. Afterwards the
+        tasks' conversations are appended to the engine's assistants, also in task order.
+        """
+        with TaskOutput.install() as output:
+            self.output = output
+            engines = [self.isolated_copy() for _ in self.tasks]
+            try:
+                with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+                    futures = [pool.submit(engine.deploy_captured, task, test_mode)
+                               for engine, task in zip(engines, self.tasks)]
+                    results = [future.result() for future in futures]
+            finally:
+                self.output = None
+        for engine in engines:
+            self.merge_history(engine)
+        return results
+
+    def deploy_captured(self, task, test_mode=False):
+        with self.output.capture():
+            return self.deploy_task(task, test_mode)
+
+    def isolated_copy(self):
+        """
+        A shallow copy of the engine whose assistants have their own history lists and runs.
+        Client, tools, handlers and the global context log are shared.
+        """
+        engine = copy.copy(self)
+        engine.assistants = []
+        engine.last_assistant = None
+        engine.history_offsets = {}
+        for assistant in self.assistants:
+            clone = copy.copy(assistant)
+            clone.context = {**assistant.context, 'history': list(assistant.context['history'])}
+            clone.runs = []
+            engine.history_offsets[id(clone.context['history'])] = len(clone.context['history'])
+            engine.assistants.append(clone)
+        return engine
+
+    def merge_history(self, engine):
+        """Append the messages an isolated copy added to the matching assistants of this engine."""
+        merged = set()
+        for clone in engine.assistants:
+            history = clone.context['history']
+            base_history = self.get_assistant(clone.name).context['history']
+            # assistants that shared a list through pass_context contribute its messages once
+            if (id(history), id(base_history)) in merged:
+                continue
+            merged.add((id(history), id(base_history)))
+            base_history.extend(history[engine.history_offsets.get(id(history), 0):])
+
+    def interaction(self):
+        """Context for prompting the user; makes the prompt visible while tasks are captured."""
+        if self.output is None:
+            return contextlib.nullcontext()
+        return self.output.interactive()
 
     def load_test_tasks(self, test_file_paths):
         self.tasks = []  # Clear any existing tasks
@@ -396,7 +491,8 @@ class LocalEngine:
                     self.tasks.append(task)
 
     def store_context_globally(self, assistant):
-        self.global_context['history'].append({assistant.name:assistant.context['history']})
+        # Only the messages added since the last step are appended to the log
+        self.global_context['history'].record(assistant)
 
     def initialize_global_history(self):
-        self.global_context['history'] = []
+        self.global_context['history'] = ContextLog()
@@ -0,0 +1,49 @@
+import importlib.util
+import os
+import threading
+
+
+class HandlerRegistry:
+    """
+    Loads each tool's configs/tools/<tool>/handler.py once and caches the handler function.
+    A handler is re-imported only when its file's mtime changes, so edits are picked up
+    without restarting, while unchanged handlers (and the clients they hold) are reused.
+    """
+
+    def __init__(self, tools_path='configs/tools'):
+        self.tools_path = tools_path
+        self._handlers = {}  # tool name -> (mtime_ns, handler)
+        self._lock = threading.Lock()
+
+    def handler_path(self, tool_name):
+        return os.path.join(os.getcwd(), self.tools_path, tool_name, 'handler.py')
+
+    def get(self, tool_name):
+        """
+        Return the handler function for tool_name, or None if the tool has no handler.py.
+        """
+        handler_path = self.handler_path(tool_name)
+        try:
+            mtime = os.stat(handler_path).st_mtime_ns
+        except FileNotFoundError:
+            self._handlers.pop(tool_name, None)
+            return None
+
+        cached = self._handlers.get(tool_name)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        with self._lock:
+            cached = self._handlers.get(tool_name)
+            if cached is not None and cached[0] == mtime:
+                return cached[1]
+            spec = importlib.util.spec_from_file_location(f"{tool_name}_handler", handler_path)
+            tool_module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(tool_module)
+            handler = getattr(tool_module, tool_name)
+            self._handlers[tool_name] = (mtime, handler)
+            return handler
+
+    def clear(self):
+        with self._lock:
+            self._handlers.clear()
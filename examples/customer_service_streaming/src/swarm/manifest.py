@@ -0,0 +1,150 @@
+import ast
+import hashlib
+import json
+import os
+
+MANIFEST_VERSION = 1
+
+
+def file_sha256(path):
+    with open(path, 'rb') as file:
+        return hashlib.sha256(file.read()).hexdigest()
+
+
+def handler_signatures(source):
+    """
+    Statically read the top-level functions defined in a handler.py, without executing it.
+    Returns {function name: {"args": [...], "varkw": bool}}.
+    """
+    signatures = {}
+    for node in ast.parse(source).body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            args = node.args
+            signatures[node.name] = {
+                'args': [arg.arg for arg in args.posonlyargs + args.args + args.kwonlyargs],
+                'varkw': args.kwarg is not None,
+            }
+    return signatures
+
+
+def _parse(path):
+    """Parse one tracked file into its manifest entry: {"data": ...} or {"error": ...}."""
+    try:
+        with open(path, 'r') as file:
+            source = file.read()
+        if path.endswith('.py'):
+            return {'data': handler_signatures(source)}
+        return {'data': json.loads(source)}
+    except (IOError, SyntaxError, ValueError) as e:
+        return {'error': str(e)}
+
+
+class Manifest:
+    """
+    Compiled view of configs/tools and configs/assistants, cached in one JSON file.
+
+    The cache is keyed by a fingerprint of the mtimes and sizes of the config directories
+    and their files. When the fingerprint matches, loading is a handful of stat calls and
+    one JSON read. When it does not, only files whose content hash changed are re-parsed.
+    Handlers are inspected with the ast module, never imported.
+    """
+
+    def __init__(self, tools_path='configs/tools', assistants_path='configs/assistants',
+                 cache_path='.cache/manifest.json'):
+        self.tools_path = tools_path
+        self.assistants_path = assistants_path
+        self.cache_path = cache_path
+        self.fingerprint_entries = []
+        self.files = {}
+        self.rebuilt = False
+
+    def _tracked(self):
+        """Yield (relative path, DirEntry) for every directory and file the manifest depends on."""
+        for base, wanted in ((self.tools_path, self._is_tool_file),
+                             (self.assistants_path, lambda name: name == 'assistant.json')):
+            if not os.path.isdir(base):
+                continue
+            yield base, None
+            for entry in sorted(os.scandir(base), key=lambda e: e.name):
+                if '__pycache__' in entry.name or not entry.is_dir():
+                    continue
+                yield entry.path, entry
+                for file_entry in sorted(os.scandir(entry.path), key=lambda e: e.name):
+                    if file_entry.is_file() and wanted(file_entry.name):
+                        yield file_entry.path, file_entry
+
+    @staticmethod
+    def _is_tool_file(name):
+        return name.endswith('.json') or name == 'handler.py'
+
+    def fingerprint(self):
+        fingerprint = []
+        for path, entry in self._tracked():
+            stat = entry.stat() if entry is not None else os.stat(path)
+            fingerprint.append([path, stat.st_mtime_ns, stat.st_size])
+        return fingerprint
+
+    def _read_cache(self):
+        try:
+            with open(self.cache_path, 'r') as file:
+                cache = json.load(file)
+        except (IOError, ValueError):
+            return None
+        if cache.get('version') != MANIFEST_VERSION:
+            return None
+        return cache
+
+    def load(self):
+        """Load the manifest from the cache, rebuilding the parts whose files changed."""
+        fingerprint = self.fingerprint_entries = self.fingerprint()
+        cache = self._read_cache()
+        if cache is not None and cache['fingerprint'] == fingerprint:
+            self.files = cache['files']
+            self.rebuilt = False
+            return self
+
+        cached_files = cache['files'] if cache is not None else {}
+        files = {}
+        for path, _, _ in fingerprint:
+            if not os.path.isfile(path):
+                continue
+            digest = file_sha256(path)
+            entry = cached_files.get(path)
+            if entry is None or entry['sha256'] != digest:
+                entry = dict(_parse(path), sha256=digest)
+            files[path] = entry
+        self.files = files
+        self.rebuilt = True
+        self._write_cache({'version': MANIFEST_VERSION, 'fingerprint': fingerprint, 'files': files})
+        return self
+
+    def _write_cache(self, cache):
+        directory = os.path.dirname(self.cache_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.cache_path}.tmp"
+        with open(tmp_path, 'w') as file:
+            json.dump(cache, file)
+        os.replace(tmp_path, self.cache_path)
+
+    def tool_dirs(self):
+        return [os.path.basename(path) for path, _, _ in self.fingerprint_entries
+                if os.path.dirname(path) == self.tools_path and os.path.isdir(path)]
+
+    def tool_files(self):
+        """Yield (tool dir, file name, tool definition, error) for each tool JSON file."""
+        for path, entry in self.files.items():
+            tool_dir, file_name = os.path.split(path)
+            if os.path.dirname(tool_dir) == self.tools_path and file_name.endswith('.json'):
+                yield os.path.basename(tool_dir), file_name, entry.get('data'), entry.get('error')
+
+    def handler(self, tool_dir):
+        """Handler entry {"data": signatures} or {"error": ...} for a tool, None if it has no handler.py."""
+        return self.files.get(os.path.join(self.tools_path, tool_dir, 'handler.py'))
+
+    def assistant_configs(self):
+        """Yield (assistant dir, config path, config list, error) for each assistant.json."""
+        for path, entry in self.files.items():
+            assistant_dir = os.path.dirname(path)
+            if os.path.dirname(assistant_dir) == self.assistants_path:
+                yield os.path.basename(assistant_dir), path, entry.get('data'), entry.get('error')
@@ -9,11 +9,14 @@ from configs.general import Colors, tasks_path
 
 
 class Swarm:
-    def __init__(self, engine_name, tasks=[], persist=False):
+    def __init__(self, engine_name, tasks=[], persist=False, concurrency=None, report_path=None, resume=False):
         self.tasks = tasks
         self.engine_name = engine_name
         self.engine = None
         self.persist = persist
+        self.concurrency = concurrency
+        self.report_path = report_path
+        self.resume = resume
 
     def deploy(self, test_mode=False, test_file_paths=None):
         """
@@ -28,8 +31,8 @@ class Swarm:
 
         elif self.engine_name == 'local':
             print(f"{Colors.GREY}Selected engine: Local{Colors.ENDC}")
-            self.engine = LocalEngine(client, self.tasks, persist=self.persist)
-            self.engine.deploy(client, test_mode, test_file_paths)
+            self.engine = LocalEngine(client, self.tasks, persist=self.persist, concurrency=self.concurrency)
+            self.engine.deploy(client, test_mode, test_file_paths, report_path=self.report_path, resume=self.resume)
 
     def load_tasks(self):
         self.tasks = []
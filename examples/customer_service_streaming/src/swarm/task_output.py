@@ -0,0 +1,84 @@
+import contextlib
+import io
+import sys
+import threading
+
+
+class TaskOutput:
+    """
+    Stand-in for sys.stdout while tasks run on worker threads.
+
+    Inside capture(), everything a thread prints goes to its own buffer. The buffer is
+    written to the real stream in one piece when the task finishes, so output from
+    concurrent tasks never interleaves. Threads that are not capturing write through.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        # held for a whole prompt + input() so only one task talks to the user at a time
+        self._input_lock = threading.RLock()
+
+    @classmethod
+    @contextlib.contextmanager
+    def install(cls):
+        """Replace sys.stdout with a TaskOutput for the duration of the block."""
+        output = cls(sys.stdout)
+        sys.stdout = output
+        try:
+            yield output
+        finally:
+            sys.stdout = output.stream
+
+    def write(self, text):
+        buffer = getattr(self._local, 'buffer', None)
+        if buffer is not None:
+            return buffer.write(text)
+        with self._write_lock:
+            return self.stream.write(text)
+
+    def flush(self):
+        if getattr(self._local, 'buffer', None) is None:
+            self.stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+    def _flush_buffer(self):
+        buffer = self._local.buffer
+        text = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        if text:
+            with self._write_lock:
+                self.stream.write(text)
+                self.stream.flush()
+
+    @contextlib.contextmanager
+    def capture(self):
+        """Buffer this thread's output and flush it atomically at the end of the block."""
+        self._local.buffer = io.StringIO()
+        try:
+            yield
+        finally:
+            self._flush_buffer()
+            self._local.buffer = None
+
+    @contextlib.contextmanager
+    def interactive(self):
+        """
+        Show this thread's buffered output and write through for the rest of the block,
+        so a prompt for human input is visible. Interactions are serialized across threads.
+        """
+        with self._input_lock:
+            buffer = getattr(self._local, 'buffer', None)
+            if buffer is None:
+                yield
+                return
+            self._flush_buffer()
+            self._local.buffer = None
+            try:
+                yield
+            finally:
+                self._local.buffer = buffer
@@ -1,3 +1,6 @@
+import functools
+
+
 def get_completion(client,
     messages: list[dict[str, str]],
     model: str = "gpt-4-0125-preview",
@@ -38,3 +41,17 @@ def get_completion(client,
 
 def is_dict_empty(d):
     return all(not v for v in d.values())
+
+
+@functools.lru_cache(maxsize=None)
+def get_openai_client():
+    """Process-wide OpenAI client, so tool handlers reuse one connection pool."""
+    from openai import OpenAI
+    return OpenAI()
+
+
+@functools.lru_cache(maxsize=None)
+def get_qdrant_client(host='localhost'):
+    """Process-wide Qdrant client, created on first use."""
+    import qdrant_client
+    return qdrant_client.QdrantClient(host=host)
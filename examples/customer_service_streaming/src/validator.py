@@ -1,66 +1,65 @@
-import os
-import importlib
-import json
 from src.swarm.tool import Tool
 from src.swarm.assistants import Assistant
+from src.swarm.manifest import Manifest
 
 def validate_tool(tool_definition):
     # Validate the tool using its schema
     Tool(**tool_definition)  # Uncomment if you have a schema to validate tools
     print(f"Validating tool: {tool_definition['function']['name']}")
 
-def validate_all_tools(engine):
-    tools_path = os.path.join(os.getcwd(), 'configs/tools')
-    for tool_dir in os.listdir(tools_path):
-        if '__pycache__' in tool_dir:
-            continue
-        tool_dir_path = os.path.join(tools_path, tool_dir)
-        if os.path.isdir(tool_dir_path):
-            # Validate tool.json
-            tool_json_path = os.path.join(tool_dir_path, 'tool.json')
-            handler_path = os.path.join(tool_dir_path, 'handler.py')
-            if os.path.isfile(tool_json_path) and os.path.isfile(handler_path):
-                with open(tool_json_path, 'r') as file:
-                    tool_def = json.load(file)
-                    tool_name_from_json = tool_def['function']['name']
+def validate_all_tools(engine, manifest=None):
+    # Handlers are checked statically from the manifest (ast), never executed
+    manifest = (manifest or Manifest()).load()
+    tool_defs = {tool_dir: (tool_def, error) for tool_dir, file_name, tool_def, error in manifest.tool_files()
+                 if file_name == 'tool.json'}
+    for tool_dir in manifest.tool_dirs():
+        handler = manifest.handler(tool_dir)
+        if tool_dir in tool_defs and handler is not None:
+            tool_def, error = tool_defs[tool_dir]
+            if error:
+                raise ValueError(f"Invalid tool.json in {tool_dir}: {error}")
+            tool_name_from_json = tool_def['function']['name']
 
-                    # Check if the folder name matches the tool name in tool.json
-                    if tool_name_from_json != tool_dir:
-                        print(f"Mismatch in tool folder name and tool name in JSON for {tool_dir}")
-                    else:
-                        print(f"{tool_dir}/tool.json tool name matches folder name.")
+            # Check if the folder name matches the tool name in tool.json
+            if tool_name_from_json != tool_dir:
+                print(f"Mismatch in tool folder name and tool name in JSON for {tool_dir}")
+            else:
+                print(f"{tool_dir}/tool.json tool name matches folder name.")
 
-                    # Check if the function name in handler.py matches the tool name
-                    spec = importlib.util.spec_from_file_location(f"{tool_dir}_handler", handler_path)
-                    tool_module = importlib.util.module_from_spec(spec)
-                    spec.loader.exec_module(tool_module)
+            if handler.get('error'):
+                raise SyntaxError(f"Invalid {tool_dir}/handler.py: {handler['error']}")
 
-                    # Verify if the function exists in handler.py and matches the name
-                    if hasattr(tool_module, tool_dir):
-                        print(f"{tool_dir}/handler.py contains a matching function name.")
-                    else:
-                        print(f"{tool_dir}/handler.py does not contain a function '{tool_dir}'.")
+            # Verify if the function exists in handler.py and matches the name
+            signature = handler['data'].get(tool_dir)
+            if signature is None:
+                print(f"{tool_dir}/handler.py does not contain a function '{tool_dir}'.")
+                continue
+            print(f"{tool_dir}/handler.py contains a matching function name.")
 
-            else:
-                if not os.path.isfile(tool_json_path):
-                    print(f"Missing tool.json in {tool_dir} tool folder.")
-                if not os.path.isfile(handler_path):
-                    print(f"Missing handler.py in {tool_dir} tool folder.")
+            # Every parameter the model may send must be accepted by the handler
+            properties = tool_def['function'].get('parameters', {}).get('properties', {})
+            missing = [name for name in properties if name not in signature['args']]
+            if missing and not signature['varkw']:
+                print(f"{tool_dir}/handler.py function '{tool_dir}' does not accept parameters: {missing}")
+
+        else:
+            if tool_dir not in tool_defs:
+                print(f"Missing tool.json in {tool_dir} tool folder.")
+            if handler is None:
+                print(f"Missing handler.py in {tool_dir} tool folder.")
     print('\n')
 
     # Function to validate all assistants
-def validate_all_assistants():
-    assistants_path = os.path.join(os.getcwd(), 'configs/assistants')
-    for root, dirs, files in os.walk(assistants_path):
-        for file in files:
-            if file.endswith('assistant.json'):
-                file_path = os.path.join(root, file)
-                with open(file_path, 'r') as file:
-                        assistant_data = json.load(file)[0]  # Access the first dictionary in the list
-                        try:
-                            Assistant(**assistant_data)
-                            print(f"{os.path.basename(root)} assistant validated!")
-                        except:
-                            Assistant(**assistant_data)
-                            print(f"Assistant validation failed!")
+def validate_all_assistants(manifest=None):
+    manifest = (manifest or Manifest()).load()
+    for assistant_dir, file_path, assistant_configs, error in manifest.assistant_configs():
+        if error:
+            raise ValueError(f"Invalid {file_path}: {error}")
+        assistant_data = assistant_configs[0]  # Access the first dictionary in the list
+        try:
+            Assistant(**assistant_data)
+            print(f"{assistant_dir} assistant validated!")
+        except:
+            Assistant(**assistant_data)
+            print(f"Assistant validation failed!")
     print('\n')
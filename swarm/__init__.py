@@ -1,4 +1,59 @@
-from .core import Swarm
-from .types import Agent, Response
+import importlib
+from typing import TYPE_CHECKING
 
-__all__ = ["Swarm", "Agent", "Response"]
+if TYPE_CHECKING:
+    from .batch import BatchProgress
+    from .core import Swarm, AsyncSwarm
+    from .executor import ToolExecutor
+    from .history import History
+    from .hooks import HookEvent, MetricsAggregator
+    from .session import Session, AsyncSession
+    from .speculative import idempotent
+    from .types import Agent, BatchResult, Response
+
+# 公开名称 -> 所在子模块；子模块在第一次访问对应名称时才导入（PEP 562），
+# 例如 from swarm import Agent 不会加载 core 和 openai
+_EXPORTS = {
+    "Swarm": ".core",
+    "AsyncSwarm": ".core",
+    "ToolExecutor": ".executor",
+    "History": ".history",
+    "HookEvent": ".hooks",
+    "MetricsAggregator": ".hooks",
+    "Session": ".session",
+    "AsyncSession": ".session",
+    "idempotent": ".speculative",
+    "BatchProgress": ".batch",
+    "BatchResult": ".types",
+    "Agent": ".types",
+    "Response": ".types",
+}
+
+__all__ = [
+    "Swarm",
+    "AsyncSwarm",
+    "ToolExecutor",
+    "History",
+    "HookEvent",
+    "MetricsAggregator",
+    "Session",
+    "AsyncSession",
+    "idempotent",
+    "BatchProgress",
+    "BatchResult",
+    "Agent",
+    "Response",
+]
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,191 @@
+import asyncio
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Iterable, Iterator, Optional
+
+from .types import Agent, BatchResult
+
+
+class BatchProgress:
+    """
+    批量运行的进度计数器，可在运行过程中从其他线程读取
+    属性:
+        submitted: 已提交的对话数
+        completed: 已完成的对话数（包括失败）
+        failed: 失败的对话数
+    """
+
+    def __init__(self):
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self._lock = threading.Lock()
+
+    @property
+    def in_flight(self) -> int:
+        return self.submitted - self.completed
+
+    def _submit(self) -> None:
+        with self._lock:
+            self.submitted += 1
+
+    def _finish(self, result: BatchResult) -> None:
+        with self._lock:
+            self.completed += 1
+            if result.error is not None:
+                self.failed += 1
+
+    def __repr__(self) -> str:
+        return (f"BatchProgress(submitted={self.submitted}, completed={self.completed}, "
+                f"failed={self.failed})")
+
+
+def _run_kwargs(agent: Agent, item, context_variables: Optional[dict], run_kwargs: dict) -> dict:
+    """
+    把一个输入对话转换为 run 的参数
+    对话可以是消息列表，也可以是 {"messages", "context_variables", "agent"} 字典。
+    """
+    if isinstance(item, dict):
+        kwargs = dict(
+            run_kwargs,
+            agent=item.get("agent", agent),
+            messages=item["messages"],
+            context_variables=item.get("context_variables", context_variables or {}),
+        )
+    else:
+        kwargs = dict(run_kwargs, agent=agent, messages=item,
+                      context_variables=context_variables or {})
+    # 批量运行只返回完整的 Response
+    kwargs["stream"] = False
+    return kwargs
+
+
+def run_batch(
+    swarm,
+    agent: Agent,
+    conversations: Iterable,
+    concurrency: int = 8,
+    ordered: bool = True,
+    context_variables: Optional[dict] = None,
+    progress: Optional[BatchProgress] = None,
+    **run_kwargs,
+) -> Iterator[BatchResult]:
+    """
+    使用线程池并发运行多个独立对话，每个对话都走 swarm.run
+    输入按需读取，始终保持最多 concurrency 个对话在途；
+    有序模式下先完成的结果会被暂存，直到前面的结果都已返回。
+    Args:
+        swarm: 执行对话的 Swarm
+        agent: 默认的初始 agent
+        conversations: 消息列表（或对话字典）的可迭代对象
+        concurrency: 最大并发数
+        ordered: True 按输入顺序返回结果，False 按完成顺序返回
+        context_variables: 默认的上下文变量
+        progress: 可选的进度计数器
+        run_kwargs: 传给 run 的其他参数
+    Returns:
+        BatchResult 的迭代器；单个对话的异常记录在 BatchResult.error 中
+    """
+    progress = progress if progress is not None else BatchProgress()
+
+    def run_one(index, item):
+        try:
+            response = swarm.run(**_run_kwargs(agent, item, context_variables, run_kwargs))
+            result = BatchResult(index=index, response=response)
+        except Exception as e:
+            result = BatchResult(index=index, error=e)
+        progress._finish(result)
+        return result
+
+    items = enumerate(conversations)
+    pool = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="swarm-batch")
+
+    def submit_next(pending):
+        for index, item in items:
+            progress._submit()
+            pending.add(pool.submit(run_one, index, item))
+            return True
+        return False
+
+    pending = set()
+    try:
+        while len(pending) < concurrency and submit_next(pending):
+            pass
+        # 有序模式下先完成的结果暂存在 buffered 中，等前面的结果都返回后再按顺序输出
+        buffered = {}
+        next_index = 0
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            while len(pending) < concurrency and submit_next(pending):
+                pass
+            results = [future.result() for future in done]
+            if not ordered:
+                yield from results
+                continue
+            for result in results:
+                buffered[result.index] = result
+            while next_index in buffered:
+                yield buffered.pop(next_index)
+                next_index += 1
+    finally:
+        # 调用方提前停止迭代时取消尚未开始的对话，不等待在途的对话结束（与 arun_batch 一致）
+        for future in pending:
+            future.cancel()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+async def arun_batch(
+    swarm,
+    agent: Agent,
+    conversations: Iterable,
+    concurrency: int = 8,
+    ordered: bool = True,
+    context_variables: Optional[dict] = None,
+    progress: Optional[BatchProgress] = None,
+    **run_kwargs,
+):
+    """run_batch 的异步版本，在当前事件循环中以任务方式运行 AsyncSwarm.run"""
+    progress = progress if progress is not None else BatchProgress()
+
+    async def run_one(index, item):
+        try:
+            response = await swarm.run(**_run_kwargs(agent, item, context_variables, run_kwargs))
+            result = BatchResult(index=index, response=response)
+        except Exception as e:
+            result = BatchResult(index=index, error=e)
+        progress._finish(result)
+        return result
+
+    items = enumerate(conversations)
+
+    def submit_next(pending):
+        for index, item in items:
+            progress._submit()
+            pending.add(asyncio.ensure_future(run_one(index, item)))
+            return True
+        return False
+
+    pending = set()
+    try:
+        while len(pending) < concurrency and submit_next(pending):
+            pass
+        buffered = {}
+        next_index = 0
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            while len(pending) < concurrency and submit_next(pending):
+                pass
+            results = [task.result() for task in done]
+            if not ordered:
+                for result in results:
+                    yield result
+                continue
+            for result in results:
+                buffered[result.index] = result
+            while next_index in buffered:
+                yield buffered.pop(next_index)
+                next_index += 1
+    finally:
+        # 调用方提前停止迭代时取消剩余任务
+        for task in pending:
+            task.cancel()
@@ -0,0 +1,280 @@
+import asyncio
+import inspect
+import threading
+import time
+from typing import Callable, Optional
+
+from .hooks import usage_to_dict
+from .util import estimate_message_tokens, estimate_tokens
+
+# Response.stop_reason 的取值
+STOP_COMPLETED = "completed"          # 模型不再调用工具，正常结束
+STOP_TOOL_CALLS = "tool_calls"        # execute_tools=False，返回待执行的工具调用
+STOP_MAX_TURNS = "max_turns"          # 达到 max_turns
+STOP_DEADLINE = "deadline"            # 超过截止时间
+STOP_MAX_TOKENS = "max_tokens"        # 超过 token 预算
+STOP_MAX_TOOL_TIME = "max_tool_time"  # 超过工具执行时间预算
+STOP_CANCELLED = "cancelled"          # 被 CancellationToken 取消
+STOP_ERROR = "error"                  # 运行因异常结束（只出现在 run_end 事件中）
+
+
+class BudgetExceeded(Exception):
+    """请求开始或等待前发现预算已经用尽（超过截止时间或被取消）"""
+
+    def __init__(self, stop_reason: str):
+        super().__init__(stop_reason)
+        self.stop_reason = stop_reason
+
+
+class CancellationToken:
+    """
+    协作式取消令牌，可以在任意线程中调用 cancel()
+    运行会在轮次之间和流式 chunk 之间检查它；取消时正在进行的流会被关闭。
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks = []
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self) -> None:
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                pass
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """等待最多 timeout 秒，期间被取消时立即返回；返回是否已取消"""
+        return self._event.wait(timeout)
+
+    def on_cancel(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """
+        注册取消时调用的回调（已取消时立即调用）
+        Returns:
+            注销该回调的函数
+        """
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return lambda: self._remove(callback)
+        callback()
+        return lambda: None
+
+    def _remove(self, callback) -> None:
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+
+class RunBudget:
+    """
+    一次 run 的资源预算
+    用法: client.run(agent, messages, budget=RunBudget(timeout=30, cancel_token=token))
+    预算只是配置，可以被多次 run 复用；每次 run 都从零开始计时和计数。
+    Args:
+        timeout: 相对 run 开始的墙钟时间上限（秒）
+        deadline: 绝对截止时间（time.monotonic() 时间戳），与 timeout 取较早者
+        max_tokens: 本次 run 的 token 总数上限（优先使用 usage，缺失时本地估算）
+        max_tool_time: 本次 run 中工具执行的总时间上限（秒）
+        cancel_token: 可选的取消令牌
+    """
+
+    def __init__(
+        self,
+        timeout: Optional[float] = None,
+        deadline: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        max_tool_time: Optional[float] = None,
+        cancel_token: Optional[CancellationToken] = None,
+    ):
+        self.timeout = timeout
+        self.deadline = deadline
+        self.max_tokens = max_tokens
+        self.max_tool_time = max_tool_time
+        self.cancel_token = cancel_token
+
+    def start(self) -> "BudgetTracker":
+        return BudgetTracker(self)
+
+
+class BudgetTracker:
+    """一次 run 中预算的使用情况，由 RunBudget.start() 在 run 开始时创建"""
+
+    def __init__(self, budget: RunBudget):
+        self.budget = budget
+        self.token = budget.cancel_token
+        deadline = budget.deadline
+        if budget.timeout is not None:
+            timeout_deadline = time.monotonic() + budget.timeout
+            deadline = timeout_deadline if deadline is None else min(deadline, timeout_deadline)
+        self.deadline = deadline
+        self.tokens = 0
+        self.tool_time = 0.0
+        self.stop_reason = None
+
+    def remaining_time(self) -> Optional[float]:
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def exceeded(self) -> Optional[str]:
+        """检查预算，超出时记录并返回停止原因"""
+        if self.stop_reason is None:
+            budget = self.budget
+            if self.token is not None and self.token.cancelled:
+                self.stop_reason = STOP_CANCELLED
+            elif self.deadline is not None and time.monotonic() >= self.deadline:
+                self.stop_reason = STOP_DEADLINE
+            elif budget.max_tokens is not None and self.tokens >= budget.max_tokens:
+                self.stop_reason = STOP_MAX_TOKENS
+            elif budget.max_tool_time is not None and self.tool_time >= budget.max_tool_time:
+                self.stop_reason = STOP_MAX_TOOL_TIME
+        return self.stop_reason
+
+    def request_params(self, stream: bool) -> dict:
+        """
+        本次请求需要附加的参数：有 token 预算的流式请求要求返回 usage
+        请求超时由 bind 在每次尝试时按剩余时间设置。
+        """
+        params = {}
+        if stream and self.budget.max_tokens is not None:
+            params["stream_options"] = {"include_usage": True}
+        return params
+
+    def check(self) -> None:
+        """已超过截止时间或被取消时抛出 BudgetExceeded"""
+        if self.stopped():
+            raise BudgetExceeded(self.stop_reason)
+
+    def stopped(self) -> bool:
+        """是否已超过截止时间或被取消（token 和工具时间预算只在轮次之间检查）"""
+        return self.exceeded() in (STOP_DEADLINE, STOP_CANCELLED)
+
+    def _attempt_params(self, params: dict) -> dict:
+        self.check()
+        remaining = self.remaining_time()
+        if remaining is None:
+            return params
+        timeout = params.get("timeout")
+        if isinstance(timeout, (int, float)) and timeout < remaining:
+            return params
+        return dict(params, timeout=remaining)
+
+    def bind(self, create: Callable) -> Callable:
+        """
+        包装 chat.completions.create：每次尝试（包括重试和对冲）发出时检查预算，
+        并以那一刻的剩余时间作为请求超时
+        """
+
+        def bounded(**params):
+            return create(**self._attempt_params(params))
+
+        return bounded
+
+    def abind(self, create: Callable) -> Callable:
+        """bind 的异步版本"""
+
+        async def bounded(**params):
+            return await create(**self._attempt_params(params))
+
+        return bounded
+
+    def sleep(self, seconds: float) -> bool:
+        """
+        在截止时间和取消令牌的约束下等待
+        Returns:
+            等满 seconds 时返回 True；等到截止时间或被取消时返回 False（并记录停止原因）
+        """
+        remaining = self.remaining_time()
+        if remaining is not None and seconds >= remaining:
+            self._wait(remaining)
+            self.exceeded()
+            return False
+        return not self._wait(seconds) and not self.stopped()
+
+    def _wait(self, seconds: float) -> bool:
+        if self.token is not None:
+            return self.token.wait(seconds)
+        if seconds:
+            time.sleep(seconds)
+        return False
+
+    async def asleep(self, seconds: float) -> bool:
+        """sleep 的异步版本，取消时立即唤醒"""
+        remaining = self.remaining_time()
+        if remaining is not None and seconds >= remaining:
+            await self._await(remaining)
+            self.exceeded()
+            return False
+        return not await self._await(seconds) and not self.stopped()
+
+    async def _await(self, seconds: float) -> bool:
+        if self.token is None:
+            if seconds:
+                await asyncio.sleep(seconds)
+            return False
+        loop = asyncio.get_running_loop()
+        woken = loop.create_future()
+        unwatch = self.token.on_cancel(lambda: loop.call_soon_threadsafe(
+            lambda: woken.done() or woken.set_result(None)))
+        try:
+            await asyncio.wait_for(woken, seconds)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            unwatch()
+        return self.token.cancelled
+
+    def add_usage(self, usage, history, message: dict) -> None:
+        """
+        计入一次 completion 的 token 数
+        Args:
+            usage: completion 返回的 usage；为 None 时按历史和回复本地估算
+            history: 本次请求发送的历史（不含 message，应在追加回复之前调用）
+            message: 模型的回复
+        """
+        usage = usage_to_dict(usage)
+        if usage and usage["total_tokens"]:
+            self.tokens += usage["total_tokens"]
+        else:
+            self.tokens += estimate_tokens(history) + estimate_message_tokens(message)
+
+    def add_tool_time(self, seconds: float) -> None:
+        self.tool_time += seconds
+
+    def on_cancel(self, callback: Callable[[], None]) -> Callable[[], None]:
+        if self.token is None:
+            return lambda: None
+        return self.token.on_cancel(callback)
+
+
+def close_stream(stream) -> None:
+    """关闭流式响应底层的 HTTP 连接（同步流）"""
+    close = getattr(stream, "close", None)
+    if callable(close):
+        try:
+            close()
+        except Exception:
+            pass
+
+
+async def aclose_stream(stream) -> None:
+    """关闭异步流式响应底层的 HTTP 连接"""
+    close = getattr(stream, "close", None)
+    if callable(close):
+        try:
+            result = close()
+            if inspect.isawaitable(result):
+                await result
+        except Exception:
+            pass
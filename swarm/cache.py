@@ -0,0 +1,304 @@
+import hashlib
+import inspect
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from types import SimpleNamespace
+from typing import Optional
+
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
+
+# 不影响返回内容的传输层参数，不参与缓存键
+TRANSPORT_PARAMS = {"timeout", "extra_headers", "extra_query", "extra_body"}
+
+
+def completion_cache_key(params: dict) -> str:
+    """
+    计算一次 chat.completions.create 调用的缓存键
+    对 model、messages、tools、tool_choice、parallel_tool_calls、stream 等请求参数做规范化
+    JSON（键排序）后取 sha256，同样的请求总是得到同样的键。
+    Args:
+        params: create 的参数
+    Returns:
+        十六进制的哈希字符串
+    """
+    canonical = {k: v for k, v in params.items() if k not in TRANSPORT_PARAMS}
+    payload = json.dumps(canonical, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class CacheStats:
+    """缓存命中统计"""
+
+    def __init__(self):
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.expired = 0
+
+    @property
+    def hits(self) -> int:
+        return self.memory_hits + self.disk_hits
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "hits": self.hits,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "hit_rate": self.hit_rate,
+        }
+
+    def __repr__(self) -> str:
+        return f"CacheStats({self.as_dict()})"
+
+
+class SqliteStore:
+    """基于 sqlite 的持久化缓存层，多个进程/运行之间共享"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS completions "
+                "(key TEXT PRIMARY KEY, created REAL NOT NULL, payload TEXT NOT NULL)"
+            )
+
+    def get(self, key: str):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT created, payload FROM completions WHERE key = ?", (key,)
+            ).fetchone()
+        return row
+
+    def set(self, key: str, created: float, payload: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO completions (key, created, payload) VALUES (?, ?, ?)",
+                (key, created, payload),
+            )
+
+    def delete(self, key: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM completions WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM completions")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class CompletionCache:
+    """
+    包装 OpenAI 客户端的确定性 completion 缓存
+    用法: Swarm(client=CompletionCache(OpenAI(), path="completions.db"))
+    两级存储：有界的内存 LRU，以及可选的 sqlite 持久层。
+    非流式请求缓存 ChatCompletion；流式请求缓存完整的 chunk 序列，
+    命中时按原顺序重放同样的 ChatCompletionChunk，因此 run_and_stream 无需任何改动。
+    流在被完整消费之前中断的结果不会写入缓存。
+    Args:
+        client: 被包装的 OpenAI 客户端
+        memory_size: 内存层最多保存的条目数
+        path: sqlite 文件路径；为 None 时只使用内存层
+        ttl: 条目有效期（秒）；为 None 时永不过期
+    """
+
+    def __init__(
+        self,
+        client,
+        memory_size: int = 1024,
+        path: Optional[str] = None,
+        ttl: Optional[float] = None,
+    ):
+        self.client = client
+        self.memory_size = memory_size
+        self.ttl = ttl
+        self.store = SqliteStore(path) if path else None
+        self.stats = CacheStats()
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def __getattr__(self, name):
+        # 其他 API 直接交给被包装的客户端
+        if name == "client":
+            raise AttributeError(name)
+        return getattr(self.client, name)
+
+    def _expired(self, created: float) -> bool:
+        return self.ttl is not None and time.time() - created > self.ttl
+
+    def lookup(self, key: str) -> Optional[str]:
+        """按 内存 -> 磁盘 的顺序查找，返回缓存的 payload"""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if self._expired(entry[0]):
+                    del self._memory[key]
+                    self.stats.expired += 1
+                else:
+                    self._memory.move_to_end(key)
+                    self.stats.memory_hits += 1
+                    return entry[1]
+        if self.store is not None:
+            row = self.store.get(key)
+            if row is not None:
+                created, payload = row
+                if self._expired(created):
+                    self.store.delete(key)
+                    with self._lock:
+                        self.stats.expired += 1
+                else:
+                    self._remember(key, created, payload)
+                    with self._lock:
+                        self.stats.disk_hits += 1
+                    return payload
+        with self._lock:
+            self.stats.misses += 1
+        return None
+
+    def _remember(self, key: str, created: float, payload: str) -> None:
+        with self._lock:
+            self._memory[key] = (created, payload)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_size:
+                self._memory.popitem(last=False)
+
+    def save(self, key: str, payload: str) -> None:
+        created = time.time()
+        self._remember(key, created, payload)
+        if self.store is not None:
+            self.store.set(key, created, payload)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+        if self.store is not None:
+            self.store.clear()
+
+    def create(self, **params):
+        key = completion_cache_key(params)
+        payload = self.lookup(key)
+        if payload is not None:
+            return self._replay(payload, params.get("stream", False))
+        result = self.client.chat.completions.create(**params)
+        if params.get("stream", False):
+            return self._record_stream(key, result)
+        self.save(key, result.model_dump_json())
+        return result
+
+    def _replay(self, payload: str, stream: bool):
+        if stream:
+            return iter([ChatCompletionChunk.model_validate(chunk)
+                         for chunk in json.loads(payload)])
+        return ChatCompletion.model_validate_json(payload)
+
+    def _record_stream(self, key: str, stream):
+        return _RecordingStream(self, key, stream)
+
+
+class AsyncCompletionCache(CompletionCache):
+    """CompletionCache 的异步版本，用于包装 AsyncOpenAI 并配合 AsyncSwarm 使用"""
+
+    async def create(self, **params):
+        key = completion_cache_key(params)
+        payload = self.lookup(key)
+        if payload is not None:
+            if params.get("stream", False):
+                return self._areplay(payload)
+            return self._replay(payload, False)
+        result = await self.client.chat.completions.create(**params)
+        if params.get("stream", False):
+            return self._arecord_stream(key, result)
+        self.save(key, result.model_dump_json())
+        return result
+
+    async def _areplay(self, payload: str):
+        for chunk in self._replay(payload, True):
+            yield chunk
+
+    def _arecord_stream(self, key: str, stream):
+        return _AsyncRecordingStream(self, key, stream)
+
+
+class _RecordingStream:
+    """
+    边转发边记录的流式响应
+    读完时把所有 chunk 写入缓存；close() 同时关闭底层的 HTTP 流，被中途关闭的流不会写入缓存。
+    """
+
+    def __init__(self, cache: CompletionCache, key: str, stream):
+        self.cache = cache
+        self.key = key
+        self.stream = stream
+        self.chunks = []
+        self.closed = False
+        self._iterator = None
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.closed:
+            raise StopIteration
+        if self._iterator is None:
+            self._iterator = iter(self.stream)
+        try:
+            chunk = next(self._iterator)
+        except StopIteration:
+            self._complete()
+            raise
+        self.chunks.append(chunk.model_dump(mode="json"))
+        return chunk
+
+    def _complete(self) -> None:
+        if not self.closed:
+            self.closed = True
+            self.cache.save(self.key, json.dumps(self.chunks))
+
+    def close(self) -> None:
+        self.closed = True
+        close = getattr(self.stream, "close", None)
+        if callable(close):
+            close()
+
+
+class _AsyncRecordingStream(_RecordingStream):
+    """_RecordingStream 的异步版本，close() 为协程"""
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.closed:
+            raise StopAsyncIteration
+        if self._iterator is None:
+            self._iterator = self.stream.__aiter__()
+        try:
+            chunk = await self._iterator.__anext__()
+        except StopAsyncIteration:
+            self._complete()
+            raise
+        self.chunks.append(chunk.model_dump(mode="json"))
+        return chunk
+
+    async def close(self) -> None:
+        self.closed = True
+        close = getattr(self.stream, "close", None)
+        if callable(close):
+            result = close()
+            if inspect.isawaitable(result):
+                await result
@@ -0,0 +1,183 @@
+import asyncio
+import threading
+import warnings
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+
+class PoolConfig:
+    """
+    共享连接池的配置
+    Args:
+        max_connections: 连接池的最大连接数
+        max_keepalive_connections: 保持空闲的最大连接数
+        keepalive_expiry: 空闲连接的保持时间（秒）
+        http2: 是否启用 HTTP/2（需要安装 h2）
+        timeout: 默认的请求超时（秒），为 None 时使用 openai 的默认值
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        http2: bool = False,
+        timeout: Optional[float] = None,
+    ):
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.http2 = http2
+        self.timeout = timeout
+
+    def key(self) -> tuple:
+        return (self.max_connections, self.max_keepalive_connections,
+                self.keepalive_expiry, self.http2, self.timeout)
+
+
+_config = PoolConfig()
+_clients = {}
+# 异步客户端的连接属于打开它们的事件循环，因此按事件循环分别共享
+_async_clients = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+
+
+def configure_client_pool(**kwargs) -> PoolConfig:
+    """
+    设置进程内共享连接池的默认配置（参数同 PoolConfig）
+    只影响之后新建的客户端；已创建的客户端保持不变。
+    """
+    global _config
+    with _lock:
+        _config = PoolConfig(**kwargs)
+        return _config
+
+
+def _pooled_http_client(config: PoolConfig, is_async: bool):
+    """按连接池配置创建 openai 的默认 HTTP 客户端（openai.DefaultHttpxClient 等）"""
+    import httpx
+    import openai
+
+    client_class = openai.DefaultAsyncHttpxClient if is_async else openai.DefaultHttpxClient
+    limits = httpx.Limits(
+        max_connections=config.max_connections,
+        max_keepalive_connections=config.max_keepalive_connections,
+        keepalive_expiry=config.keepalive_expiry,
+    )
+    kwargs = {"limits": limits}
+    if config.http2:
+        kwargs["http2"] = True
+    return client_class(**kwargs)
+
+
+def _create_client(config: PoolConfig, is_async: bool, openai_kwargs: dict):
+    """
+    创建 OpenAI/AsyncOpenAI 客户端
+    无法按配置创建连接池时（例如启用 http2 但缺少 h2）退回 openai 的默认客户端。
+    """
+    import openai
+
+    kwargs = dict(openai_kwargs)
+    if config.timeout is not None:
+        kwargs.setdefault("timeout", config.timeout)
+    if "http_client" not in kwargs:
+        try:
+            kwargs["http_client"] = _pooled_http_client(config, is_async)
+        except Exception as e:
+            warnings.warn(f"swarm: using openai's default connection pool ({e!r})")
+    if is_async:
+        return openai.AsyncOpenAI(**kwargs)
+    return openai.OpenAI(**kwargs)
+
+
+def _freeze(value):
+    """把客户端参数转换为可哈希的缓存键（default_headers 等字典参数也可以使用）"""
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return tuple(_freeze(item) for item in value)
+    try:
+        hash(value)
+    except TypeError:
+        return ("id", id(value))
+    return value
+
+
+def _get(clients: dict, is_async: bool, openai_kwargs: dict):
+    with _lock:
+        config = _config
+        key = (config.key(), _freeze(openai_kwargs))
+        client = clients.get(key)
+        if client is None:
+            client = clients[key] = _create_client(config, is_async, openai_kwargs)
+        return client
+
+
+def get_client(**openai_kwargs):
+    """
+    获取进程内共享的 OpenAI 客户端
+    同样的参数（api_key、base_url 等）和连接池配置总是返回同一个客户端，
+    多个 Swarm 实例和线程共享它的连接池，避免重复建立连接和 TLS 握手。
+    Args:
+        openai_kwargs: 传给 OpenAI() 的参数
+    Returns:
+        OpenAI
+    """
+    return _get(_clients, False, openai_kwargs)
+
+
+def get_async_client(**openai_kwargs):
+    """
+    获取当前事件循环中共享的 AsyncOpenAI 客户端
+    异步连接绑定打开它们的事件循环，因此每个事件循环有自己的客户端；
+    在事件循环之外调用时返回一个不共享的新客户端。
+    """
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return _create_client(_config, True, openai_kwargs)
+    with _lock:
+        clients = _async_clients.get(loop)
+        if clients is None:
+            clients = _async_clients[loop] = {}
+    return _get(clients, True, openai_kwargs)
+
+
+def warm_up(client=None, connections: int = 4) -> int:
+    """
+    预先建立到 API 的连接，把冷连接的延迟从第一轮对话中移走
+    并发发送 connections 个轻量的 models.list 请求，使连接池中保持相应数量的已握手连接。
+    Args:
+        client: 要预热的同步 OpenAI 客户端，默认为 get_client()
+        connections: 要建立的连接数
+    Returns:
+        成功建立的连接数
+    """
+    client = client or get_client()
+
+    def ping(_):
+        try:
+            client.models.list()
+        except Exception as e:
+            # 收到错误响应（如 401）说明连接已经建立，只有连接失败才不计入
+            return getattr(e, "status_code", None) is not None
+        return True
+
+    with ThreadPoolExecutor(max_workers=connections) as pool:
+        return sum(pool.map(ping, range(connections)))
+
+
+def reset_clients() -> None:
+    """关闭并清空所有共享客户端（例如在 fork 之后或测试中）"""
+    with _lock:
+        clients = list(_clients.values())
+        _clients.clear()
+        _async_clients.clear()
+    for client in clients:
+        close = getattr(client, "close", None)
+        if callable(close):
+            try:
+                close()
+            except Exception:
+                pass
@@ -1,35 +1,71 @@
+from __future__ import annotations
+
 # Standard library imports
-import copy
+import asyncio
+import inspect
 import json
 from collections import defaultdict
-from typing import List, Callable, Union
-
-# Package/library imports
-from openai import OpenAI
-
+from typing import TYPE_CHECKING, Iterable, Iterator, List, Callable, Union
 
 # Local imports
-from .util import function_to_json, debug_print, merge_chunk
-from .types import (
-    Agent,
-    AgentFunction,
-    ChatCompletionMessage,
-    ChatCompletionMessageToolCall,
-    Function,
-    Response,
-    Result,
-)
-
-__CTX_VARS_NAME__ = "context_variables"
+from .batch import BatchProgress, arun_batch, run_batch
+from .budget import BudgetTracker, RunBudget, aclose_stream, close_stream
+from .clients import get_async_client, get_client
+from .executor import ToolExecutor
+from .history import History
+from .hooks import RunRecorder
+from .policy import RequestPolicy
+from .ratelimit import RateLimiter
+from .run_state import RunState
+from .session import AsyncSession, Session
+from .speculative import Speculation, default_executor
+from .registry import __CTX_VARS_NAME__, CompiledTools, compile_tools
+from .util import StreamAccumulator, debug_print, is_async_callable, model_to_dict, run_sync
+from .types import Agent, AgentFunction, BatchResult, Response, Result
+
+if TYPE_CHECKING:
+    from .types import ChatCompletionMessage, ChatCompletionMessageToolCall
 
 
 class Swarm:
-    def __init__(self, client=None):
-        if not client:
-            client = OpenAI()
-        self.client = client
-
-    def get_chat_completion(
+    def __init__(
+        self,
+        client=None,
+        tool_executor: ToolExecutor = None,
+        history_policy: Callable = None,
+        request_policy: RequestPolicy = None,
+        hooks: List[Callable] = None,
+        rate_limiter: RateLimiter = None,
+    ):
+        # 未传入时在第一次请求时才获取共享客户端，构造 Swarm 不会加载 openai
+        self._client = client
+        # 可选的工具并发执行器；仅在 agent.parallel_tool_calls 为 True 时使用
+        self.tool_executor = tool_executor
+        # 可选的历史裁剪策略（如 TokenWindow）；agent.history_policy 优先
+        self.history_policy = history_policy
+        # 可选的请求策略：重试、单次超时和对冲请求
+        self.request_policy = request_policy
+        # 接收 HookEvent 的回调列表（如 MetricsAggregator）；为空时不产生任何事件
+        self.hooks = list(hooks or [])
+        # 可选的 RPM/TPM 限流器，可在多个 Swarm 之间共享
+        self.rate_limiter = rate_limiter
+
+    @property
+    def client(self):
+        if not self._client:
+            # 共享进程内的客户端和连接池
+            self._client = self.default_client()
+        return self._client
+
+    @client.setter
+    def client(self, client):
+        self._client = client
+
+    def default_client(self):
+        """未传入 client 时使用的客户端"""
+        return get_client()
+
+    def build_completion_params(
         self,
         agent: Agent,          # Agent对象，包含模型配置和函数定义
         history: List,         # 对话历史记录
@@ -37,7 +73,9 @@ class Swarm:
         model_override: str,   # 可选的模型覆盖设置
         stream: bool,          # 是否使用流式响应
         debug: bool,          # 是否启用调试输出
-    ) -> ChatCompletionMessage:  # 返回类型是ChatCompletionMessage
+        extra_params: dict = None,  # 附加的请求参数（如预算给出的 timeout）
+        apply_history_policy: bool = True,  # 为 False 时 history 已由调用方裁剪
+    ) -> dict:  # 返回 chat.completions.create 的参数
 
         # 使用defaultdict处理上下文变量，如果键不存在返回空字符串
         context_variables = defaultdict(str, context_variables)
@@ -49,23 +87,24 @@ class Swarm:
             else agent.instructions # 如果不是函数就执行这部分
         )
         
+        # 按历史策略裁剪发送给模型的历史（不影响返回给调用方的历史）
+        history_policy = agent.history_policy or self.history_policy
+        if history_policy and apply_history_policy:
+            history = history_policy(history)
+
         # 构建消息列表：系统指令 + 历史消息
-        messages = [{"role": "system", "content": instructions}] + history
+        system_message = {"role": "system", "content": instructions}
+        if isinstance(history, History):
+            # 复用本次 run 的请求列表，每轮只追加新消息
+            messages = history.with_system(system_message)
+        else:
+            messages = [system_message] + list(history)
         
         # 调试输出
         debug_print(debug, "Getting chat completion for...:", messages)
 
-        # 将agent的函数转换为OpenAI API需要的JSON格式
-        tools = [function_to_json(f) for f in agent.functions]
-        
-        # 处理工具中的上下文变量
-        for tool in tools:
-            params = tool["function"]["parameters"]
-            # 从工具参数中移除上下文变量
-            params["properties"].pop(__CTX_VARS_NAME__, None)
-            # 从必需参数中移除上下文变量
-            if __CTX_VARS_NAME__ in params["required"]:
-                params["required"].remove(__CTX_VARS_NAME__)
+        # agent函数对应的OpenAI工具JSON，按函数对象编译并缓存
+        tools = compile_tools(agent.functions).tools
 
         # 准备API调用参数
         create_params = {
@@ -82,8 +121,39 @@ class Swarm:
         if tools:
             create_params["parallel_tool_calls"] = agent.parallel_tool_calls
 
-        # 调用OpenAI API并返回结果
-        return self.client.chat.completions.create(**create_params)
+        # 注册了 hook 时让流式响应在最后一个 chunk 中带上 token 用量
+        if stream and self.hooks:
+            create_params["stream_options"] = {"include_usage": True}
+        if extra_params:
+            create_params.update(extra_params)
+
+        return create_params
+
+    def get_chat_completion(
+        self,
+        agent: Agent,
+        history: List,
+        context_variables: dict,
+        model_override: str,
+        stream: bool,
+        debug: bool,
+        extra_params: dict = None,
+        tracker: BudgetTracker = None,
+    ) -> ChatCompletionMessage:
+        create_params = self.build_completion_params(
+            agent, history, context_variables, model_override, stream, debug,
+            extra_params,
+        )
+        # 调用OpenAI API并返回结果；限流器在每次尝试（包括重试）前等待额度，
+        # 预算在每次尝试发出时设置剩余时间作为超时，并限制重试、退避和等待额度
+        create = self.client.chat.completions.create
+        if tracker:
+            create = tracker.bind(create)
+        if self.rate_limiter:
+            create = self.rate_limiter.wrap(create, tracker)
+        if self.request_policy:
+            return self.request_policy.call(create, create_params, tracker)
+        return create(**create_params)
 
     def handle_function_result(self, result, debug) -> Result:
         """
@@ -122,60 +192,177 @@ class Swarm:
         functions: List[AgentFunction], # 可用的函数列表
         context_variables: dict, # 上下文变量
         debug: bool, # 是否开启调试
+        parallel: bool = False, # 是否允许并发执行本轮的工具调用
+        recorder: RunRecorder = None, # 本次运行的事件记录器（注册了 hook 时）
+        speculated: dict = None, # 流式响应中已提前执行的调用 {位置: Future}，见 Speculation.claim
     ) -> Response:
-         # 创建函数名到函数的映射字典
-        function_map = {f.__name__: f for f in functions}
+        # 函数名到函数的映射等信息，按函数对象缓存
+        registry = compile_tools(functions)
         # 初始化响应对象
         partial_response = Response(
             messages=[], agent=None, context_variables={})
+        speculated = speculated or {}
+
+        if parallel and len(tool_calls) > 1:
+            prepared = [
+                (tool_call, *self.prepare_tool_call(
+                    tool_call, registry, context_variables, debug, recorder))
+                for tool_call in tool_calls
+            ]
+            raw_results = iter(self.run_parallel_tools(
+                [(tool_call.function.name, func, args)
+                 for i, (tool_call, func, args) in enumerate(prepared)
+                 if func is not None and i not in speculated]
+            ))
+            # 按 tool_call 原始顺序合并结果，保证消息顺序和交接结果确定
+            for i, (tool_call, func, args) in enumerate(prepared):
+                if func is None:
+                    partial_response.messages.append(
+                        self.tool_not_found_message(tool_call)
+                    )
+                    continue
+                raw_result = speculated[i].result() if i in speculated else next(raw_results)
+                result = self.handle_function_result(raw_result, debug)
+                self.merge_tool_result(partial_response, tool_call, result)
+            return partial_response
 
         # 遍历每个工具调用
-        for tool_call in tool_calls:
-            name = tool_call.function.name
+        for i, tool_call in enumerate(tool_calls):
+            if i in speculated:
+                # 参数在流式响应中已完整，幂等工具已经提前开始执行
+                result = self.handle_function_result(speculated[i].result(), debug)
+                self.merge_tool_result(partial_response, tool_call, result)
+                continue
+            func, args = self.prepare_tool_call(
+                tool_call, registry, context_variables, debug, recorder
+            )
             # handle missing tool case, skip to next tool
-            if name not in function_map:
-                debug_print(debug, f"Tool {name} not found in function map.")
+            if func is None:
                 partial_response.messages.append(
-                    {
-                        "role": "tool",
-                        "tool_call_id": tool_call.id,
-                        "tool_name": name,
-                        "content": f"Error: Tool {name} not found.",
-                    }
+                    self.tool_not_found_message(tool_call)
                 )
                 continue
-             # 2. 解析函数参数
-            args = json.loads(tool_call.function.arguments)
-            debug_print(
-                debug, f"Processing tool call: {name} with arguments {args}")
 
-            # 3. 获取要调用的函数
-            func = function_map[name]
-            # 4. 如果函数需要上下文变量，则传入
-            if __CTX_VARS_NAME__ in func.__code__.co_varnames:
-                args[__CTX_VARS_NAME__] = context_variables
-
-            # 5. 执行函数
-            raw_result = function_map[name](**args)
+            # 5. 执行函数（async 工具通过 run_sync 桥接执行）
+            raw_result = func(**args)
+            if inspect.isawaitable(raw_result):
+                raw_result = run_sync(raw_result)
 
             # 6. 处理函数返回结果
             result: Result = self.handle_function_result(raw_result, debug)
-             # 7. 添加执行结果到响应消息
-            partial_response.messages.append(
-                {
-                    "role": "tool",
-                    "tool_call_id": tool_call.id,
-                    "tool_name": name,
-                    "content": result.value,
-                }
-            )
-            # 8. 更新上下文变量和代理
-            partial_response.context_variables.update(result.context_variables)
-            if result.agent:
-                partial_response.agent = result.agent
+            # 7. 添加执行结果到响应消息，更新上下文变量和代理
+            self.merge_tool_result(partial_response, tool_call, result)
 
         return partial_response
 
+    def run_parallel_tools(self, calls: List) -> list:
+        """
+        并发执行同一轮中的工具调用
+        同步工具交给 tool_executor 的线程池（未配置时依次执行），
+        async 工具在同一个事件循环中通过 asyncio.gather 一起等待。
+        Args:
+            calls: (工具名, 函数, 参数) 列表
+        Returns:
+            与 calls 顺序一致的原始返回值列表
+        """
+        results = [None] * len(calls)
+        async_indexes = [i for i, (_, func, _) in enumerate(calls)
+                         if is_async_callable(func)]
+        sync_indexes = [i for i in range(len(calls)) if i not in async_indexes]
+
+        if self.tool_executor and len(sync_indexes) > 1:
+            values = self.tool_executor.map([calls[i] for i in sync_indexes])
+        else:
+            values = [calls[i][1](**calls[i][2]) for i in sync_indexes]
+        for i, value in zip(sync_indexes, values):
+            results[i] = run_sync(value) if inspect.isawaitable(value) else value
+
+        if async_indexes:
+            values = run_sync(
+                self._gather_async_tools([calls[i] for i in async_indexes])
+            )
+            for i, value in zip(async_indexes, values):
+                results[i] = value
+        return results
+
+    async def _gather_async_tools(self, calls: List) -> list:
+        if self.tool_executor:
+            awaitables = [self.tool_executor.acall(name, func, args)
+                          for name, func, args in calls]
+        else:
+            awaitables = [func(**args) for name, func, args in calls]
+        return await asyncio.gather(*awaitables)
+
+    def prepare_tool_call(
+        self,
+        tool_call: ChatCompletionMessageToolCall,
+        registry: CompiledTools,
+        context_variables: dict,
+        debug: bool,
+        recorder: RunRecorder = None,
+    ):
+        """
+        解析一次工具调用，找到要执行的函数并准备参数
+        Args:
+            tool_call: AI请求的工具调用
+            registry: agent函数的编译结果
+            context_variables: 上下文变量
+            debug: 是否启用调试输出
+            recorder: 可选的事件记录器，函数会被包装为发出 tool_start/tool_end
+        Returns:
+            (func, args)；工具不存在时 func 为 None
+        """
+        name = tool_call.function.name
+        if name not in registry.function_map:
+            debug_print(debug, f"Tool {name} not found in function map.")
+            return None, None
+        # 解析函数参数
+        args = json.loads(tool_call.function.arguments)
+        debug_print(
+            debug, f"Processing tool call: {name} with arguments {args}")
+
+        # 获取要调用的函数，如果函数需要上下文变量，则传入
+        func = registry.function_map[name]
+        if registry.accepts_context[name]:
+            args[__CTX_VARS_NAME__] = context_variables
+        if recorder:
+            func = recorder.wrap_tool(name, tool_call.id, func)
+        return func, args
+
+    def tool_not_found_message(self, tool_call: ChatCompletionMessageToolCall) -> dict:
+        name = tool_call.function.name
+        return {
+            "role": "tool",
+            "tool_call_id": tool_call.id,
+            "tool_name": name,
+            "content": f"Error: Tool {name} not found.",
+        }
+
+    def merge_tool_result(
+        self,
+        partial_response: Response,
+        tool_call: ChatCompletionMessageToolCall,
+        result: Result,
+    ) -> None:
+        """
+        把单个工具的执行结果合并进本轮的部分响应
+        Args:
+            partial_response: 本轮工具调用的累积响应
+            tool_call: 对应的工具调用
+            result: 标准化后的工具结果
+        """
+        partial_response.messages.append(
+            {
+                "role": "tool",
+                "tool_call_id": tool_call.id,
+                "tool_name": tool_call.function.name,
+                "content": result.value,
+            }
+        )
+        partial_response.context_variables.update(result.context_variables)
+        if result.agent:
+            partial_response.agent = result.agent
+
     def run_and_stream(
         self,
         agent: Agent,
@@ -185,88 +372,181 @@ class Swarm:
         debug: bool = False,
         max_turns: int = float("inf"),
         execute_tools: bool = True,
+        budget: RunBudget = None,
     ):
-        active_agent = agent
-        context_variables = copy.deepcopy(context_variables)
-        history = copy.deepcopy(messages)
-        init_len = len(messages)
-
-        while len(history) - init_len < max_turns:
-
-            message = {
-                "content": "",
-                "sender": agent.name,
-                "role": "assistant",
-                "function_call": None,
-                "tool_calls": defaultdict(
-                    lambda: {
-                        "function": {"arguments": "", "name": ""},
-                        "id": "",
-                        "type": "",
-                    }
-                ),
-            }
+        state = RunState(self, agent, messages, context_variables, budget)
+        with state:
+            while state.running(max_turns):
+                if not state.begin_turn(model_override, stream=True):
+                    break
+                accumulator = StreamAccumulator(state.agent.name)
+                speculation = self.start_speculation(
+                    state.agent, accumulator, state.context_variables, debug, state.recorder
+                ) if execute_tools else None
+
+                # get completion with current history, agent
+                try:
+                    completion = self.get_chat_completion(
+                        **state.request(model_override, True, debug))
+                except Exception:
+                    if state.interrupted():
+                        break
+                    raise
+                unwatch = self.watch_stream(state.tracker, completion) if state.tracker else None
+
+                yield {"delim": "start"}
+                try:
+                    for chunk in completion:
+                        if state.interrupted():
+                            close_stream(completion)
+                            break
+                        delta = state.stream_delta(chunk)
+                        if delta is None:
+                            continue
+                        yield delta
+                        accumulator.add(delta)
+                        if speculation:
+                            speculation.feed(delta)
+                except Exception:
+                    # 取消时流被关闭，读取会以异常结束
+                    if not state.interrupted():
+                        raise
+                finally:
+                    if unwatch:
+                        unwatch()
+                yield {"delim": "end"}
+                state.completion_end(stream=True)
+
+                # 到消息边界时一次性拼接累积的片段
+                message = accumulator.message()
+                debug_print(debug, "Received completion:", message)
+                if state.stopped_mid_stream(message) or state.commit(message, execute_tools, debug):
+                    if speculation:
+                        speculation.discard()
+                    break
+
+                # handle function calls, updating context_variables, and switching agents
+                tool_calls = self.tool_call_objects(message)
+                try:
+                    partial_response = self.handle_tool_calls(
+                        tool_calls,
+                        state.agent.functions,
+                        state.context_variables,
+                        debug,
+                        parallel=state.agent.parallel_tool_calls,
+                        recorder=state.recorder,
+                        speculated=speculation.claim(tool_calls) if speculation else None,
+                    )
+                finally:
+                    if speculation:
+                        speculation.discard()
+                state.merge_tools(partial_response)
+
+        yield {"response": state.response()}
+
+    def watch_stream(self, tracker: BudgetTracker, stream):
+        """取消时立即关闭流的底层 HTTP 响应，使阻塞中的读取结束；返回注销函数"""
+        return tracker.on_cancel(lambda: close_stream(stream))
+
+    def tool_call_objects(self, message: dict) -> List[ChatCompletionMessageToolCall]:
+        """把流式累积得到的 tool_calls 字典转换为 ChatCompletionMessageToolCall 对象"""
+        return [self.tool_call_object(tool_call) for tool_call in message["tool_calls"]]
+
+    def tool_call_object(self, tool_call: dict) -> ChatCompletionMessageToolCall:
+        from .types import ChatCompletionMessageToolCall, Function
+
+        function = Function(
+            arguments=tool_call["function"]["arguments"],
+            name=tool_call["function"]["name"],
+        )
+        return ChatCompletionMessageToolCall(
+            id=tool_call["id"], function=function, type=tool_call["type"]
+        )
 
-            # get completion with current history, agent
-            completion = self.get_chat_completion(
-                agent=active_agent,
-                history=history,
-                context_variables=context_variables,
-                model_override=model_override,
-                stream=True,
-                debug=debug,
-            )
+    def start_speculation(
+        self,
+        agent: Agent,
+        accumulator: StreamAccumulator,
+        context_variables: dict,
+        debug: bool,
+        recorder: RunRecorder = None,
+    ):
+        """
+        为一轮流式响应创建 Speculation，在流结束前提前执行参数已完整的幂等工具
+        Returns:
+            Speculation；agent 没有被 idempotent 标记的工具时返回 None
+        """
+        registry = compile_tools(agent.functions)
+        if not Speculation.applies(registry):
+            return None
+        return Speculation(
+            accumulator,
+            registry,
+            prepare=lambda tool_call: self.prepare_tool_call(
+                self.tool_call_object(tool_call), registry, context_variables, debug, recorder
+            ),
+            dispatch=self.dispatch_speculative,
+        )
 
-            yield {"delim": "start"}
-            for chunk in completion:
-                delta = json.loads(chunk.choices[0].delta.json())
-                if delta["role"] == "assistant":
-                    delta["sender"] = active_agent.name
-                yield delta
-                delta.pop("role", None)
-                delta.pop("sender", None)
-                merge_chunk(message, delta)
-            yield {"delim": "end"}
-
-            message["tool_calls"] = list(
-                message.get("tool_calls", {}).values())
-            if not message["tool_calls"]:
-                message["tool_calls"] = None
-            debug_print(debug, "Received completion:", message)
-            history.append(message)
-
-            if not message["tool_calls"] or not execute_tools:
-                debug_print(debug, "Ending turn.")
-                break
-
-            # convert tool_calls to objects
-            tool_calls = []
-            for tool_call in message["tool_calls"]:
-                function = Function(
-                    arguments=tool_call["function"]["arguments"],
-                    name=tool_call["function"]["name"],
-                )
-                tool_call_object = ChatCompletionMessageToolCall(
-                    id=tool_call["id"], function=function, type=tool_call["type"]
-                )
-                tool_calls.append(tool_call_object)
+    def dispatch_speculative(self, name: str, func: AgentFunction, args: dict):
+        """在后台线程中开始执行一个幂等工具，返回 Future"""
+        executor = self.tool_executor or default_executor()
 
-            # handle function calls, updating context_variables, and switching agents
-            partial_response = self.handle_tool_calls(
-                tool_calls, active_agent.functions, context_variables, debug
-            )
-            history.extend(partial_response.messages)
-            context_variables.update(partial_response.context_variables)
-            if partial_response.agent:
-                active_agent = partial_response.agent
-
-        yield {
-            "response": Response(
-                messages=history[init_len:],
-                agent=active_agent,
-                context_variables=context_variables,
-            )
-        }
+        def call():
+            raw_result = executor.call(name, func, args)
+            if inspect.isawaitable(raw_result):
+                raw_result = run_sync(raw_result)
+            return raw_result
+
+        return executor.pool.submit(call)
+
+    def run_batch(
+        self,
+        agent: Agent,
+        conversations: Iterable,
+        concurrency: int = 8,
+        ordered: bool = True,
+        context_variables: dict = None,
+        progress: BatchProgress = None,
+        **run_kwargs,
+    ) -> Iterator[BatchResult]:
+        """
+        并发运行多个独立对话，完成一个返回一个
+        每个对话都通过 run 执行，交接和上下文变量的行为与单独调用 run 完全一致。
+        Args:
+            agent: 默认的初始 agent
+            conversations: 消息列表，或 {"messages", "context_variables", "agent"} 字典
+            concurrency: 最大并发数
+            ordered: True 按输入顺序返回，False 按完成顺序返回
+            context_variables: 默认的上下文变量
+            progress: 可选的 BatchProgress，用于在运行中查看进度
+            run_kwargs: 传给 run 的其他参数
+        Returns:
+            BatchResult 的迭代器；单个对话失败只记录在对应结果的 error 中
+        """
+        return run_batch(
+            self, agent, conversations, concurrency=concurrency, ordered=ordered,
+            context_variables=context_variables, progress=progress, **run_kwargs,
+        )
+
+    def session(
+        self,
+        agent: Agent,
+        context_variables: dict = None,
+        messages: List = (),
+        **run_kwargs,
+    ) -> Session:
+        """
+        创建一个有状态的会话，由会话保存历史、当前 agent 和上下文变量
+        Args:
+            agent: 初始 agent
+            context_variables: 初始上下文变量
+            messages: 已有的对话历史
+            run_kwargs: 每次 run 的默认参数（model_override、max_turns、debug 等）
+        Returns:
+            Session
+        """
+        return Session(self, agent, context_variables, messages, **run_kwargs)
 
     def run(
         self,
@@ -278,6 +558,7 @@ class Swarm:
         debug: bool = False,             # 是否显示调试信息
         max_turns: int = float("inf"),   # 最大对话轮数
         execute_tools: bool = True,      # 是否执行工具
+        budget: RunBudget = None,        # 可选的时间/token/工具时间预算和取消令牌
     ) -> Response:
         if stream:
             return self.run_and_stream(
@@ -288,62 +569,364 @@ class Swarm:
                 debug=debug,
                 max_turns=max_turns,
                 execute_tools=execute_tools,
+                budget=budget,
             )
-        active_agent = agent
-        context_variables = copy.deepcopy(context_variables)
-        history = copy.deepcopy(messages)
-        init_len = len(messages)
-
-        # 1. 初始化
-        active_agent = agent                              # 当前活动的AI助手
-        context_variables = copy.deepcopy(context_variables)  # 复制上下文变量
-        history = copy.deepcopy(messages)                 # 复制对话历史
-        init_len = len(messages)                          # 记录初始消息数量
-
-        # 2. 主要对话循环
-        while len(history) - init_len < max_turns and active_agent:
-            # 2.1 获取AI的回复
-            completion = self.get_chat_completion(
-                agent=active_agent,
-                history=history,
-                context_variables=context_variables,
-                model_override=model_override,
-                stream=stream,
-                debug=debug,
+        # 1. 初始化：历史、上下文变量、hook 记录器和预算
+        state = RunState(self, agent, messages, context_variables, budget)
+
+        # 2. 主要对话循环；退出时（包括异常）发出 run_end
+        with state:
+            while state.running(max_turns):
+                # 每轮开始前检查预算和取消
+                if not state.begin_turn(model_override, stream=False):
+                    break
+
+                # 2.1 获取AI的回复
+                try:
+                    completion = self.get_chat_completion(
+                        **state.request(model_override, stream, debug))
+                except Exception:
+                    # 截止时间作为请求超时传给客户端，超时后以预算原因结束
+                    if state.interrupted():
+                        break
+                    raise
+                state.completion_end(completion.usage)
+
+                # 2.2 处理AI的回复
+                message = completion.choices[0].message
+                debug_print(debug, "Received completion:", message)
+
+                # 2.3 添加发送者信息并保存到历史记录；没有工具调用或不执行工具时结束对话
+                message.sender = state.agent.name
+                if state.commit(model_to_dict(message), execute_tools, debug):
+                    break
+
+                # 2.4 处理工具调用，更新历史和变量，需要时切换AI助手
+                partial_response = self.handle_tool_calls(
+                    message.tool_calls,
+                    state.agent.functions,
+                    state.context_variables,
+                    debug,
+                    parallel=state.agent.parallel_tool_calls,
+                    recorder=state.recorder,
+                )
+                state.merge_tools(partial_response)
+
+        # 3. 返回最终结果
+        return state.response()
+
+
+class AsyncSwarm(Swarm):
+    """
+    基于 AsyncOpenAI 的异步版本 Swarm
+    与 Swarm 共享参数构建、工具调用解析和结果合并逻辑，
+    交接、上下文变量和 max_turns 的语义与同步版本完全一致。
+    一个事件循环即可同时驱动大量会话。
+    """
+
+    @property
+    def client(self):
+        # 未显式指定客户端时，每次按当前事件循环取共享客户端，不固定在某个循环上
+        return self._client or self.default_client()
+
+    @client.setter
+    def client(self, client):
+        self._client = client
+
+    def default_client(self):
+        return get_async_client()
+
+    async def apply_history_policy(self, agent: Agent, history: List) -> List:
+        """
+        按历史策略裁剪历史：有 acall 的策略（如 TokenWindow）异步执行，
+        async 函数直接 await，其他同步策略照常调用
+        """
+        history_policy = agent.history_policy or self.history_policy
+        if not history_policy:
+            return history
+        if hasattr(history_policy, "acall"):
+            return await history_policy.acall(history)
+        if is_async_callable(history_policy):
+            return await history_policy(history)
+        return history_policy(history)
+
+    async def get_chat_completion(
+        self,
+        agent: Agent,
+        history: List,
+        context_variables: dict,
+        model_override: str,
+        stream: bool,
+        debug: bool,
+        extra_params: dict = None,
+        tracker: BudgetTracker = None,
+    ) -> ChatCompletionMessage:
+        # 历史策略可能调用模型生成摘要，在这里异步执行，不阻塞事件循环
+        history = await self.apply_history_policy(agent, history)
+        create_params = self.build_completion_params(
+            agent, history, context_variables, model_override, stream, debug,
+            extra_params, apply_history_policy=False,
+        )
+        create = self.client.chat.completions.create
+        if tracker:
+            create = tracker.abind(create)
+        if self.rate_limiter:
+            create = self.rate_limiter.awrap(create, tracker)
+        if self.request_policy:
+            return await self.request_policy.acall(create, create_params, tracker)
+        return await create(**create_params)
+
+    async def handle_tool_calls(
+        self,
+        tool_calls: List[ChatCompletionMessageToolCall],
+        functions: List[AgentFunction],
+        context_variables: dict,
+        debug: bool,
+        parallel: bool = False,
+        recorder: RunRecorder = None,
+        speculated: dict = None,
+    ) -> Response:
+        registry = compile_tools(functions)
+        partial_response = Response(
+            messages=[], agent=None, context_variables={})
+        speculated = speculated or {}
+
+        prepared = [
+            (tool_call, *self.prepare_tool_call(
+                tool_call, registry, context_variables, debug, recorder))
+            for tool_call in tool_calls
+        ]
+        runnable = [(tool_call.function.name, func, args)
+                    for i, (tool_call, func, args) in enumerate(prepared)
+                    if func is not None and i not in speculated]
+        if parallel and len(runnable) > 1:
+            # 同一轮的多个工具调用一起执行
+            raw_results = await asyncio.gather(
+                *(self.call_tool(*call) for call in runnable)
             )
-            
-            # 2.2 处理AI的回复
-            message = completion.choices[0].message
-            debug_print(debug, "Received completion:", message)
-            
-            # 2.3 添加发送者信息并保存到历史记录
-            message.sender = active_agent.name
-            history.append(json.loads(message.model_dump_json()))
-
-            # 2.4 如果没有工具调用或不执行工具，结束对话
-            if not message.tool_calls or not execute_tools:
-                debug_print(debug, "Ending turn.")
-                break
-
-            # 2.5 处理工具调用
-            partial_response = self.handle_tool_calls(
-                message.tool_calls, 
-                active_agent.functions, 
-                context_variables, 
-                debug
+        else:
+            raw_results = [await self.call_tool(*call) for call in runnable]
+
+        raw_results = iter(raw_results)
+        for i, (tool_call, func, args) in enumerate(prepared):
+            if func is None:
+                partial_response.messages.append(
+                    self.tool_not_found_message(tool_call)
+                )
+                continue
+            # 流式响应中已提前执行的幂等工具直接等待其结果
+            raw_result = await speculated[i] if i in speculated else next(raw_results)
+            result: Result = self.handle_function_result(raw_result, debug)
+            self.merge_tool_result(partial_response, tool_call, result)
+
+        return partial_response
+
+    async def call_tool(self, name: str, func: AgentFunction, args: dict):
+        """
+        执行单个工具并返回原始结果
+        async 工具直接 await；配置了 tool_executor 时同步工具在线程池中运行，
+        避免阻塞事件循环。
+        """
+        if self.tool_executor:
+            if is_async_callable(func):
+                return await self.tool_executor.acall(name, func, args)
+            loop = asyncio.get_running_loop()
+            raw_result = await loop.run_in_executor(
+                self.tool_executor.pool, self.tool_executor.call, name, func, args
             )
-            
-            # 2.6 更新历史和变量
-            history.extend(partial_response.messages)
-            context_variables.update(partial_response.context_variables)
-            
-            # 2.7 如果需要切换AI助手
-            if partial_response.agent:
-                active_agent = partial_response.agent
+        else:
+            raw_result = func(**args)
+        if inspect.isawaitable(raw_result):
+            raw_result = await raw_result
+        return raw_result
 
-        # 3. 返回最终结果
-        return Response(
-            messages=history[init_len:],     # 只返回新的消息
-            agent=active_agent,              # 当前的AI助手
-            context_variables=context_variables  # 更新后的上下文变量
+    def dispatch_speculative(self, name: str, func: AgentFunction, args: dict):
+        """在当前事件循环中开始执行一个幂等工具，返回 asyncio.Task"""
+        return asyncio.ensure_future(self.call_tool(name, func, args))
+
+    async def run_and_stream(
+        self,
+        agent: Agent,
+        messages: List,
+        context_variables: dict = {},
+        model_override: str = None,
+        debug: bool = False,
+        max_turns: int = float("inf"),
+        execute_tools: bool = True,
+        budget: RunBudget = None,
+    ):
+        state = RunState(self, agent, messages, context_variables, budget)
+        with state:
+            while state.running(max_turns):
+                if not state.begin_turn(model_override, stream=True):
+                    break
+                accumulator = StreamAccumulator(state.agent.name)
+                speculation = self.start_speculation(
+                    state.agent, accumulator, state.context_variables, debug, state.recorder
+                ) if execute_tools else None
+
+                # get completion with current history, agent
+                try:
+                    # 等待响应头期间也能被取消或因截止时间中断
+                    completion = await self.guard(
+                        self.get_chat_completion(**state.request(model_override, True, debug)),
+                        state.tracker,
+                    )
+                except (Exception, asyncio.CancelledError):
+                    if state.interrupted():
+                        break
+                    raise
+                unwatch = self.watch_stream(state.tracker, completion) if state.tracker else None
+
+                yield {"delim": "start"}
+                try:
+                    async for chunk in completion:
+                        if state.interrupted():
+                            await aclose_stream(completion)
+                            break
+                        delta = state.stream_delta(chunk)
+                        if delta is None:
+                            continue
+                        yield delta
+                        accumulator.add(delta)
+                        if speculation:
+                            speculation.feed(delta)
+                except Exception:
+                    # 取消时流被关闭，读取会以异常结束
+                    if not state.interrupted():
+                        raise
+                finally:
+                    if unwatch:
+                        unwatch()
+                yield {"delim": "end"}
+                state.completion_end(stream=True)
+
+                # 到消息边界时一次性拼接累积的片段
+                message = accumulator.message()
+                debug_print(debug, "Received completion:", message)
+                if state.stopped_mid_stream(message) or state.commit(message, execute_tools, debug):
+                    if speculation:
+                        speculation.discard()
+                    break
+
+                # handle function calls, updating context_variables, and switching agents
+                tool_calls = self.tool_call_objects(message)
+                try:
+                    partial_response = await self.handle_tool_calls(
+                        tool_calls,
+                        state.agent.functions,
+                        state.context_variables,
+                        debug,
+                        parallel=state.agent.parallel_tool_calls,
+                        recorder=state.recorder,
+                        speculated=speculation.claim(tool_calls) if speculation else None,
+                    )
+                finally:
+                    if speculation:
+                        speculation.discard()
+                state.merge_tools(partial_response)
+
+        yield {"response": state.response()}
+
+    def watch_stream(self, tracker: BudgetTracker, stream):
+        # 取消可能来自其他线程，关闭操作交回流所在的事件循环执行
+        loop = asyncio.get_running_loop()
+        return tracker.on_cancel(lambda: loop.call_soon_threadsafe(
+            lambda: asyncio.ensure_future(aclose_stream(stream))))
+
+    async def guard(self, awaitable, tracker: BudgetTracker):
+        """
+        在预算约束下等待一次请求：超过截止时间或被取消时中断等待
+        中断时抛出 asyncio.CancelledError/TimeoutError，调用方通过 tracker.exceeded() 区分。
+        """
+        if tracker is None:
+            return await awaitable
+        task = asyncio.ensure_future(awaitable)
+        loop = asyncio.get_running_loop()
+        unwatch = tracker.on_cancel(lambda: loop.call_soon_threadsafe(task.cancel))
+        try:
+            return await asyncio.wait_for(task, tracker.remaining_time())
+        finally:
+            unwatch()
+
+    def run_batch(
+        self,
+        agent: Agent,
+        conversations: Iterable,
+        concurrency: int = 8,
+        ordered: bool = True,
+        context_variables: dict = None,
+        progress: BatchProgress = None,
+        **run_kwargs,
+    ):
+        """run_batch 的异步版本：async for result in client.run_batch(...)"""
+        return arun_batch(
+            self, agent, conversations, concurrency=concurrency, ordered=ordered,
+            context_variables=context_variables, progress=progress, **run_kwargs,
         )
+
+    def session(
+        self,
+        agent: Agent,
+        context_variables: dict = None,
+        messages: List = (),
+        **run_kwargs,
+    ) -> AsyncSession:
+        return AsyncSession(self, agent, context_variables, messages, **run_kwargs)
+
+    async def run(
+        self,
+        agent: Agent,
+        messages: List,
+        context_variables: dict = {},
+        model_override: str = None,
+        stream: bool = False,
+        debug: bool = False,
+        max_turns: int = float("inf"),
+        execute_tools: bool = True,
+        budget: RunBudget = None,
+    ) -> Response:
+        if stream:
+            # 返回异步生成器：async for chunk in await client.run(..., stream=True)
+            return self.run_and_stream(
+                agent=agent,
+                messages=messages,
+                context_variables=context_variables,
+                model_override=model_override,
+                debug=debug,
+                max_turns=max_turns,
+                execute_tools=execute_tools,
+                budget=budget,
+            )
+        state = RunState(self, agent, messages, context_variables, budget)
+        with state:
+            while state.running(max_turns):
+                if not state.begin_turn(model_override, stream=False):
+                    break
+                try:
+                    # 请求进行中也能被取消或因截止时间中断
+                    completion = await self.guard(
+                        self.get_chat_completion(**state.request(model_override, stream, debug)),
+                        state.tracker,
+                    )
+                except (Exception, asyncio.CancelledError):
+                    if state.interrupted():
+                        break
+                    raise
+                state.completion_end(completion.usage)
+                message = completion.choices[0].message
+                debug_print(debug, "Received completion:", message)
+                message.sender = state.agent.name
+                if state.commit(model_to_dict(message), execute_tools, debug):
+                    break
+
+                partial_response = await self.handle_tool_calls(
+                    message.tool_calls,
+                    state.agent.functions,
+                    state.context_variables,
+                    debug,
+                    parallel=state.agent.parallel_tool_calls,
+                    recorder=state.recorder,
+                )
+                state.merge_tools(partial_response)
+        return state.response()
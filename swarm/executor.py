@@ -0,0 +1,101 @@
+import asyncio
+import inspect
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+class ToolExecutor:
+    """
+    并发执行同一轮中的多个工具调用
+    结果按传入顺序返回，调用方据此保持 tool_call_id 顺序和确定性的合并顺序。
+    Args:
+        max_workers: 线程池的最大线程数
+        per_tool_limit: 每个工具默认的最大并发数（None 表示不限制）
+        tool_limits: 按工具名单独设置的最大并发数，优先于 per_tool_limit
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 8,
+        per_tool_limit: Optional[int] = None,
+        tool_limits: Optional[Dict[str, int]] = None,
+    ):
+        self.max_workers = max_workers
+        self.per_tool_limit = per_tool_limit
+        self.tool_limits = dict(tool_limits or {})
+        self._pool = None
+        self._semaphores = {}
+        # asyncio.Semaphore 绑定事件循环，因此按事件循环分别保存
+        self._async_semaphores = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    @property
+    def pool(self) -> ThreadPoolExecutor:
+        # 线程池按需创建，只构造而不使用的执行器不会启动线程
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix="swarm-tool",
+                    )
+        return self._pool
+
+    def _semaphore(self, name: str) -> Optional[threading.BoundedSemaphore]:
+        limit = self.tool_limits.get(name, self.per_tool_limit)
+        if limit is None:
+            return None
+        with self._lock:
+            semaphore = self._semaphores.get(name)
+            if semaphore is None:
+                semaphore = threading.BoundedSemaphore(limit)
+                self._semaphores[name] = semaphore
+        return semaphore
+
+    def call(self, name: str, func: Callable, args: dict):
+        """在工具的并发限制内执行一次调用"""
+        semaphore = self._semaphore(name)
+        if semaphore is None:
+            return func(**args)
+        with semaphore:
+            return func(**args)
+
+    async def acall(self, name: str, func: Callable, args: dict):
+        """在工具的并发限制内执行一次调用，并等待 async 工具返回的协程"""
+        limit = self.tool_limits.get(name, self.per_tool_limit)
+        if limit is None:
+            return await _maybe_await(func(**args))
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            semaphores = self._async_semaphores.setdefault(loop, {})
+            semaphore = semaphores.get(name)
+            if semaphore is None:
+                semaphore = semaphores[name] = asyncio.Semaphore(limit)
+        async with semaphore:
+            return await _maybe_await(func(**args))
+
+    def map(self, calls: List[Tuple[str, Callable, dict]]) -> list:
+        """
+        并发执行一组工具调用
+        Args:
+            calls: (工具名, 函数, 参数) 列表
+        Returns:
+            与 calls 顺序一致的原始返回值列表；按顺序抛出第一个异常
+        """
+        futures = [self.pool.submit(self.call, name, func, args)
+                   for name, func, args in calls]
+        return [future.result() for future in futures]
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait)
+
+
+async def _maybe_await(value):
+    if inspect.isawaitable(value):
+        return await value
+    return value
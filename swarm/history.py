@@ -0,0 +1,153 @@
+import copy
+from collections.abc import Sequence
+from itertools import islice
+from typing import Iterable
+
+
+class Message(dict):
+    """
+    History 内部的只读消息记录
+    仍然是 dict 的子类，可以直接 JSON 序列化并发送给 API；
+    一旦写入历史就不能再修改，因此多个历史视图可以安全地共享同一条记录。
+    返回给调用方时通过 to_dict() 转换为普通字典。
+    """
+
+    __slots__ = ()
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("Message records are immutable; copy with dict(message)")
+
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return Message(copy.deepcopy(dict(self), memo))
+
+    def to_dict(self) -> dict:
+        """可修改的普通字典副本（包括嵌套的 tool_calls）"""
+        return copy.deepcopy(dict(self))
+
+    def __reduce__(self):
+        return (Message, (dict(self),))
+
+
+def freeze_message(message) -> Message:
+    """把普通消息字典转换为只读记录（已经是只读记录时原样返回）"""
+    if isinstance(message, Message):
+        return message
+    return Message(message)
+
+
+class History(Sequence):
+    """
+    追加写入的对话历史，支持结构共享
+    由两段组成：
+      - 借用的前缀：调用方传入的消息序列，只读取、从不修改，长度在创建时固定；
+      - 自有的追加日志：本历史新追加的只读消息。
+    snapshot() 得到的视图与原历史共享存储，开销为 O(1)；
+    只有当某个视图在共享日志已被其他视图追加之后再追加时，才复制它自己的那段日志（写时复制）。
+    因此 Swarm.run 无需深拷贝调用方的消息即可与其隔离。
+    """
+
+    __slots__ = ("_base", "_base_len", "_log", "_len", "_request")
+
+    def __init__(self, messages: Iterable = ()):
+        if isinstance(messages, History):
+            self._base = messages._base
+            self._base_len = messages._base_len
+            self._log = messages._log
+            self._len = messages._len
+            self._request = None
+            return
+        if not isinstance(messages, Sequence):
+            messages = list(messages)
+        self._base = messages
+        self._base_len = len(messages)
+        self._log = []
+        self._len = 0
+        self._request = None
+
+    def __len__(self) -> int:
+        return self._base_len + self._len
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step == 1 and start >= self._base_len:
+                # 最常见的用法 history[init_len:]，只涉及自有日志
+                return self._log[start - self._base_len:max(start, stop) - self._base_len]
+            return [self[i] for i in range(start, stop, step)]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("history index out of range")
+        if index < self._base_len:
+            return self._base[index]
+        return self._log[index - self._base_len]
+
+    def __iter__(self):
+        yield from islice(self._base, self._base_len)
+        yield from islice(self._log, self._len)
+
+    def __add__(self, other) -> list:
+        return list(self) + list(other)
+
+    def __radd__(self, other) -> list:
+        return list(other) + list(self)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (History, list, tuple)):
+            return len(self) == len(other) and all(
+                a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"History({list(self)!r})"
+
+    def append(self, message) -> None:
+        """追加一条消息；消息会被转换为只读记录"""
+        if self._len != len(self._log):
+            if self._log[self._len] == message:
+                # 共享视图已经追加了相同的记录（例如 Session 收回一次 run 的结果），直接前移
+                self._len += 1
+                return
+            # 共享日志已被其他视图追加：复制属于本视图的部分（写时复制）
+            self._log = self._log[:self._len]
+        self._log.append(freeze_message(message))
+        self._len += 1
+
+    def extend(self, messages: Iterable) -> None:
+        for message in messages:
+            self.append(message)
+
+    def with_system(self, system_message: dict) -> list:
+        """
+        [system_message] + 历史，作为 chat.completions.create 的 messages
+        返回的列表在本历史的后续调用中复用：只替换系统消息并追加新消息，
+        每轮的开销只与新增的消息数有关，而不是整个历史的长度。
+        调用方如果需要保留某一轮发送的列表，应自行复制。
+        """
+        request = self._request
+        if request is None:
+            request = self._request = [system_message]
+            request.extend(islice(self._base, self._base_len))
+            request.extend(islice(self._log, self._len))
+        else:
+            request[0] = system_message
+            request.extend(self[len(request) - 1:])
+        return request
+
+    def snapshot(self) -> "History":
+        """返回与当前历史共享存储的视图，之后双方的追加互不可见"""
+        return History(self)
+
+    def to_list(self, start: int = 0) -> list:
+        """
+        从 start 开始的消息列表
+        本历史追加的只读记录被转换为普通字典副本，调用方可以自由修改；借用的前缀原样返回。
+        """
+        return [message.to_dict() if isinstance(message, Message) else message
+                for message in self[start:]]
@@ -0,0 +1,310 @@
+import threading
+import time
+import uuid
+import warnings
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from .util import is_async_callable
+
+# 事件类型
+RUN_START = "run_start"
+TURN_START = "turn_start"
+REQUEST_SENT = "request_sent"
+FIRST_TOKEN = "first_token"
+COMPLETION_END = "completion_end"
+TOOL_START = "tool_start"
+TOOL_END = "tool_end"
+HANDOFF = "handoff"
+TURN_END = "turn_end"
+RUN_END = "run_end"
+
+EVENT_KINDS = (
+    RUN_START, TURN_START, REQUEST_SENT, FIRST_TOKEN, COMPLETION_END,
+    TOOL_START, TOOL_END, HANDOFF, TURN_END, RUN_END,
+)
+
+
+@dataclass
+class HookEvent:
+    """
+    一次运行中发出的结构化事件
+    Args:
+        kind: 事件类型，见 EVENT_KINDS
+        run_id: 所属运行的 id
+        timestamp: time.monotonic() 时间戳
+        agent: 当前 agent 的名称
+        turn: 轮次（从 0 开始）
+        tool: 工具名称（仅工具事件）
+        tool_call_id: 工具调用 id（仅工具事件）
+        duration: 持续时间（秒）；first_token 为首 token 延迟，其他结束类事件为对应阶段的耗时
+        usage: token 用量（completion_end、turn_end 和 run_end）
+        data: 其他信息，如 model、stream、handoff 的目标 agent、工具异常等
+    """
+
+    kind: str
+    run_id: str
+    timestamp: float
+    agent: Optional[str] = None
+    turn: Optional[int] = None
+    tool: Optional[str] = None
+    tool_call_id: Optional[str] = None
+    duration: Optional[float] = None
+    usage: Optional[dict] = None
+    data: dict = field(default_factory=dict)
+
+
+def usage_to_dict(usage) -> Optional[dict]:
+    """把 CompletionUsage（或字典）转换为 {prompt_tokens, completion_tokens, total_tokens}"""
+    if usage is None:
+        return None
+    if isinstance(usage, dict):
+        get = usage.get
+    else:
+        get = lambda key: getattr(usage, key, None)
+    return {
+        "prompt_tokens": get("prompt_tokens") or 0,
+        "completion_tokens": get("completion_tokens") or 0,
+        "total_tokens": get("total_tokens") or 0,
+    }
+
+
+def _add_usage(total: Optional[dict], usage: Optional[dict]) -> Optional[dict]:
+    if usage is None:
+        return total
+    if total is None:
+        return dict(usage)
+    return {key: total.get(key, 0) + value for key, value in usage.items()}
+
+
+class RunRecorder:
+    """
+    一次运行的事件记录器，由 Swarm 在注册了 hooks 时为每次 run 创建
+    负责生成 run_id、计算各阶段耗时并把事件分发给所有 hook。
+    没有注册 hook 时 Swarm 不会创建它，运行循环中只剩一次 None 判断。
+    Args:
+        hooks: 接收 HookEvent 的可调用对象列表
+        agent: 初始 agent 的名称
+    """
+
+    def __init__(self, hooks: List[Callable], agent: Optional[str] = None):
+        self.hooks = hooks
+        self.run_id = uuid.uuid4().hex
+        self.turn = -1
+        self.agent = agent
+        self.usage = None
+        self.run_usage = None
+        self._run_start = self.emit(RUN_START)
+        self._turn_start = None
+        self._turn_open = False
+        self._run_open = True
+        self._request_sent = None
+        self._first_token = False
+
+    def emit(self, kind: str, **fields) -> float:
+        """发出一个事件并返回它的时间戳；hook 抛出的异常不会中断运行"""
+        event = HookEvent(kind, self.run_id, time.monotonic(),
+                          agent=fields.pop("agent", self.agent), **fields)
+        for hook in self.hooks:
+            try:
+                hook(event)
+            except Exception as e:
+                warnings.warn(f"Swarm hook {hook!r} failed on {kind}: {e!r}")
+        return event.timestamp
+
+    def turn_start(self, agent: str) -> None:
+        self.turn += 1
+        self.agent = agent
+        self.usage = None
+        self._first_token = False
+        self._turn_open = True
+        self._turn_start = self.emit(TURN_START, turn=self.turn)
+
+    def request_sent(self, model: str, stream: bool) -> None:
+        self._request_sent = self.emit(
+            REQUEST_SENT, turn=self.turn, data={"model": model, "stream": stream})
+
+    def first_token(self) -> None:
+        """流式响应中第一个带内容或工具调用的 chunk 到达"""
+        self._first_token = True
+        now = time.monotonic()
+        self.emit(FIRST_TOKEN, turn=self.turn, duration=now - self._request_sent)
+
+    @property
+    def waiting_first_token(self) -> bool:
+        return not self._first_token
+
+    def completion_end(self, usage=None, stream: bool = False) -> None:
+        self.usage = usage_to_dict(usage)
+        self.run_usage = _add_usage(self.run_usage, self.usage)
+        self.emit(COMPLETION_END, turn=self.turn, usage=self.usage,
+                  duration=time.monotonic() - self._request_sent,
+                  data={"stream": stream})
+
+    def turn_end(self, error: Optional[BaseException] = None) -> None:
+        if not self._turn_open:
+            return
+        self._turn_open = False
+        data = {"error": repr(error)} if error is not None else {}
+        self.emit(TURN_END, turn=self.turn, usage=self.usage,
+                  duration=time.monotonic() - self._turn_start, data=data)
+
+    def handoff(self, target: str) -> None:
+        self.emit(HANDOFF, turn=self.turn, data={"from": self.agent, "to": target})
+
+    def run_end(self, agent: Optional[str], messages: int, stop_reason: Optional[str] = None,
+                error: Optional[BaseException] = None) -> None:
+        """结束运行；仍未结束的轮次先以同一个错误结束。重复调用时只发出一次"""
+        if not self._run_open:
+            return
+        self._run_open = False
+        self.turn_end(error)
+        data = {"turns": self.turn + 1, "messages": messages, "stop_reason": stop_reason}
+        if error is not None:
+            data["error"] = repr(error)
+        self.emit(RUN_END, agent=agent, turn=self.turn, usage=self.run_usage,
+                  duration=time.monotonic() - self._run_start, data=data)
+
+    def tool_start(self, name: str, tool_call_id: str) -> float:
+        return self.emit(TOOL_START, turn=self.turn, tool=name, tool_call_id=tool_call_id)
+
+    def tool_end(self, name: str, tool_call_id: str, start: float,
+                 error: Optional[BaseException] = None) -> None:
+        data = {"error": repr(error)} if error is not None else {}
+        self.emit(TOOL_END, turn=self.turn, tool=name, tool_call_id=tool_call_id,
+                  duration=time.monotonic() - start, data=data)
+
+    def wrap_tool(self, name: str, tool_call_id: str, func: Callable) -> Callable:
+        """
+        包装工具函数，在执行前后发出 tool_start/tool_end
+        async 工具包装为 async 函数，保证执行器仍能按 async 工具调度。
+        """
+        if is_async_callable(func):
+            async def timed(**args):
+                start = self.tool_start(name, tool_call_id)
+                try:
+                    result = await func(**args)
+                except Exception as e:
+                    self.tool_end(name, tool_call_id, start, e)
+                    raise
+                self.tool_end(name, tool_call_id, start)
+                return result
+        else:
+            def timed(**args):
+                start = self.tool_start(name, tool_call_id)
+                try:
+                    result = func(**args)
+                except Exception as e:
+                    self.tool_end(name, tool_call_id, start, e)
+                    raise
+                self.tool_end(name, tool_call_id, start)
+                return result
+        return timed
+
+
+def percentile(samples: List[float], q: float) -> Optional[float]:
+    """最近秩分位数，samples 需已排序"""
+    if not samples:
+        return None
+    return samples[int(q * (len(samples) - 1))]
+
+
+def summarize(samples) -> dict:
+    """样本的数量、均值和 p50/p95/p99"""
+    ordered = sorted(samples)
+    return {
+        "count": len(ordered),
+        "mean": sum(ordered) / len(ordered) if ordered else None,
+        "p50": percentile(ordered, 0.5),
+        "p95": percentile(ordered, 0.95),
+        "p99": percentile(ordered, 0.99),
+    }
+
+
+class MetricsAggregator:
+    """
+    内置的指标聚合 hook，按 agent 和工具统计延迟分位数与 token 用量
+    用法:
+        metrics = MetricsAggregator()
+        client = Swarm(hooks=[metrics])
+        ...
+        metrics.report()
+    每个序列只保留最近 window 个样本，可在运行中从其他线程读取。
+    Args:
+        window: 每个序列保留的样本数
+    """
+
+    def __init__(self, window: int = 1000):
+        self.window = window
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._agents = defaultdict(self._agent_series)
+            self._tools = defaultdict(self._tool_series)
+            self._runs = deque(maxlen=self.window)
+
+    def _agent_series(self) -> dict:
+        return {
+            "ttft": deque(maxlen=self.window),
+            "latency": deque(maxlen=self.window),
+            "turn": deque(maxlen=self.window),
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "total_tokens": 0,
+        }
+
+    def _tool_series(self) -> dict:
+        return {"duration": deque(maxlen=self.window), "errors": 0}
+
+    def __call__(self, event: HookEvent) -> None:
+        kind = event.kind
+        if kind == FIRST_TOKEN:
+            with self._lock:
+                self._agents[event.agent]["ttft"].append(event.duration)
+        elif kind == COMPLETION_END:
+            with self._lock:
+                series = self._agents[event.agent]
+                series["latency"].append(event.duration)
+                for key, value in (event.usage or {}).items():
+                    series[key] += value
+        elif kind == TURN_END:
+            with self._lock:
+                self._agents[event.agent]["turn"].append(event.duration)
+        elif kind == TOOL_END:
+            with self._lock:
+                series = self._tools[event.tool]
+                series["duration"].append(event.duration)
+                if "error" in event.data:
+                    series["errors"] += 1
+        elif kind == RUN_END:
+            with self._lock:
+                self._runs.append(event.duration)
+
+    def report(self) -> Dict[str, dict]:
+        """
+        返回当前的统计
+        Returns:
+            {"runs": {...}, "agents": {名称: {"ttft", "latency", "turn", token 总数}},
+             "tools": {名称: {"duration", "errors"}}}；延迟为 summarize 的结果（秒）
+        """
+        with self._lock:
+            agents = {
+                name: {
+                    "ttft": summarize(series["ttft"]),
+                    "latency": summarize(series["latency"]),
+                    "turn": summarize(series["turn"]),
+                    "prompt_tokens": series["prompt_tokens"],
+                    "completion_tokens": series["completion_tokens"],
+                    "total_tokens": series["total_tokens"],
+                }
+                for name, series in self._agents.items()
+            }
+            tools = {
+                name: {"duration": summarize(series["duration"]), "errors": series["errors"]}
+                for name, series in self._tools.items()
+            }
+            runs = summarize(self._runs)
+        return {"runs": runs, "agents": agents, "tools": tools}
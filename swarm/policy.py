@@ -0,0 +1,293 @@
+import asyncio
+import contextvars
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Optional, Tuple, Type
+
+_hedge_pool = None
+_hedge_pool_lock = threading.Lock()
+
+
+def _get_hedge_pool() -> ThreadPoolExecutor:
+    global _hedge_pool
+    if _hedge_pool is None:
+        with _hedge_pool_lock:
+            if _hedge_pool is None:
+                _hedge_pool = ThreadPoolExecutor(
+                    max_workers=32, thread_name_prefix="swarm-hedge")
+    return _hedge_pool
+
+
+def default_retryable_errors() -> Tuple[Type[BaseException], ...]:
+    """默认可重试的错误：429、5xx、超时和连接错误"""
+    import openai
+
+    return (
+        openai.RateLimitError,
+        openai.InternalServerError,
+        openai.APITimeoutError,
+        openai.APIConnectionError,
+        TimeoutError,
+    )
+
+
+def _retry_after(error: BaseException) -> Optional[float]:
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def _discard(result) -> None:
+    # 输掉的对冲请求如果是流，关闭底层 HTTP 响应
+    close = getattr(result, "close", None)
+    if callable(close):
+        try:
+            close()
+        except Exception:
+            pass
+
+
+class RequestMetrics:
+    """请求策略的统计信息"""
+
+    def __init__(self, window: int = 200):
+        self.attempts = 0
+        self.retries = 0
+        self.failures = 0
+        self.hedges_fired = 0
+        self.hedges_won = 0
+        self.latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def incr(self, name: str, value: int = 1) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + value)
+
+    def record_latency(self, seconds: float) -> None:
+        with self._lock:
+            self.latencies.append(seconds)
+
+    def quantile(self, q: float) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self.latencies)
+        if not samples:
+            return None
+        return samples[int(q * (len(samples) - 1))]
+
+    def as_dict(self) -> dict:
+        return {
+            "attempts": self.attempts,
+            "retries": self.retries,
+            "failures": self.failures,
+            "hedges_fired": self.hedges_fired,
+            "hedges_won": self.hedges_won,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+        }
+
+
+class RequestPolicy:
+    """
+    chat.completions.create 的请求策略：重试、单次超时和对冲请求
+    用法: Swarm(request_policy=RequestPolicy(max_retries=3, hedge=True))
+    Args:
+        max_retries: 可重试错误的最大重试次数
+        backoff_base: 指数退避的基数（秒）
+        backoff_max: 单次退避的上限（秒）
+        jitter: 是否使用 full jitter（在 [0, 退避时间] 内随机）
+        attempt_timeout: 单次请求的超时（秒），以 timeout 参数传给客户端
+        hedge: 是否启用对冲请求
+        hedge_delay: 固定的对冲延迟（秒）；为 None 时使用最近延迟的 hedge_quantile 分位数
+        hedge_quantile: 推导对冲延迟使用的分位数
+        min_samples: 推导对冲延迟前至少需要的延迟样本数
+        retryable: 可重试的异常类型，默认见 default_retryable_errors
+    """
+
+    def __init__(
+        self,
+        max_retries: int = 2,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8.0,
+        jitter: bool = True,
+        attempt_timeout: Optional[float] = None,
+        hedge: bool = False,
+        hedge_delay: Optional[float] = None,
+        hedge_quantile: float = 0.95,
+        min_samples: int = 20,
+        retryable: Optional[Tuple[Type[BaseException], ...]] = None,
+    ):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.jitter = jitter
+        self.attempt_timeout = attempt_timeout
+        self.hedge = hedge
+        self.hedge_delay = hedge_delay
+        self.hedge_quantile = hedge_quantile
+        self.min_samples = min_samples
+        self._retryable = retryable
+        self.metrics = RequestMetrics()
+
+    @property
+    def retryable(self) -> Tuple[Type[BaseException], ...]:
+        if self._retryable is None:
+            self._retryable = default_retryable_errors()
+        return self._retryable
+
+    def backoff(self, attempt: int, error: Optional[BaseException] = None) -> float:
+        """第 attempt 次重试前的等待时间；服务端给出 retry-after 时不短于它"""
+        delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        retry_after = _retry_after(error) if error is not None else None
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.backoff_max))
+        return delay
+
+    def current_hedge_delay(self) -> Optional[float]:
+        """本次请求的对冲延迟；返回 None 表示不对冲"""
+        if not self.hedge:
+            return None
+        if self.hedge_delay is not None:
+            return self.hedge_delay
+        if len(self.metrics.latencies) < self.min_samples:
+            return None
+        return self.metrics.quantile(self.hedge_quantile)
+
+    def _params(self, params: dict) -> dict:
+        if self.attempt_timeout is not None and "timeout" not in params:
+            return dict(params, timeout=self.attempt_timeout)
+        return params
+
+    def _should_retry(self, attempt: int, error: BaseException) -> bool:
+        return attempt < self.max_retries and isinstance(error, self.retryable)
+
+    def _timed(self, create: Callable, params: dict):
+        self.metrics.incr("attempts")
+        start = time.monotonic()
+        result = create(**params)
+        self.metrics.record_latency(time.monotonic() - start)
+        return result
+
+    def call(self, create: Callable, params: dict, tracker=None):
+        """
+        按策略执行一次 create 调用
+        Args:
+            create: client.chat.completions.create
+            params: create 的参数
+            tracker: 可选的 BudgetTracker；超过截止时间或被取消后不再退避和重试
+        Returns:
+            第一个成功的结果
+        """
+        params = self._params(params)
+        attempt = 0
+        while True:
+            try:
+                return self._attempt(create, params)
+            except Exception as e:
+                if not self._should_retry(attempt, e) or (tracker and tracker.stopped()):
+                    self.metrics.incr("failures")
+                    raise
+                delay = self.backoff(attempt, e)
+                attempt += 1
+                self.metrics.incr("retries")
+                if tracker is None:
+                    time.sleep(delay)
+                elif not tracker.sleep(delay):
+                    self.metrics.incr("failures")
+                    raise
+
+    def _attempt(self, create: Callable, params: dict):
+        delay = self.current_hedge_delay()
+        if delay is None:
+            return self._timed(create, params)
+
+        pool = _get_hedge_pool()
+        # 每次尝试在调用方上下文的副本中执行，保留 ContextVar（如 RateLimiter.priority）
+        primary = pool.submit(contextvars.copy_context().run, self._timed, create, params)
+        done, _ = wait([primary], timeout=delay)
+        if done:
+            return primary.result()
+
+        # 主请求超过对冲延迟仍未返回：发出一个相同的请求，取先成功的那个
+        hedge = pool.submit(contextvars.copy_context().run, self._timed, create, params)
+        self.metrics.incr("hedges_fired")
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is hedge:
+                        self.metrics.incr("hedges_won")
+                    for other in pending:
+                        other.add_done_callback(
+                            lambda f: f.exception() is None and _discard(f.result()))
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    async def _atimed(self, create: Callable, params: dict):
+        self.metrics.incr("attempts")
+        start = time.monotonic()
+        result = await create(**params)
+        self.metrics.record_latency(time.monotonic() - start)
+        return result
+
+    async def acall(self, create: Callable, params: dict, tracker=None):
+        """call 的异步版本，create 为 AsyncOpenAI 的 chat.completions.create"""
+        params = self._params(params)
+        attempt = 0
+        while True:
+            try:
+                return await self._aattempt(create, params)
+            except Exception as e:
+                if not self._should_retry(attempt, e) or (tracker and tracker.stopped()):
+                    self.metrics.incr("failures")
+                    raise
+                delay = self.backoff(attempt, e)
+                attempt += 1
+                self.metrics.incr("retries")
+                if tracker is None:
+                    await asyncio.sleep(delay)
+                elif not await tracker.asleep(delay):
+                    self.metrics.incr("failures")
+                    raise
+
+    async def _aattempt(self, create: Callable, params: dict):
+        delay = self.current_hedge_delay()
+        if delay is None:
+            return await self._atimed(create, params)
+
+        primary = asyncio.ensure_future(self._atimed(create, params))
+        done, _ = await asyncio.wait([primary], timeout=delay)
+        if done:
+            return primary.result()
+
+        hedge = asyncio.ensure_future(self._atimed(create, params))
+        self.metrics.incr("hedges_fired")
+        pending = {primary, hedge}
+        error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self.metrics.incr("hedges_won")
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            # 取消输掉的请求
+            for task in pending:
+                task.cancel()
@@ -0,0 +1,346 @@
+import asyncio
+import contextlib
+import contextvars
+import heapq
+import itertools
+import json
+import re
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+from .util import estimate_tokens
+
+# 异步等待者不在队首时的轮询间隔（秒）
+ASYNC_POLL_INTERVAL = 0.01
+
+_priority = contextvars.ContextVar("swarm_rate_limit_priority", default=0)
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+
+
+def parse_reset(value) -> Optional[float]:
+    """解析 x-ratelimit-reset-* 头（如 "1s"、"6m0s"、"20ms"），返回秒数"""
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        pass
+    parts = _DURATION_PART.findall(str(value))
+    if not parts:
+        return None
+    return sum(float(number) * _DURATION_UNITS[unit] for number, unit in parts)
+
+
+def _header_int(headers, name: str) -> Optional[int]:
+    try:
+        return int(headers.get(name))
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """
+    每分钟额度的令牌桶
+    Args:
+        per_minute: 每分钟的额度，同时作为桶的容量
+    """
+
+    __slots__ = ("capacity", "rate", "tokens", "updated")
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """距离桶中有 amount 个令牌还需等待的秒数"""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def take(self, amount: float, now: float) -> None:
+        self._refill(now)
+        self.tokens -= min(amount, self.capacity)
+
+    def set_limit(self, per_minute: float) -> None:
+        if per_minute > 0 and per_minute != self.capacity:
+            self.capacity = float(per_minute)
+            self.rate = self.capacity / 60.0
+            self.tokens = min(self.tokens, self.capacity)
+
+    def sync(self, remaining: float, now: float) -> None:
+        """按服务端报告的剩余额度下调本地令牌（其他进程也在消耗同一额度）"""
+        self._refill(now)
+        self.tokens = min(self.tokens, float(remaining))
+
+    def drain(self, now: float) -> None:
+        self._refill(now)
+        self.tokens = min(self.tokens, 0.0)
+
+
+class _ModelLimit:
+    """单个模型的 RPM/TPM 令牌桶和等待队列"""
+
+    def __init__(self, rpm: Optional[float], tpm: Optional[float]):
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self.blocked_until = 0.0
+        self.queue = []
+
+    def wait_time(self, tokens: float, now: float) -> float:
+        wait = max(0.0, self.blocked_until - now)
+        if self.requests is not None:
+            wait = max(wait, self.requests.wait_time(1, now))
+        if self.tokens is not None:
+            wait = max(wait, self.tokens.wait_time(tokens, now))
+        return wait
+
+    def take(self, tokens: float, now: float) -> None:
+        if self.requests is not None:
+            self.requests.take(1, now)
+        if self.tokens is not None:
+            self.tokens.take(tokens, now)
+
+
+class RateLimiter:
+    """
+    客户端的 RPM/TPM 限流器，按模型划分，可在多个 Swarm、线程和事件循环间共享
+    用法: Swarm(rate_limiter=RateLimiter(rpm=500, tpm=30000))
+    每次请求前按 messages 和 tools 估算 prompt token 数（加上 max_tokens），
+    额度不足时排队等待而不是报错。等待者按 (priority, 到达顺序) 出队：
+    priority 相同时为 FIFO，数值越小越先获得额度，见 RateLimiter.priority。
+    请求返回 429 等错误时读取响应的 x-ratelimit-* 和 retry-after 头调整额度；
+    observe_response 可注册为 httpx 的 response 事件钩子，从成功的响应中同步额度。
+    Args:
+        rpm: 默认的每分钟请求数；为 None 时不限制
+        tpm: 默认的每分钟 token 数；为 None 时不限制
+        model_limits: 按模型覆盖的 {model: (rpm, tpm)}
+    """
+
+    def __init__(
+        self,
+        rpm: Optional[float] = None,
+        tpm: Optional[float] = None,
+        model_limits: Optional[Dict[str, Tuple[Optional[float], Optional[float]]]] = None,
+    ):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.model_limits = dict(model_limits or {})
+        self.waits = 0
+        self.total_wait = 0.0
+        self._models = {}
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+
+    def _limit(self, model: str) -> _ModelLimit:
+        limit = self._models.get(model)
+        if limit is None:
+            rpm, tpm = self.model_limits.get(model, (self.rpm, self.tpm))
+            limit = self._models[model] = _ModelLimit(rpm, tpm)
+        return limit
+
+    @staticmethod
+    def estimate(params: dict) -> int:
+        """估算一次 create 调用消耗的 token 数：prompt 估算加上输出上限"""
+        tokens = estimate_tokens(params.get("messages") or (), params.get("tools"))
+        return tokens + (params.get("max_completion_tokens") or params.get("max_tokens") or 0)
+
+    @staticmethod
+    @contextlib.contextmanager
+    def priority(value: int):
+        """在当前上下文（线程或 asyncio 任务）中以给定优先级排队，数值越小越优先"""
+        token = _priority.set(value)
+        try:
+            yield
+        finally:
+            _priority.reset(token)
+
+    def _enqueue(self, model: str) -> Tuple[_ModelLimit, list]:
+        limit = self._limit(model)
+        ticket = [_priority.get(), next(self._seq)]
+        heapq.heappush(limit.queue, ticket)
+        return limit, ticket
+
+    def _try_take(self, limit: _ModelLimit, ticket: list, tokens: int) -> Optional[float]:
+        """队首且额度足够时扣减并出队返回 0；否则返回需要等待的秒数（不在队首时为 None）"""
+        if limit.queue[0] is not ticket:
+            return None
+        now = time.monotonic()
+        wait = limit.wait_time(tokens, now)
+        if wait <= 0:
+            limit.take(tokens, now)
+            heapq.heappop(limit.queue)
+            self._cond.notify_all()
+        return wait
+
+    def _dequeue(self, limit: _ModelLimit, ticket: list) -> None:
+        if ticket in limit.queue:
+            limit.queue.remove(ticket)
+            heapq.heapify(limit.queue)
+            self._cond.notify_all()
+
+    def _record(self, start: float) -> float:
+        waited = time.monotonic() - start
+        if waited > 0.001:
+            self.waits += 1
+            self.total_wait += waited
+        return waited
+
+    def _wake(self) -> None:
+        with self._cond:
+            self._cond.notify_all()
+
+    def acquire(self, model: str, tokens: int = 0, tracker=None) -> float:
+        """
+        等待 model 的额度并扣减一次请求和 tokens 个 token
+        Args:
+            model: 模型名称
+            tokens: 估算的 token 数
+            tracker: 可选的 BudgetTracker；超过截止时间或被取消时停止等待并抛出 BudgetExceeded
+        Returns:
+            实际等待的秒数
+        """
+        start = time.monotonic()
+        unwatch = tracker.on_cancel(self._wake) if tracker else None
+        try:
+            with self._cond:
+                limit, ticket = self._enqueue(model)
+                try:
+                    while True:
+                        wait = self._try_take(limit, ticket, tokens)
+                        if wait is not None and wait <= 0:
+                            return self._record(start)
+                        if tracker:
+                            tracker.check()
+                            remaining = tracker.remaining_time()
+                            if remaining is not None:
+                                wait = remaining if wait is None else min(wait, remaining)
+                        self._cond.wait(wait)
+                except BaseException:
+                    self._dequeue(limit, ticket)
+                    raise
+        finally:
+            if unwatch:
+                unwatch()
+
+    async def aacquire(self, model: str, tokens: int = 0, tracker=None) -> float:
+        """acquire 的异步版本，等待期间不阻塞事件循环"""
+        start = time.monotonic()
+        with self._cond:
+            limit, ticket = self._enqueue(model)
+        try:
+            while True:
+                with self._cond:
+                    wait = self._try_take(limit, ticket, tokens)
+                if wait is not None and wait <= 0:
+                    return self._record(start)
+                delay = ASYNC_POLL_INTERVAL if wait is None else wait
+                if tracker is None:
+                    await asyncio.sleep(delay)
+                elif not await tracker.asleep(delay):
+                    tracker.check()
+        except BaseException:
+            with self._cond:
+                self._dequeue(limit, ticket)
+            raise
+
+    def update_from_headers(self, model: str, headers) -> None:
+        """
+        按服务端返回的限流头调整 model 的额度
+        读取 x-ratelimit-limit-*、x-ratelimit-remaining-* 和 retry-after。
+        """
+        if not headers:
+            return
+        with self._cond:
+            limit = self._limit(model)
+            now = time.monotonic()
+            for kind in ("requests", "tokens"):
+                cap = _header_int(headers, f"x-ratelimit-limit-{kind}")
+                remaining = _header_int(headers, f"x-ratelimit-remaining-{kind}")
+                bucket = getattr(limit, kind)
+                if bucket is None and cap:
+                    # 未配置的维度以服务端报告的额度为准
+                    bucket = TokenBucket(cap)
+                    setattr(limit, kind, bucket)
+                if bucket is None:
+                    continue
+                if cap:
+                    bucket.set_limit(cap)
+                if remaining is not None:
+                    bucket.sync(remaining, now)
+            retry_after = parse_reset(headers.get("retry-after"))
+            if retry_after:
+                limit.blocked_until = max(limit.blocked_until, now + retry_after)
+            self._cond.notify_all()
+
+    def observe_error(self, model: str, error: BaseException) -> None:
+        """请求失败时读取错误响应的限流头；429 时暂停该模型直到额度重置"""
+        response = getattr(error, "response", None)
+        headers = getattr(response, "headers", None)
+        if getattr(error, "status_code", None) == 429 or getattr(response, "status_code", None) == 429:
+            with self._cond:
+                limit = self._limit(model)
+                now = time.monotonic()
+                for bucket in (limit.requests, limit.tokens):
+                    if bucket is not None:
+                        bucket.drain(now)
+                if headers and not headers.get("retry-after"):
+                    resets = [parse_reset(headers.get(f"x-ratelimit-reset-{kind}"))
+                              for kind in ("requests", "tokens")]
+                    resets = [reset for reset in resets if reset]
+                    if resets:
+                        limit.blocked_until = max(limit.blocked_until, now + min(resets))
+        self.update_from_headers(model, headers)
+
+    def observe_response(self, response) -> None:
+        """
+        httpx 的 response 事件钩子，从每个响应的限流头同步额度
+        用法: OpenAI(http_client=httpx.Client(event_hooks={"response": [limiter.observe_response]}))
+        """
+        try:
+            model = json.loads(response.request.content)["model"]
+        except Exception:
+            return
+        self.update_from_headers(model, response.headers)
+
+    def wrap(self, create: Callable, tracker=None) -> Callable:
+        """
+        包装 chat.completions.create：每次调用（包括重试）前先获取额度
+        传入 BudgetTracker 时等待额度不超过 run 的截止时间，并在取消时立即停止。
+        """
+
+        def limited(**params):
+            model = params.get("model")
+            self.acquire(model, self.estimate(params), tracker)
+            try:
+                return create(**params)
+            except Exception as e:
+                self.observe_error(model, e)
+                raise
+
+        return limited
+
+    def awrap(self, create: Callable, tracker=None) -> Callable:
+        """wrap 的异步版本，create 为 AsyncOpenAI 的 chat.completions.create"""
+
+        async def limited(**params):
+            model = params.get("model")
+            await self.aacquire(model, self.estimate(params), tracker)
+            try:
+                return await create(**params)
+            except Exception as e:
+                self.observe_error(model, e)
+                raise
+
+        return limited
@@ -0,0 +1,77 @@
+import threading
+from collections import OrderedDict
+from typing import Dict, List
+
+from .util import function_to_json
+
+__CTX_VARS_NAME__ = "context_variables"
+
+# 最多缓存的函数组合数量
+MAX_CACHED_TOOLSETS = 256
+
+
+class CompiledTools:
+    """
+    一组 agent 函数编译后的结果
+    属性:
+        tools: 发送给 API 的工具 JSON（已移除 context_variables 参数），不应被修改
+        function_map: 函数名到函数的映射
+        accepts_context: 函数名到"是否接收 context_variables"的映射
+    """
+
+    __slots__ = ("functions", "tools", "function_map", "accepts_context")
+
+    def __init__(self, functions: List):
+        self.functions = tuple(functions)
+        self.tools = []
+        self.function_map = {}
+        self.accepts_context: Dict[str, bool] = {}
+        for func in self.functions:
+            tool = function_to_json(func)
+            params = tool["function"]["parameters"]
+            # 从工具参数和必需参数中移除上下文变量
+            params["properties"].pop(__CTX_VARS_NAME__, None)
+            if __CTX_VARS_NAME__ in params["required"]:
+                params["required"].remove(__CTX_VARS_NAME__)
+            self.tools.append(tool)
+
+            self.function_map[func.__name__] = func
+            code = getattr(func, "__code__", None)
+            self.accepts_context[func.__name__] = (
+                code is not None and __CTX_VARS_NAME__ in code.co_varnames
+            )
+
+
+_cache: "OrderedDict[tuple, CompiledTools]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def compile_tools(functions: List) -> CompiledTools:
+    """
+    获取一组函数的编译结果，按函数对象缓存
+    缓存键是函数对象本身（按 id），因此 agent.functions 被替换或原地增删后
+    会自动得到新的编译结果；缓存条目持有函数引用，id 在条目存活期间不会被复用。
+    Args:
+        functions: agent.functions
+    Returns:
+        CompiledTools
+    """
+    key = tuple(map(id, functions))
+    with _cache_lock:
+        compiled = _cache.get(key)
+        if compiled is not None:
+            _cache.move_to_end(key)
+            return compiled
+
+    compiled = CompiledTools(functions)
+    with _cache_lock:
+        _cache[key] = compiled
+        if len(_cache) > MAX_CACHED_TOOLSETS:
+            _cache.popitem(last=False)
+    return compiled
+
+
+def clear_tool_cache() -> None:
+    """清空编译缓存（例如在运行时修改了函数的签名或文档字符串之后）"""
+    with _cache_lock:
+        _cache.clear()
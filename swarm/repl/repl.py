@@ -63,25 +63,15 @@ def run_demo_loop(
     client = Swarm()
     print("Starting Swarm CLI 🐝")
 
-    messages = []
-    agent = starting_agent
+    session = client.session(
+        starting_agent, context_variables=context_variables, debug=debug
+    )
 
     while True:
         user_input = input("\033[90mUser\033[0m: ")
-        messages.append({"role": "user", "content": user_input})
-
-        response = client.run(
-            agent=agent,
-            messages=messages,
-            context_variables=context_variables or {},
-            stream=stream,
-            debug=debug,
-        )
 
         if stream:
-            response = process_and_print_streaming_response(response)
+            process_and_print_streaming_response(session.stream(user_input))
         else:
+            response = session.send(user_input)
             pretty_print_messages(response.messages)
-
-        messages.extend(response.messages)
-        agent = response.agent
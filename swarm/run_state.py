@@ -0,0 +1,176 @@
+import copy
+import time
+from typing import Optional
+
+from .budget import (
+    STOP_CANCELLED,
+    STOP_COMPLETED,
+    STOP_ERROR,
+    STOP_MAX_TURNS,
+    STOP_TOOL_CALLS,
+    RunBudget,
+)
+from .history import History
+from .hooks import RunRecorder
+from .types import Agent, Response
+from .util import debug_print, model_to_dict
+
+
+class RunState:
+    """
+    一次 run 的状态和每轮共用的步骤
+    Swarm/AsyncSwarm 的同步、异步、流式和非流式四个运行循环只负责发请求、读流和执行工具，
+    轮次开始时的预算检查、事件记录、回复写入历史、工具结果合并和 run_end 都在这里完成，
+    保证四个循环的行为一致。
+    用法:
+        state = RunState(swarm, agent, messages, context_variables, budget)
+        with state:  # 退出时（包括异常和生成器被关闭）发出 run_end
+            while state.running(max_turns):
+                ...
+        return state.response()
+    """
+
+    def __init__(
+        self,
+        swarm,
+        agent: Agent,
+        messages,
+        context_variables: dict,
+        budget: Optional[RunBudget] = None,
+    ):
+        self.agent = agent
+        self.context_variables = copy.deepcopy(context_variables)
+        self.history = History(messages)  # 共享调用方历史，只追加新消息
+        self.init_len = len(self.history)
+        # 注册了 hook 时记录本次运行的事件
+        self.recorder = RunRecorder(swarm.hooks, agent.name) if swarm.hooks else None
+        # 预算和取消：每次 run 独立计时和计数
+        self.tracker = budget.start() if budget else None
+        self.stop_reason = STOP_MAX_TURNS
+        self.error = None
+        self.usage = None
+        self._tools_start = None
+
+    def __enter__(self) -> "RunState":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        if exc is not None:
+            self.error = exc
+            self.stop_reason = STOP_ERROR if isinstance(exc, Exception) else STOP_CANCELLED
+        # 无论正常结束、异常还是被调用方中断，都发出 run_end（并结束未关闭的轮次）
+        if self.recorder:
+            self.recorder.run_end(self.agent.name, len(self.history) - self.init_len,
+                                  stop_reason=self.stop_reason, error=self.error)
+        return False
+
+    def running(self, max_turns) -> bool:
+        return len(self.history) - self.init_len < max_turns and bool(self.agent)
+
+    def interrupted(self) -> bool:
+        """超出预算或被取消时记录停止原因并返回 True"""
+        if self.tracker and self.tracker.exceeded():
+            self.stop_reason = self.tracker.stop_reason
+            return True
+        return False
+
+    def begin_turn(self, model_override: Optional[str], stream: bool) -> bool:
+        """开始新的一轮；预算已用尽时返回 False"""
+        if self.interrupted():
+            return False
+        self.usage = None
+        if self.recorder:
+            self.recorder.turn_start(self.agent.name)
+            self.recorder.request_sent(model_override or self.agent.model, stream=stream)
+        return True
+
+    def request(self, model_override: Optional[str], stream: bool, debug: bool) -> dict:
+        """本轮 get_chat_completion 的参数"""
+        tracker = self.tracker
+        return dict(
+            agent=self.agent,
+            history=self.history,
+            context_variables=self.context_variables,
+            model_override=model_override,
+            stream=stream,
+            debug=debug,
+            extra_params=tracker.request_params(stream) if tracker else None,
+            tracker=tracker,
+        )
+
+    def completion_end(self, usage=None, stream: bool = False) -> None:
+        if usage is not None:
+            self.usage = usage
+        if self.recorder:
+            self.recorder.completion_end(self.usage, stream=stream)
+
+    def stream_delta(self, chunk) -> Optional[dict]:
+        """把流式 chunk 转换为 delta 字典；只携带 token 用量的最后一个 chunk 返回 None"""
+        if not chunk.choices:
+            # include_usage 时最后一个 chunk 只携带 token 用量
+            self.usage = chunk.usage
+            return None
+        delta = model_to_dict(chunk.choices[0].delta)
+        if delta["role"] == "assistant":
+            delta["sender"] = self.agent.name
+        recorder = self.recorder
+        if recorder and recorder.waiting_first_token and (
+            delta["content"] or delta["tool_calls"]
+        ):
+            recorder.first_token()
+        return delta
+
+    def stopped_mid_stream(self, message: dict) -> bool:
+        """
+        流被预算或取消中途停止时结束本轮并返回 True
+        保留已生成的文本，丢弃可能不完整的工具调用。
+        """
+        if not (self.tracker and self.tracker.stop_reason):
+            return False
+        message["tool_calls"] = None
+        if message["content"]:
+            self.history.append(message)
+        self.stop_reason = self.tracker.stop_reason
+        if self.recorder:
+            self.recorder.turn_end()
+        return True
+
+    def commit(self, message: dict, execute_tools: bool, debug: bool) -> bool:
+        """
+        把模型的回复写入历史
+        Returns:
+            本次 run 是否就此结束（没有工具调用或不执行工具）
+        """
+        if self.tracker:
+            # 在追加之前估算，避免把回复计入两次
+            self.tracker.add_usage(self.usage, self.history, message)
+        self.history.append(message)
+        if message["tool_calls"] and execute_tools:
+            self._tools_start = time.monotonic()
+            return False
+        debug_print(debug, "Ending turn.")
+        self.stop_reason = STOP_TOOL_CALLS if message["tool_calls"] else STOP_COMPLETED
+        if self.recorder:
+            self.recorder.turn_end()
+        return True
+
+    def merge_tools(self, partial_response: Response) -> None:
+        """合并工具调用的结果：写入工具消息、更新上下文变量、处理交接并结束本轮"""
+        if self.tracker:
+            self.tracker.add_tool_time(time.monotonic() - self._tools_start)
+        self.history.extend(partial_response.messages)
+        self.context_variables.update(partial_response.context_variables)
+        if partial_response.agent:
+            if self.recorder:
+                self.recorder.handoff(partial_response.agent.name)
+            self.agent = partial_response.agent
+        if self.recorder:
+            self.recorder.turn_end()
+
+    def response(self) -> Response:
+        return Response(
+            messages=self.history.to_list(self.init_len),  # 只返回新的消息
+            agent=self.agent,
+            context_variables=self.context_variables,
+            stop_reason=self.stop_reason,
+        )
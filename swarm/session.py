@@ -0,0 +1,152 @@
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from .history import History
+from .types import Agent, Response
+
+
+def _as_message(message: Union[str, dict]) -> dict:
+    if isinstance(message, str):
+        return {"role": "user", "content": message}
+    return message
+
+
+def _resolve_agents(agents: Union[Dict[str, Agent], Iterable[Agent]]) -> Dict[str, Agent]:
+    if isinstance(agents, dict):
+        return agents
+    return {agent.name: agent for agent in agents}
+
+
+class Session:
+    """
+    有状态的会话句柄，由 Swarm.session() 创建
+    会话自己保存历史、当前 agent 和上下文变量，调用方每次只需传入新的用户消息，
+    并只拿回本次新增的消息。历史使用 History 结构共享，每轮不会复制已有历史。
+    Args:
+        swarm: 执行对话的 Swarm
+        agent: 初始 agent
+        context_variables: 初始上下文变量
+        messages: 已有的对话历史
+        run_kwargs: 每次调用 run 时使用的默认参数（model_override、max_turns、debug 等）
+    """
+
+    def __init__(
+        self,
+        swarm,
+        agent: Agent,
+        context_variables: Optional[dict] = None,
+        messages: Iterable = (),
+        **run_kwargs,
+    ):
+        self.swarm = swarm
+        self.agent = agent
+        self.context_variables = dict(context_variables or {})
+        self.history = History(list(messages))
+        self.run_kwargs = run_kwargs
+
+    @property
+    def messages(self) -> List[dict]:
+        return self.history.to_list()
+
+    def _prepare(self, message: Union[str, dict, None], overrides: dict) -> Tuple[dict, list]:
+        """
+        构建 run 的参数，返回 (参数, 本次新的用户消息)
+        新消息只加入发给 run 的视图；run 成功后才由 _update 写入会话历史，
+        因此失败或中途停止的 run 不会在会话中留下没有回复的消息。
+        """
+        messages = self.history.snapshot()
+        sent = []
+        if message is not None:
+            sent.append(_as_message(message))
+            messages.append(sent[0])
+        kwargs = dict(
+            self.run_kwargs,
+            **overrides,
+            agent=self.agent,
+            messages=messages,
+            context_variables=self.context_variables,
+        )
+        return kwargs, sent
+
+    def _update(self, sent: list, response: Response) -> None:
+        # 新消息和 response.messages 与 run 追加到共享日志的记录内容相同，这里只是前移游标
+        self.history.extend(sent)
+        self.history.extend(response.messages)
+        if response.agent:
+            self.agent = response.agent
+        self.context_variables = response.context_variables
+
+    def send(self, message: Union[str, dict, None] = None, **overrides) -> Response:
+        """
+        发送一条新消息并运行到本轮结束
+        Args:
+            message: 新的用户消息（字符串或消息字典）；为 None 时直接基于现有历史继续
+            overrides: 覆盖本次调用的 run 参数
+        Returns:
+            只包含本次新增消息的 Response
+        """
+        kwargs, sent = self._prepare(message, overrides)
+        response = self.swarm.run(**kwargs)
+        self._update(sent, response)
+        return response
+
+    def stream(self, message: Union[str, dict, None] = None, **overrides):
+        """与 send 相同，但以 run_and_stream 的事件流形式返回，结束时更新会话状态"""
+        kwargs, sent = self._prepare(message, overrides)
+        kwargs.pop("stream", None)
+        for chunk in self.swarm.run_and_stream(**kwargs):
+            if "response" in chunk:
+                self._update(sent, chunk["response"])
+            yield chunk
+
+    def to_dict(self) -> dict:
+        """把会话序列化为可 JSON 化的字典；agent 以名称保存"""
+        return {
+            "agent": self.agent.name,
+            "context_variables": self.context_variables,
+            "messages": [dict(message) for message in self.history],
+        }
+
+    @classmethod
+    def from_dict(
+        cls,
+        swarm,
+        data: dict,
+        agents: Union[Dict[str, Agent], Iterable[Agent]],
+        **run_kwargs,
+    ) -> "Session":
+        """
+        从 to_dict 的结果恢复会话
+        Args:
+            swarm: 执行对话的 Swarm
+            data: to_dict 的结果
+            agents: 可用的 agent（列表或 名称->agent 字典），用于按名称找回当前 agent
+        """
+        agents = _resolve_agents(agents)
+        name = data["agent"]
+        if name not in agents:
+            raise KeyError(f"Agent {name} not found among the provided agents.")
+        return cls(
+            swarm,
+            agents[name],
+            context_variables=data.get("context_variables"),
+            messages=data.get("messages", []),
+            **run_kwargs,
+        )
+
+
+class AsyncSession(Session):
+    """AsyncSwarm 的会话句柄，send/stream 为异步版本"""
+
+    async def send(self, message: Union[str, dict, None] = None, **overrides) -> Response:
+        kwargs, sent = self._prepare(message, overrides)
+        response = await self.swarm.run(**kwargs)
+        self._update(sent, response)
+        return response
+
+    async def stream(self, message: Union[str, dict, None] = None, **overrides):
+        kwargs, sent = self._prepare(message, overrides)
+        kwargs.pop("stream", None)
+        async for chunk in self.swarm.run_and_stream(**kwargs):
+            if "response" in chunk:
+                self._update(sent, chunk["response"])
+            yield chunk
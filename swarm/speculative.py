@@ -0,0 +1,207 @@
+import json
+import re
+import threading
+from typing import Callable, Dict, List
+
+from .executor import ToolExecutor
+from .registry import CompiledTools
+from .util import StreamAccumulator
+
+__IDEMPOTENT_ATTR__ = "__swarm_idempotent__"
+
+# 参数 JSON 中影响嵌套深度和字符串边界的字符
+_SIGNIFICANT = re.compile(r'[{}\[\]"\\]')
+
+_default_executor = None
+_default_executor_lock = threading.Lock()
+
+
+def idempotent(func: Callable) -> Callable:
+    """
+    把工具标记为幂等：可以在流式响应结束前提前执行，必要时重复执行
+    只应标记没有副作用、结果只取决于参数的工具（如查询类工具）。
+    用法:
+        @idempotent
+        def lookup_order(order_id: str): ...
+    """
+    setattr(func, __IDEMPOTENT_ATTR__, True)
+    return func
+
+
+def is_idempotent(func: Callable) -> bool:
+    return getattr(func, __IDEMPOTENT_ATTR__, False) is True
+
+
+def default_executor() -> ToolExecutor:
+    """未配置 tool_executor 的同步 Swarm 用于提前执行工具的共享线程池"""
+    global _default_executor
+    if _default_executor is None:
+        with _default_executor_lock:
+            if _default_executor is None:
+                _default_executor = ToolExecutor(max_workers=4)
+    return _default_executor
+
+
+class _ArgumentScanner:
+    """
+    增量扫描单个 tool_call 的参数片段，跟踪括号深度和字符串边界
+    每个字符只扫描一次，不需要在每个片段到达时重新解析整段 JSON。
+    """
+
+    __slots__ = ("depth", "in_string", "escape_at", "closed")
+
+    def __init__(self):
+        self.depth = 0
+        self.in_string = False
+        # 被反斜杠转义的字符在当前片段中的位置（-1 表示没有）
+        self.escape_at = -1
+        self.closed = False
+
+    def feed(self, fragment: str) -> bool:
+        """扫描一个片段，返回顶层的对象或数组是否在本片段中闭合"""
+        if self.closed:
+            # 闭合之后的内容只可能让最终参数与提前执行时不同，由 Speculation.claim 处理
+            return False
+        for match in _SIGNIFICANT.finditer(fragment):
+            position = match.start()
+            if position == self.escape_at:
+                self.escape_at = -1
+                continue
+            char = match.group()
+            if self.in_string:
+                if char == "\\":
+                    self.escape_at = position + 1
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                self.in_string = True
+            elif char in "{[":
+                self.depth += 1
+            elif char in "}]":
+                self.depth -= 1
+                if self.depth == 0:
+                    self.closed = True
+                    return True
+        # 转义落在片段末尾时，被转义的是下一个片段的第一个字符
+        self.escape_at = 0 if self.escape_at == len(fragment) else -1
+        return False
+
+
+class ToolCallDetector:
+    """
+    流式响应中的增量工具调用检测器
+    在 StreamAccumulator.add(delta) 之后调用 add(delta)，返回本次增量中参数 JSON
+    刚刚闭合且能被解析的 tool_call 下标；完整的 tool_call 通过 accumulator.tool_call(index) 获取。
+    Args:
+        accumulator: 本轮流式响应的累积器
+    """
+
+    def __init__(self, accumulator: StreamAccumulator):
+        self.accumulator = accumulator
+        self._scanners: Dict[int, _ArgumentScanner] = {}
+
+    def add(self, delta: dict) -> List[int]:
+        completed = []
+        for tool_call in delta.get("tool_calls") or ():
+            index = tool_call.get("index")
+            function = tool_call.get("function") or {}
+            fragment = function.get("arguments")
+            if index is None or not fragment:
+                continue
+            scanner = self._scanners.get(index)
+            if scanner is None:
+                scanner = self._scanners[index] = _ArgumentScanner()
+            if scanner.feed(fragment) and self._valid(index):
+                completed.append(index)
+        return completed
+
+    def _valid(self, index: int) -> bool:
+        tool_call = self.accumulator.tool_call(index)
+        if not tool_call["id"] or not tool_call["function"]["name"]:
+            return False
+        try:
+            json.loads(tool_call["function"]["arguments"])
+        except ValueError:
+            return False
+        return True
+
+
+class Speculation:
+    """
+    一轮流式响应中提前执行的幂等工具调用
+    参数闭合的 tool_call 如果对应被 idempotent 标记的工具，就立即通过 dispatch 开始执行；
+    流结束后由 claim 按位置与最终的 tool_calls 对账，只有 id、名称和参数都与执行时一致的
+    结果才会被采用，其余调用按正常流程重新执行。
+    Args:
+        accumulator: 本轮流式响应的累积器
+        registry: 当前 agent 函数的编译结果
+        prepare: tool_call 字典 -> (func, args)，与正常流程使用相同的参数准备逻辑
+        dispatch: (工具名, 函数, 参数) -> 可等待的句柄（concurrent.futures.Future 或 asyncio.Task）
+    """
+
+    def __init__(
+        self,
+        accumulator: StreamAccumulator,
+        registry: CompiledTools,
+        prepare: Callable,
+        dispatch: Callable,
+    ):
+        self.accumulator = accumulator
+        self.registry = registry
+        self.prepare = prepare
+        self.dispatch = dispatch
+        self.detector = ToolCallDetector(accumulator)
+        # tool_call 下标 -> (执行时的 tool_call 字典, 句柄)
+        self.calls = {}
+
+    @staticmethod
+    def applies(registry: CompiledTools) -> bool:
+        """agent 的函数中是否有被标记为幂等的工具"""
+        return any(is_idempotent(func) for func in registry.functions)
+
+    def feed(self, delta: dict) -> None:
+        """在 accumulator.add(delta) 之后调用，提前执行参数已完整的幂等工具"""
+        if not delta.get("tool_calls"):
+            return
+        for index in self.detector.add(delta):
+            if index in self.calls:
+                continue
+            tool_call = self.accumulator.tool_call(index)
+            name = tool_call["function"]["name"]
+            func = self.registry.function_map.get(name)
+            if func is None or not is_idempotent(func):
+                continue
+            func, args = self.prepare(tool_call)
+            self.calls[index] = (tool_call, self.dispatch(name, func, args))
+
+    def claim(self, tool_calls: List) -> dict:
+        """
+        把提前执行的结果与最终的 tool_calls 对账
+        Args:
+            tool_calls: 最终消息中的 ChatCompletionMessageToolCall 列表
+        Returns:
+            {tool_calls 中的位置: 句柄}，只包含与执行时完全一致的调用
+        """
+        claimed = {}
+        for position, index in enumerate(self.accumulator.tool_call_indexes()):
+            entry = self.calls.get(index)
+            if entry is None or position >= len(tool_calls):
+                continue
+            speculated, handle = entry
+            tool_call = tool_calls[position]
+            if (
+                tool_call.id == speculated["id"]
+                and tool_call.function.name == speculated["function"]["name"]
+                and tool_call.function.arguments == speculated["function"]["arguments"]
+            ):
+                claimed[position] = handle
+        return claimed
+
+    def discard(self) -> None:
+        """取消尚未完成的调用；已完成的调用取走异常，避免未获取异常的警告"""
+        for _, handle in self.calls.values():
+            if not handle.done():
+                handle.cancel()
+            elif not handle.cancelled():
+                handle.exception()
+        self.calls.clear()
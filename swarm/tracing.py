@@ -0,0 +1,346 @@
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from .hooks import (
+    COMPLETION_END,
+    FIRST_TOKEN,
+    HANDOFF,
+    REQUEST_SENT,
+    RUN_END,
+    RUN_START,
+    TOOL_END,
+    TOOL_START,
+    HookEvent,
+)
+
+# OTLP 的 span kind 和状态码
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_CLIENT = 3
+STATUS_UNSET = 0
+STATUS_ERROR = 2
+
+
+def _new_id(nbytes: int) -> str:
+    return os.urandom(nbytes).hex()
+
+
+@dataclass
+class Span:
+    """
+    一个已结束（或进行中）的 span，时间为 Unix 纳秒
+    Args:
+        name: span 名称
+        trace_id: 32 位十六进制的 trace id
+        span_id: 16 位十六进制的 span id
+        parent_span_id: 父 span 的 id，根 span 为 None
+        start_time: 开始时间（Unix 纳秒）
+        end_time: 结束时间（Unix 纳秒）
+        kind: OTLP span kind
+        attributes: span 属性
+        events: span 事件 [{"name", "time", "attributes"}]
+        status_code: OTLP 状态码
+        status_message: 错误信息
+    """
+
+    name: str
+    trace_id: str
+    span_id: str
+    parent_span_id: Optional[str]
+    start_time: int
+    end_time: Optional[int] = None
+    kind: int = SPAN_KIND_INTERNAL
+    attributes: dict = field(default_factory=dict)
+    events: List[dict] = field(default_factory=list)
+    status_code: int = STATUS_UNSET
+    status_message: str = ""
+
+    def to_otlp(self) -> dict:
+        """转换为 OTLP/JSON 编码的 span"""
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_time),
+            "endTimeUnixNano": str(self.end_time if self.end_time is not None else self.start_time),
+            "attributes": _otlp_attributes(self.attributes),
+            "events": [
+                {
+                    "timeUnixNano": str(event["time"]),
+                    "name": event["name"],
+                    "attributes": _otlp_attributes(event.get("attributes", {})),
+                }
+                for event in self.events
+            ],
+            "status": {"code": self.status_code},
+        }
+        if self.parent_span_id:
+            span["parentSpanId"] = self.parent_span_id
+        if self.status_message:
+            span["status"]["message"] = self.status_message
+        return span
+
+
+def _otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: dict) -> List[dict]:
+    return [{"key": key, "value": _otlp_value(value)}
+            for key, value in attributes.items() if value is not None]
+
+
+def _usage_attributes(usage: Optional[dict]) -> dict:
+    if not usage:
+        return {}
+    return {
+        "gen_ai.usage.input_tokens": usage["prompt_tokens"],
+        "gen_ai.usage.output_tokens": usage["completion_tokens"],
+    }
+
+
+def _set_error(span: Span, message: str) -> None:
+    span.status_code = STATUS_ERROR
+    span.status_message = message
+
+
+class Tracer:
+    """
+    把 hook 事件转换为 span 的 hook
+    用法: Swarm(hooks=[Tracer(OTLPFileExporter("traces.jsonl"))])
+    每次 run 对应一个根 span（swarm.run），每次 completion 和每次工具调用是它的子 span，
+    交接记录为根 span 上的 handoff 事件。运行因异常结束时，根 span 和未结束的子 span
+    以错误状态结束并照常导出。span 结束时交给 exporter，
+    exporter 应在后台完成序列化和写出，不阻塞运行循环。
+    Args:
+        exporter: 有 export(span) 方法的对象
+        max_open_runs: 同时跟踪的未结束运行数上限；超出时丢弃最早的（例如异常中断的运行）
+    """
+
+    def __init__(self, exporter, max_open_runs: int = 1024):
+        self.exporter = exporter
+        self.max_open_runs = max_open_runs
+        # 单调时钟到 Unix 时间的偏移，用于把事件时间戳换算为 Unix 纳秒
+        self._offset = time.time_ns() - time.monotonic_ns()
+        self._runs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _ns(self, timestamp: float) -> int:
+        return int(timestamp * 1e9) + self._offset
+
+    def _child(self, run: dict, name: str, event: HookEvent, kind: int, attributes: dict) -> Span:
+        root = run["root"]
+        return Span(name, root.trace_id, _new_id(8), root.span_id,
+                    self._ns(event.timestamp), kind=kind, attributes=attributes)
+
+    def _finish(self, span: Span, event: HookEvent) -> None:
+        span.end_time = self._ns(event.timestamp)
+        self.exporter.export(span)
+
+    def __call__(self, event: HookEvent) -> None:
+        kind = event.kind
+        with self._lock:
+            if kind == RUN_START:
+                root = Span("swarm.run", _new_id(16), _new_id(8), None,
+                            self._ns(event.timestamp),
+                            attributes={"swarm.run_id": event.run_id,
+                                        "swarm.agent": event.agent})
+                self._runs[event.run_id] = {"root": root, "completion": None, "tools": {}}
+                while len(self._runs) > self.max_open_runs:
+                    self._runs.popitem(last=False)
+                return
+            run = self._runs.get(event.run_id)
+            if run is None:
+                return
+
+            if kind == REQUEST_SENT:
+                run["completion"] = self._child(run, "chat.completion", event, SPAN_KIND_CLIENT, {
+                    "gen_ai.request.model": event.data.get("model"),
+                    "swarm.agent": event.agent,
+                    "swarm.turn": event.turn,
+                    "swarm.stream": event.data.get("stream"),
+                })
+            elif kind == FIRST_TOKEN and run["completion"] is not None:
+                run["completion"].events.append(
+                    {"name": "first_token", "time": self._ns(event.timestamp)})
+            elif kind == COMPLETION_END and run["completion"] is not None:
+                span, run["completion"] = run["completion"], None
+                span.attributes.update(_usage_attributes(event.usage))
+                self._finish(span, event)
+            elif kind == TOOL_START:
+                run["tools"][event.tool_call_id, event.tool] = self._child(
+                    run, f"tool {event.tool}", event, SPAN_KIND_INTERNAL, {
+                        "swarm.tool": event.tool,
+                        "swarm.tool_call_id": event.tool_call_id,
+                        "swarm.agent": event.agent,
+                        "swarm.turn": event.turn,
+                    })
+            elif kind == TOOL_END:
+                span = run["tools"].pop((event.tool_call_id, event.tool), None)
+                if span is not None:
+                    if "error" in event.data:
+                        _set_error(span, event.data["error"])
+                    self._finish(span, event)
+            elif kind == HANDOFF:
+                run["root"].events.append({
+                    "name": "handoff",
+                    "time": self._ns(event.timestamp),
+                    "attributes": {"swarm.handoff.from": event.data.get("from"),
+                                   "swarm.handoff.to": event.data.get("to")},
+                })
+            elif kind == RUN_END:
+                del self._runs[event.run_id]
+                error = event.data.get("error")
+                # 运行异常结束时，仍未结束的 completion 和工具 span 以错误状态结束并导出
+                open_spans = list(run["tools"].values())
+                if run["completion"] is not None:
+                    open_spans.insert(0, run["completion"])
+                for span in open_spans:
+                    if error is not None:
+                        _set_error(span, error)
+                    self._finish(span, event)
+                root = run["root"]
+                root.attributes.update(_usage_attributes(event.usage))
+                root.attributes["swarm.turns"] = event.data.get("turns")
+                root.attributes["swarm.final_agent"] = event.agent
+                root.attributes["swarm.stop_reason"] = event.data.get("stop_reason")
+                if error is not None:
+                    _set_error(root, error)
+                self._finish(root, event)
+
+
+class InMemorySpanExporter:
+    """把结束的 span 保存在内存中，用于测试和交互式查看"""
+
+    def __init__(self):
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.spans.clear()
+
+
+_SHUTDOWN = object()
+
+
+class OTLPFileExporter:
+    """
+    把 span 以 OTLP/JSON 格式写入本地文件的 exporter
+    每批 span 写成一行 {"resourceSpans": [...]}（与 OpenTelemetry Collector 的
+    file exporter 格式一致），可离线导入 trace 查看器。
+    export 只把 span 放入有界队列；序列化和写文件在后台线程中进行。
+    队列满时丢弃新的 span 并计入 dropped，不会阻塞运行。
+    Args:
+        path: 输出文件路径（追加写入）
+        service_name: 资源属性 service.name
+        max_queue: 队列容量
+        batch_size: 每次写出的最大 span 数
+        flush_interval: 队列空闲时的最长写出间隔（秒）
+    """
+
+    def __init__(
+        self,
+        path: str,
+        service_name: str = "swarm",
+        max_queue: int = 2048,
+        batch_size: int = 256,
+        flush_interval: float = 1.0,
+    ):
+        self.path = path
+        self.service_name = service_name
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._closed = False
+        self._thread = threading.Thread(
+            target=self._worker, name="swarm-trace-exporter", daemon=True)
+        self._thread.start()
+        atexit.register(self.shutdown)
+
+    def export(self, span: Span) -> None:
+        if self._closed:
+            return
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """等待队列中已有的 span 写出"""
+        if self._closed:
+            return
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait(timeout)
+
+    def shutdown(self, timeout: Optional[float] = 5.0) -> None:
+        """写出剩余的 span 并停止后台线程"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_SHUTDOWN)
+        self._thread.join(timeout)
+        atexit.unregister(self.shutdown)
+
+    def _payload(self, spans: List[Span]) -> dict:
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": _otlp_attributes({"service.name": self.service_name})},
+                "scopeSpans": [{
+                    "scope": {"name": "swarm"},
+                    "spans": [span.to_otlp() for span in spans],
+                }],
+            }]
+        }
+
+    def _write(self, spans: List[Span]) -> None:
+        if not spans:
+            return
+        try:
+            line = json.dumps(self._payload(spans), separators=(",", ":"))
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+        except Exception:
+            # 写出失败不能让后台线程退出，丢弃这一批
+            self.dropped += len(spans)
+
+    def _worker(self) -> None:
+        batch = []
+        while True:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                self._write(batch)
+                batch = []
+                continue
+            if isinstance(item, Span):
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    self._write(batch)
+                    batch = []
+                continue
+            # flush 请求或关闭信号：先写出已收集的 span
+            self._write(batch)
+            batch = []
+            if item is _SHUTDOWN:
+                return
+            item.set()
@@ -1,20 +1,42 @@
-# 从openai库导入聊天相关的类型定义
-from openai.types.chat import ChatCompletionMessage
-from openai.types.chat.chat_completion_message_tool_call import (
-    ChatCompletionMessageToolCall,
-    Function,
-)
-from typing import List, Callable, Union, Optional
+import importlib
+from typing import TYPE_CHECKING, Awaitable, List, Callable, Union, Optional
 
 # 导入pydantic库用于数据验证和设置
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 # 从os模块导入getenv函数用于获取环境变量
 from os import getenv
 
+if TYPE_CHECKING:
+    from openai.types.chat import ChatCompletionMessage
+    from openai.types.chat.chat_completion_message_tool_call import (
+        ChatCompletionMessageToolCall,
+        Function,
+    )
+
+# openai 的聊天类型在第一次访问时才导入（PEP 562），
+# 只定义 Agent 的代码不需要加载 openai 和 HTTP 相关的依赖
+_OPENAI_TYPES = {
+    "ChatCompletionMessage": "openai.types.chat",
+    "ChatCompletionMessageToolCall": "openai.types.chat.chat_completion_message_tool_call",
+    "Function": "openai.types.chat.chat_completion_message_tool_call",
+}
+
+
+def __getattr__(name):
+    module = _OPENAI_TYPES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
 # 定义一个类型别名：AgentFunction是一个可调用对象(函数)，
-# 返回类型可以是字符串、Agent对象或字典
-AgentFunction = Callable[[], Union[str, "Agent", dict]]
+# 返回类型可以是字符串、Agent对象或字典；也可以是 async def 函数
+AgentFunction = Callable[
+    [], Union[str, "Agent", dict, Awaitable[Union[str, "Agent", dict]]]
+]
 
 
 
@@ -30,6 +52,7 @@ class Agent(BaseModel):
     functions: List[AgentFunction] = [] # 代理可以使用的函数列表
     tool_choice: str = None            # 工具选择
     parallel_tool_calls: bool = True    # 是否允许并行调用工具
+    history_policy: Optional[Callable] = None  # 发送前裁剪历史的策略（如 TokenWindow），覆盖 Swarm 的设置
 
 
 class Response(BaseModel):
@@ -37,6 +60,7 @@ class Response(BaseModel):
     messages: List = []                # 消息历史
     agent: Optional[Agent] = None      # 相关的代理实例
     context_variables: dict = {}       # 上下文变量
+    stop_reason: Optional[str] = None  # 运行结束的原因，见 swarm.budget 中的 STOP_* 常量
 
 
 class Result(BaseModel):
@@ -51,3 +75,23 @@ class Result(BaseModel):
     value: str = ""                    # 返回的结果值
     agent: Optional[Agent] = None      # 相关的代理实例
     context_variables: dict = {}       # 上下文变量
+
+
+class BatchResult(BaseModel):
+    """
+    批量运行中单个对话的结果
+    
+    属性:
+        index (int): 对话在输入中的位置
+        response (Response): 成功时的响应
+        error (BaseException): 失败时的异常（不会影响其他对话）
+    """
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    index: int                         # 对话在输入中的位置
+    response: Optional[Response] = None  # 成功时的响应
+    error: Optional[BaseException] = None  # 失败时的异常
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
@@ -1,4 +1,5 @@
 import inspect
+import threading
 from datetime import datetime
 
 
@@ -16,6 +17,52 @@ def debug_print(debug: bool, *args: str) -> None:
     print(f"\033[97m[\033[90m{timestamp}\033[97m]\033[90m {message}\033[0m")
 
 
+def is_async_callable(func) -> bool:
+    """判断函数是否为 async def（包括实现了 async __call__ 的对象）"""
+    return inspect.iscoroutinefunction(func) or inspect.iscoroutinefunction(
+        getattr(func, "__call__", None)
+    )
+
+
+def run_sync(awaitable):
+    """
+    在同步代码中执行一个可等待对象并返回结果
+    当前线程没有运行中的事件循环时直接使用 asyncio.run；
+    如果已经处在事件循环中（例如在 async 代码里调用了同步的 Swarm.run），
+    则在独立线程的新事件循环中执行，避免阻塞或重入当前循环。
+    Args:
+        awaitable: 协程或其他可等待对象
+    Returns:
+        可等待对象的结果
+    """
+
+    # asyncio 只在真正需要桥接 async 工具时才导入
+    import asyncio
+
+    async def _await():
+        return await awaitable
+
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(_await())
+
+    outcome = {}
+
+    def _target():
+        try:
+            outcome["result"] = asyncio.run(_await())
+        except BaseException as e:
+            outcome["error"] = e
+
+    thread = threading.Thread(target=_target, name="swarm-run-sync")
+    thread.start()
+    thread.join()
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome["result"]
+
+
 def merge_fields(target, source):
     """
     递归合并两个字典的字段
@@ -65,6 +112,168 @@ def merge_chunk(final_response: dict, delta: dict) -> None:
     except (KeyError, IndexError) as e:
         print(f"Error merging tool_calls: {e}")
 
+_SCALAR_TYPES = (str, int, float, bool, type(None))
+
+
+def model_to_dict(obj):
+    """
+    把 pydantic 模型（如 ChoiceDelta、ChatCompletionMessage）直接转换为普通字典
+    结果与 json.loads(obj.model_dump_json()) 相同（包括 extra 字段，例如 sender），
+    但省去了先序列化成 JSON 字符串再解析回来的开销。
+    Args:
+        obj: pydantic 模型、列表、字典或基本类型
+    Returns:
+        只包含 dict/list/基本类型 的结构
+    """
+    if isinstance(obj, _SCALAR_TYPES):
+        return obj
+    if isinstance(obj, (list, tuple)):
+        return [model_to_dict(value) for value in obj]
+    if isinstance(obj, dict):
+        return {key: model_to_dict(value) for key, value in obj.items()}
+    if hasattr(obj, "__pydantic_extra__"):
+        result = {key: model_to_dict(value) for key, value in obj.__dict__.items()}
+        if obj.__pydantic_extra__:
+            for key, value in obj.__pydantic_extra__.items():
+                result[key] = model_to_dict(value)
+        return result
+    return obj
+
+
+# 本地估算 token 数时使用的经验值：英文约 4 个字符一个 token，每条消息另有固定开销
+CHARS_PER_TOKEN = 4
+TOKENS_PER_MESSAGE = 4
+
+
+def estimate_message_tokens(message: dict) -> int:
+    """
+    本地粗略估算单条消息的 token 数（不调用分词器）
+    Args:
+        message: 消息字典
+    Returns:
+        估算的 token 数
+    """
+    content = message.get("content") or ""
+    chars = len(content) if isinstance(content, str) else len(str(content))
+    for tool_call in message.get("tool_calls") or ():
+        function = tool_call.get("function") or {}
+        chars += len(function.get("name") or "") + len(function.get("arguments") or "")
+    return TOKENS_PER_MESSAGE + chars // CHARS_PER_TOKEN
+
+
+def estimate_tokens(messages, tools=None) -> int:
+    """
+    本地粗略估算一次请求的 prompt token 数
+    Args:
+        messages: 消息列表
+        tools: 可选的工具 JSON 列表
+    Returns:
+        估算的 token 数
+    """
+    total = sum(estimate_message_tokens(message) for message in messages)
+    if tools:
+        total += sum(len(str(tool)) for tool in tools) // CHARS_PER_TOKEN
+    return total
+
+
+class StreamAccumulator:
+    """
+    流式响应的累积器
+    每个字段（content、tool_call 的 name/arguments 等）按片段列表保存，
+    到 {"delim": "end"} 边界时调用 message() 一次性拼接，
+    避免 merge_fields 中 target[key] += value 带来的平方级字符串拼接。
+    Args:
+        sender: 消息发送者（当前 agent 名称）
+    """
+
+    __slots__ = ("sender", "role", "_content", "_fields", "_tool_calls", "_function_call")
+
+    def __init__(self, sender: str, role: str = "assistant"):
+        self.sender = sender
+        self.role = role
+        self._content = []
+        self._fields = {}
+        self._tool_calls = {}
+        self._function_call = None
+
+    def add(self, delta: dict) -> None:
+        """
+        累积一个增量块
+        Args:
+            delta: 形如 ChoiceDelta 的字典
+        """
+        for key, value in delta.items():
+            if value is None or key == "sender":
+                continue
+            if key == "content":
+                self._content.append(value)
+            elif key == "role":
+                self.role = value
+            elif key == "tool_calls":
+                for tool_call in value:
+                    self._add_tool_call(tool_call)
+            elif key == "function_call":
+                if self._function_call is None:
+                    self._function_call = {"name": [], "arguments": []}
+                _append_fragments(self._function_call, value)
+            elif isinstance(value, str):
+                self._fields.setdefault(key, []).append(value)
+
+    def _add_tool_call(self, tool_call: dict) -> None:
+        index = tool_call.get("index", len(self._tool_calls))
+        entry = self._tool_calls.get(index)
+        if entry is None:
+            entry = self._tool_calls[index] = {
+                "id": [], "type": "", "name": [], "arguments": []}
+        if tool_call.get("id"):
+            entry["id"].append(tool_call["id"])
+        if tool_call.get("type"):
+            entry["type"] = tool_call["type"]
+        function = tool_call.get("function")
+        if function:
+            _append_fragments(entry, function)
+
+    def tool_call_indexes(self) -> list:
+        return list(self._tool_calls)
+
+    def tool_call(self, index: int) -> dict:
+        """拼接并返回某个下标的 tool_call（与最终消息中的结构相同）"""
+        entry = self._tool_calls[index]
+        return {
+            "function": {
+                "arguments": "".join(entry["arguments"]),
+                "name": "".join(entry["name"]),
+            },
+            "id": "".join(entry["id"]),
+            "type": entry["type"],
+        }
+
+    def message(self) -> dict:
+        """拼接所有片段，返回完整的消息字典"""
+        message = {
+            "content": "".join(self._content),
+            "sender": self.sender,
+            "role": self.role,
+            "function_call": None,
+            "tool_calls": [self.tool_call(index) for index in self._tool_calls] or None,
+        }
+        if self._function_call is not None:
+            message["function_call"] = {
+                "name": "".join(self._function_call["name"]),
+                "arguments": "".join(self._function_call["arguments"]),
+            }
+        for key, fragments in self._fields.items():
+            message[key] = "".join(fragments)
+        return message
+
+
+def _append_fragments(entry: dict, function: dict) -> None:
+    if function.get("name"):
+        entry["name"].append(function["name"])
+    if function.get("arguments"):
+        entry["arguments"].append(function["arguments"])
+
+
 def function_to_json(func) -> dict:
     """
     将Python函数转换为JSON格式的字典描述
@@ -0,0 +1,175 @@
+import asyncio
+import functools
+import hashlib
+import inspect
+import json
+import threading
+from collections import OrderedDict
+from typing import Callable, List, Optional, Sequence
+
+from .util import estimate_message_tokens, is_async_callable
+
+# 滚动摘要缓存最多保存的对话数量
+MAX_CACHED_SUMMARIES = 1024
+
+Summarizer = Callable[[List[dict], Optional[str]], str]
+
+
+class TokenWindow:
+    """
+    按 token 预算裁剪发送给模型的历史
+    从最新的消息往前保留，直到估算的 token 数超过 max_tokens；
+    带 tool_calls 的 assistant 消息与其后的 tool 结果消息作为一个整体保留或裁掉，
+    最新的一组消息总会被保留。被裁掉的较早消息由一条摘要消息代替：
+    提供 summarizer 时生成滚动摘要（只对新裁掉的消息增量调用），否则插入一条省略说明。
+    摘要按被裁掉前缀的内容哈希缓存，调用方每轮传入新的消息副本也能命中。
+    可以设置在 Agent.history_policy 或 Swarm(history_policy=...) 上；
+    AsyncSwarm 通过 acall 使用它，summarizer 可以是 async 函数，同步函数在线程池中执行。
+    Args:
+        max_tokens: 历史部分（不含系统指令和工具定义）的 token 预算
+        summarizer: 可选，summarizer(新裁掉的消息, 之前的摘要) -> 新摘要
+    """
+
+    def __init__(self, max_tokens: int, summarizer: Optional[Summarizer] = None):
+        self.max_tokens = max_tokens
+        self.summarizer = summarizer
+        # 已摘要前缀的内容哈希 -> 摘要
+        self._summaries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __call__(self, history: Sequence) -> Sequence:
+        start = self.window_start(history)
+        if start == 0:
+            return history
+        return [self.summary_message(history, start)] + list(history[start:])
+
+    async def acall(self, history: Sequence) -> Sequence:
+        """__call__ 的异步版本，摘要不阻塞事件循环"""
+        start = self.window_start(history)
+        if start == 0:
+            return history
+        if self.summarizer is None:
+            return [self.summary_message(history, start)] + list(history[start:])
+        summary = await self.asummarize(history, start)
+        return [self._summary_message(summary)] + list(history[start:])
+
+    def window_start(self, history: Sequence) -> int:
+        """返回需要保留的第一条消息的下标"""
+        used = 0
+        end = len(history)
+        while end > 0:
+            # 向前找到本组的起点：tool 结果必须与发起调用的 assistant 消息在一起
+            start = end - 1
+            while start > 0 and history[start].get("role") == "tool":
+                start -= 1
+            tokens = sum(estimate_message_tokens(history[i]) for i in range(start, end))
+            if used + tokens > self.max_tokens and end < len(history):
+                return end
+            used += tokens
+            end = start
+        return 0
+
+    def summary_message(self, history: Sequence, elided: int) -> dict:
+        if self.summarizer is None:
+            return {
+                "role": "system",
+                "content": f"[{elided} earlier messages omitted to fit the context window]",
+            }
+        return self._summary_message(self.summarize(history, elided))
+
+    @staticmethod
+    def _summary_message(summary: str) -> dict:
+        return {"role": "system", "content": f"Summary of the earlier conversation: {summary}"}
+
+    @staticmethod
+    def _prefix_hashes(history: Sequence, elided: int) -> List[str]:
+        """history[:1] 到 history[:elided] 各前缀的滚动内容哈希"""
+        digest = hashlib.sha1()
+        hashes = []
+        for message in history[:elided]:
+            digest.update(json.dumps(
+                [message.get("role"), message.get("content"),
+                 message.get("tool_call_id"), message.get("tool_calls")],
+                sort_keys=True, default=str,
+            ).encode())
+            hashes.append(digest.copy().hexdigest())
+        return hashes
+
+    def _lookup(self, hashes: List[str]):
+        """返回 (已摘要的消息数, 摘要)：缓存中最长的已摘要前缀，没有时为 (0, None)"""
+        with self._lock:
+            for count in range(len(hashes), 0, -1):
+                summary = self._summaries.get(hashes[count - 1])
+                if summary is not None:
+                    self._summaries.move_to_end(hashes[count - 1])
+                    return count, summary
+        return 0, None
+
+    def _store(self, key: str, summary: str) -> None:
+        with self._lock:
+            self._summaries[key] = summary
+            self._summaries.move_to_end(key)
+            if len(self._summaries) > MAX_CACHED_SUMMARIES:
+                self._summaries.popitem(last=False)
+
+    def summarize(self, history: Sequence, elided: int) -> str:
+        hashes = self._prefix_hashes(history, elided)
+        done, previous = self._lookup(hashes)
+        if done == elided:
+            return previous
+        summary = self.summarizer(list(history[done:elided]), previous)
+        if inspect.isawaitable(summary):
+            if inspect.iscoroutine(summary):
+                summary.close()
+            raise TypeError("TokenWindow: an async summarizer can only be used with AsyncSwarm")
+        self._store(hashes[-1], summary)
+        return summary
+
+    async def asummarize(self, history: Sequence, elided: int) -> str:
+        """summarize 的异步版本：await async summarizer，同步 summarizer 在线程池中执行"""
+        hashes = self._prefix_hashes(history, elided)
+        done, previous = self._lookup(hashes)
+        if done == elided:
+            return previous
+        messages = list(history[done:elided])
+        if is_async_callable(self.summarizer):
+            summary = await self.summarizer(messages, previous)
+        else:
+            summary = await asyncio.get_running_loop().run_in_executor(
+                None, functools.partial(self.summarizer, messages, previous))
+            if inspect.isawaitable(summary):
+                summary = await summary
+        self._store(hashes[-1], summary)
+        return summary
+
+
+def completion_summarizer(client, model: str = "gpt-4o-mini") -> Summarizer:
+    """
+    使用 chat completion 生成滚动摘要的 summarizer
+    client 为 AsyncOpenAI 时 summarizer 返回可等待对象，只能配合 AsyncSwarm 使用。
+    Args:
+        client: OpenAI 或 AsyncOpenAI 客户端
+        model: 用于摘要的模型
+    """
+
+    def summarize(messages: List[dict], previous: Optional[str]) -> str:
+        transcript = "\n".join(
+            f"{m.get('role')}: {m.get('content') or ''}" for m in messages
+        )
+        prompt = (
+            "Update the running summary of a conversation with the new messages. "
+            "Keep facts, decisions and open requests; be concise.\n\n"
+            f"Running summary:\n{previous or '(none)'}\n\nNew messages:\n{transcript}"
+        )
+        completion = client.chat.completions.create(
+            model=model, messages=[{"role": "user", "content": prompt}]
+        )
+        if inspect.isawaitable(completion):
+            return _content(completion)
+        return completion.choices[0].message.content
+
+    return summarize
+
+
+async def _content(completion) -> str:
+    return (await completion).choices[0].message.content
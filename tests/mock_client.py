@@ -1,7 +1,15 @@
-from unittest.mock import MagicMock
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
 from swarm.types import ChatCompletionMessage, ChatCompletionMessageToolCall, Function
 from openai import OpenAI
 from openai.types.chat.chat_completion import ChatCompletion, Choice
+from openai.types.chat.chat_completion_chunk import (
+    ChatCompletionChunk,
+    Choice as ChunkChoice,
+    ChoiceDelta,
+    ChoiceDeltaToolCall,
+    ChoiceDeltaToolCallFunction,
+)
 import json
 
 
@@ -41,6 +49,73 @@ def create_mock_response(message, function_calls=[], model="gpt-4o"):
     )
 
 
+def create_mock_stream(message, function_calls=[], model="gpt-4o", chunk_size=4):
+    """
+    Build the list of ChatCompletionChunk objects a streaming create() would yield
+    for the same message/function_calls as create_mock_response.
+    """
+
+    def chunk(**delta):
+        return ChatCompletionChunk(
+            id="mock_cc_id",
+            created=1234567890,
+            model=model,
+            object="chat.completion.chunk",
+            choices=[ChunkChoice(delta=ChoiceDelta(**delta), index=0)],
+        )
+
+    content = message.get("content", "") or ""
+    chunks = [chunk(role=message.get("role", "assistant"), content="")]
+    for i in range(0, len(content), chunk_size):
+        chunks.append(chunk(content=content[i : i + chunk_size]))
+    for index, call in enumerate(function_calls):
+        arguments = json.dumps(call.get("args", {}))
+        chunks.append(
+            chunk(
+                tool_calls=[
+                    ChoiceDeltaToolCall(
+                        index=index,
+                        id=f"mock_tc_id_{index}",
+                        type="function",
+                        function=ChoiceDeltaToolCallFunction(
+                            name=call.get("name", ""), arguments=""
+                        ),
+                    )
+                ]
+            )
+        )
+        for i in range(0, len(arguments), chunk_size):
+            chunks.append(
+                chunk(
+                    tool_calls=[
+                        ChoiceDeltaToolCall(
+                            index=index,
+                            function=ChoiceDeltaToolCallFunction(
+                                arguments=arguments[i : i + chunk_size]
+                            ),
+                        )
+                    ]
+                )
+            )
+    return chunks
+
+
+class AsyncMockStream:
+    """Async iterator over a list of chunks, standing in for openai's AsyncStream."""
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._chunks)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
 class MockOpenAIClient:
     def __init__(self):
         self.chat = MagicMock()
@@ -64,33 +139,65 @@ class MockOpenAIClient:
         self.chat.completions.create.assert_called_with(**kwargs)
 
 
-# Initialize the mock client
-client = MockOpenAIClient()
-
-# Set a sequence of mock responses
-client.set_sequential_responses(
-    [
-        create_mock_response(
-            {"role": "assistant", "content": "First response"},
-            [
-                {
-                    "name": "process_refund",
-                    "args": {"item_id": "item_123", "reason": "too expensive"},
-                }
-            ],
-        ),
-        create_mock_response({"role": "assistant", "content": "Second"}),
-    ]
-)
+class MockAsyncOpenAIClient(MockOpenAIClient):
+    def __init__(self):
+        self.chat = MagicMock()
+        self.chat.completions = MagicMock()
+        self.chat.completions.create = AsyncMock()
+
+
+class ScriptedOpenAIClient:
+    """
+    A lightweight stand-in for OpenAI() that replays a fixed script of responses.
+    Unlike MockOpenAIClient it does no call bookkeeping, so it adds almost nothing
+    to what benchmarks measure. Responses are returned in order and the script
+    wraps around; a list of chunks is replayed as a fresh stream on every call.
+    """
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **params):
+        response = self.responses[self.calls % len(self.responses)]
+        self.calls += 1
+        if isinstance(response, list):
+            return iter(response)
+        return response
+
+    def reset(self):
+        self.calls = 0
+
+
+if __name__ == "__main__":
+    # Initialize the mock client
+    client = MockOpenAIClient()
+
+    # Set a sequence of mock responses
+    client.set_sequential_responses(
+        [
+            create_mock_response(
+                {"role": "assistant", "content": "First response"},
+                [
+                    {
+                        "name": "process_refund",
+                        "args": {"item_id": "item_123", "reason": "too expensive"},
+                    }
+                ],
+            ),
+            create_mock_response({"role": "assistant", "content": "Second"}),
+        ]
+    )
+
+    # This should return the first mock response
+    first_response = client.chat.completions.create()
+    print(
+        first_response.choices[0].message
+    )  # Outputs: role='agent' content='First response'
 
-# This should return the first mock response
-first_response = client.chat.completions.create()
-print(
-    first_response.choices[0].message
-)  # Outputs: role='agent' content='First response'
-
-# This should return the second mock response
-second_response = client.chat.completions.create()
-print(
-    second_response.choices[0].message
-)  # Outputs: role='agent' content='Second response'
+    # This should return the second mock response
+    second_response = client.chat.completions.create()
+    print(
+        second_response.choices[0].message
+    )  # Outputs: role='agent' content='Second response'
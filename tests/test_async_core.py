@@ -0,0 +1,144 @@
+import asyncio
+
+import pytest
+from swarm import AsyncSwarm, Agent
+from tests.mock_client import (
+    AsyncMockStream,
+    MockAsyncOpenAIClient,
+    create_mock_response,
+    create_mock_stream,
+)
+from unittest.mock import Mock
+
+DEFAULT_RESPONSE_CONTENT = "sample response content"
+
+
+@pytest.fixture
+def mock_async_client():
+    m = MockAsyncOpenAIClient()
+    m.set_response(
+        create_mock_response({"role": "assistant", "content": DEFAULT_RESPONSE_CONTENT})
+    )
+    return m
+
+
+def test_arun_with_simple_message(mock_async_client: MockAsyncOpenAIClient):
+    client = AsyncSwarm(client=mock_async_client)
+    messages = [{"role": "user", "content": "Hello, how are you?"}]
+    response = asyncio.run(client.run(agent=Agent(), messages=messages))
+
+    assert response.messages[-1]["role"] == "assistant"
+    assert response.messages[-1]["content"] == DEFAULT_RESPONSE_CONTENT
+    assert messages == [{"role": "user", "content": "Hello, how are you?"}]
+
+
+def test_arun_tool_call_and_handoff(mock_async_client: MockAsyncOpenAIClient):
+    get_weather_mock = Mock()
+
+    def get_weather(location, context_variables):
+        get_weather_mock(location=location, user=context_variables["user"])
+        return "It's sunny today."
+
+    def transfer_to_agent2():
+        return agent2
+
+    agent1 = Agent(name="Test Agent 1", functions=[get_weather, transfer_to_agent2])
+    agent2 = Agent(name="Test Agent 2")
+    mock_async_client.set_sequential_responses(
+        [
+            create_mock_response(
+                message={"role": "assistant", "content": ""},
+                function_calls=[
+                    {"name": "get_weather", "args": {"location": "Paris"}},
+                    {"name": "transfer_to_agent2"},
+                ],
+            ),
+            create_mock_response(
+                {"role": "assistant", "content": DEFAULT_RESPONSE_CONTENT}
+            ),
+        ]
+    )
+
+    client = AsyncSwarm(client=mock_async_client)
+    response = asyncio.run(
+        client.run(
+            agent=agent1,
+            messages=[{"role": "user", "content": "weather?"}],
+            context_variables={"user": "alice"},
+        )
+    )
+
+    get_weather_mock.assert_called_once_with(location="Paris", user="alice")
+    assert response.agent == agent2
+    assert response.messages[-1]["sender"] == "Test Agent 2"
+    assert response.messages[-1]["content"] == DEFAULT_RESPONSE_CONTENT
+
+
+def test_arun_and_stream(mock_async_client: MockAsyncOpenAIClient):
+    def get_weather(location):
+        return "It's sunny today."
+
+    agent = Agent(name="Test Agent", functions=[get_weather])
+    mock_async_client.set_sequential_responses(
+        [
+            AsyncMockStream(
+                create_mock_stream(
+                    {"role": "assistant", "content": ""},
+                    [{"name": "get_weather", "args": {"location": "Paris"}}],
+                )
+            ),
+            AsyncMockStream(
+                create_mock_stream(
+                    {"role": "assistant", "content": DEFAULT_RESPONSE_CONTENT}
+                )
+            ),
+        ]
+    )
+
+    async def collect():
+        client = AsyncSwarm(client=mock_async_client)
+        stream = await client.run(
+            agent=agent, messages=[{"role": "user", "content": "weather?"}], stream=True
+        )
+        return [chunk async for chunk in stream]
+
+    chunks = asyncio.run(collect())
+
+    assert [c["delim"] for c in chunks if "delim" in c] == ["start", "end"] * 2
+    response = chunks[-1]["response"]
+    assert response.messages[0]["tool_calls"][0]["function"]["name"] == "get_weather"
+    assert response.messages[1]["content"] == "It's sunny today."
+    assert response.messages[-1]["content"] == DEFAULT_RESPONSE_CONTENT
+
+
+def test_async_tools_are_gathered(mock_async_client: MockAsyncOpenAIClient):
+    started = []
+
+    async def fetch_a():
+        started.append("a")
+        await asyncio.sleep(0.05)
+        # both tools must have started before either finishes
+        return ",".join(sorted(started))
+
+    async def fetch_b():
+        started.append("b")
+        await asyncio.sleep(0.05)
+        return ",".join(sorted(started))
+
+    agent = Agent(functions=[fetch_a, fetch_b])
+    mock_async_client.set_sequential_responses(
+        [
+            create_mock_response(
+                {"role": "assistant", "content": ""},
+                [{"name": "fetch_a"}, {"name": "fetch_b"}],
+            ),
+            create_mock_response({"role": "assistant", "content": "done"}),
+        ]
+    )
+
+    client = AsyncSwarm(client=mock_async_client)
+    response = asyncio.run(client.run(agent=agent, messages=[]))
+
+    tool_messages = [m for m in response.messages if m["role"] == "tool"]
+    assert [m["tool_name"] for m in tool_messages] == ["fetch_a", "fetch_b"]
+    assert [m["content"] for m in tool_messages] == ["a,b", "a,b"]
@@ -0,0 +1,134 @@
+import asyncio
+import threading
+import time
+
+from swarm import AsyncSwarm, BatchProgress, Swarm, Agent
+from tests.mock_client import MockAsyncOpenAIClient, MockOpenAIClient, create_mock_response
+
+
+def echo_completion(**params):
+    content = params["messages"][-1]["content"]
+    if content == "boom":
+        raise RuntimeError("provider error")
+    # later conversations finish first
+    time.sleep(0.01 * (5 - int(content)) if content.isdigit() else 0)
+    return create_mock_response({"role": "assistant", "content": f"echo {content}"})
+
+
+def conversations(n):
+    return [[{"role": "user", "content": str(i)}] for i in range(n)]
+
+
+def test_run_batch_ordered_with_isolated_failures():
+    mock_client = MockOpenAIClient()
+    mock_client.chat.completions.create.side_effect = echo_completion
+    items = conversations(4) + [[{"role": "user", "content": "boom"}]]
+    progress = BatchProgress()
+
+    results = list(
+        Swarm(client=mock_client).run_batch(
+            Agent(), items, concurrency=3, progress=progress
+        )
+    )
+
+    assert [r.index for r in results] == [0, 1, 2, 3, 4]
+    assert [r.response.messages[-1]["content"] for r in results[:4]] == [
+        "echo 0", "echo 1", "echo 2", "echo 3",
+    ]
+    assert not results[4].ok and isinstance(results[4].error, RuntimeError)
+    assert (progress.submitted, progress.completed, progress.failed) == (5, 5, 1)
+
+
+def test_run_batch_as_completed_with_per_item_context():
+    released = threading.Event()
+
+    def create(**params):
+        if params["messages"][-1]["content"] == "0":
+            # conversation 0 finishes only after the other three were yielded
+            assert released.wait(5)
+        return echo_completion(**params)
+
+    mock_client = MockOpenAIClient()
+    mock_client.chat.completions.create.side_effect = create
+    items = [
+        {"messages": m, "context_variables": {"i": i}}
+        for i, m in enumerate(conversations(4))
+    ]
+
+    results = []
+    for result in Swarm(client=mock_client).run_batch(Agent(), items, concurrency=4, ordered=False):
+        results.append(result)
+        if len(results) == 3:
+            released.set()
+
+    assert sorted(r.index for r in results[:3]) == [1, 2, 3]
+    assert results[3].index == 0
+    assert all(r.response.context_variables == {"i": r.index} for r in results)
+
+
+def test_run_batch_ordered_keeps_concurrency_slots_busy():
+    last_started = threading.Event()
+
+    def create(**params):
+        content = params["messages"][-1]["content"]
+        if content == "0":
+            # only possible if 1, 2 and 3 ran through the second slot while 0 was pending
+            assert last_started.wait(5)
+        elif content == "3":
+            last_started.set()
+        return create_mock_response({"role": "assistant", "content": f"echo {content}"})
+
+    mock_client = MockOpenAIClient()
+    mock_client.chat.completions.create.side_effect = create
+
+    results = list(Swarm(client=mock_client).run_batch(Agent(), conversations(4), concurrency=2))
+
+    assert [r.index for r in results] == [0, 1, 2, 3]
+    assert all(r.ok for r in results)
+
+
+def test_run_batch_close_does_not_wait_for_in_flight_runs():
+    release = threading.Event()
+    blocked = threading.Event()
+    started = []
+
+    def create(**params):
+        content = params["messages"][-1]["content"]
+        started.append(content)
+        if content != "0":
+            blocked.set()
+            release.wait(5)
+        return create_mock_response({"role": "assistant", "content": f"echo {content}"})
+
+    mock_client = MockOpenAIClient()
+    mock_client.chat.completions.create.side_effect = create
+    results = Swarm(client=mock_client).run_batch(Agent(), conversations(4), concurrency=1)
+
+    try:
+        assert next(results).index == 0
+        assert blocked.wait(5)
+        start = time.monotonic()
+        results.close()
+        assert time.monotonic() - start < 1
+        assert started == ["0", "1"]
+    finally:
+        release.set()
+
+
+def test_async_run_batch():
+    mock_client = MockAsyncOpenAIClient()
+
+    async def create(**params):
+        return echo_completion(**params)
+
+    mock_client.chat.completions.create.side_effect = create
+
+    async def collect():
+        client = AsyncSwarm(client=mock_client)
+        return [r async for r in client.run_batch(Agent(), conversations(5), concurrency=2)]
+
+    results = asyncio.run(collect())
+
+    assert [r.response.messages[-1]["content"] for r in results] == [
+        f"echo {i}" for i in range(5)
+    ]
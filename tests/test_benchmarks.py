@@ -0,0 +1,25 @@
+from benchmarks.cases import CASES
+from benchmarks.suite import compare
+
+
+def test_every_case_runs_against_the_scripted_client():
+    calls = []
+
+    def measure(fn):
+        fn()
+        calls.append(fn)
+        return 1.0
+
+    names = [name for case in CASES.values() for name, _, _ in case(measure)]
+    assert len(names) == len(set(names)) == len(calls)
+
+
+def test_compare_flags_slowdowns_beyond_threshold():
+    baseline = {"results": {"a": {"value": 10.0}, "b": {"value": 10.0}}}
+    current = {"results": {"a": {"value": 11.0}, "b": {"value": 13.0}, "new": {"value": 1.0}}}
+
+    report = compare(current, baseline, threshold=0.2)
+
+    assert report["regressions"] == ["b"]
+    assert set(report["cases"]) == {"a", "b"}
+    assert report["cases"]["b"]["ratio"] == 1.3
@@ -0,0 +1,224 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from swarm import Agent, AsyncSwarm, Swarm
+from swarm.budget import BudgetExceeded, CancellationToken, RunBudget
+from swarm.policy import RequestPolicy
+from swarm.ratelimit import RateLimiter
+from swarm.util import estimate_message_tokens, estimate_tokens
+from tests.mock_client import (
+    MockAsyncOpenAIClient,
+    MockOpenAIClient,
+    create_mock_response,
+    create_mock_stream,
+)
+
+
+class ClosableStream:
+    """Iterable stream that records whether close() was called."""
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self.closed = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.closed:
+            raise RuntimeError("stream closed")
+        return next(self._chunks)
+
+    def close(self):
+        self.closed = True
+
+
+def tool_call_response(name="lookup"):
+    return create_mock_response({"role": "assistant", "content": ""}, [{"name": name}])
+
+
+def test_stop_reason_is_reported_for_normal_runs():
+    mock_client = MockOpenAIClient()
+    mock_client.set_response(create_mock_response({"role": "assistant", "content": "ok"}))
+    assert Swarm(client=mock_client).run(agent=Agent(), messages=[]).stop_reason == "completed"
+
+    def lookup():
+        return "x"
+
+    mock_client.set_response(tool_call_response())
+    agent = Agent(functions=[lookup])
+    client = Swarm(client=mock_client)
+    assert client.run(agent=agent, messages=[], max_turns=2).stop_reason == "max_turns"
+    assert client.run(agent=agent, messages=[], execute_tools=False).stop_reason == "tool_calls"
+
+
+def test_token_budget_stops_between_turns():
+    def lookup():
+        return "result " * 100
+
+    mock_client = MockOpenAIClient()
+    mock_client.set_sequential_responses([
+        tool_call_response(),
+        create_mock_response({"role": "assistant", "content": "never"}),
+    ])
+    response = Swarm(client=mock_client).run(
+        agent=Agent(functions=[lookup]),
+        messages=[{"role": "user", "content": "x" * 400}],
+        budget=RunBudget(max_tokens=50),
+    )
+    assert response.stop_reason == "max_tokens"
+    assert [m["role"] for m in response.messages] == ["assistant", "tool"]
+    assert mock_client.chat.completions.create.call_count == 1
+
+
+def test_tool_time_budget_and_deadline_timeout_param():
+    def lookup():
+        time.sleep(0.02)
+        return "slow"
+
+    mock_client = MockOpenAIClient()
+    mock_client.set_response(tool_call_response())
+    response = Swarm(client=mock_client).run(
+        agent=Agent(functions=[lookup]), messages=[],
+        budget=RunBudget(timeout=30, max_tool_time=0.01),
+    )
+    assert response.stop_reason == "max_tool_time"
+    assert 0 < mock_client.chat.completions.create.call_args.kwargs["timeout"] <= 30
+
+    response = Swarm(client=mock_client).run(
+        agent=Agent(), messages=[], budget=RunBudget(timeout=0))
+    assert response.stop_reason == "deadline" and response.messages == []
+
+
+def test_cancel_during_stream_closes_it_and_keeps_partial_text():
+    token = CancellationToken()
+    stream = ClosableStream(
+        create_mock_stream({"role": "assistant", "content": "hello there world"}, chunk_size=2))
+    mock_client = MockOpenAIClient()
+    mock_client.set_response(stream)
+
+    chunks = []
+    for chunk in Swarm(client=mock_client).run(
+        agent=Agent(), messages=[], stream=True, budget=RunBudget(cancel_token=token)
+    ):
+        chunks.append(chunk)
+        if chunk.get("content") == "he":
+            token.cancel()
+
+    response = chunks[-1]["response"]
+    assert stream.closed
+    assert response.stop_reason == "cancelled"
+    assert response.messages[-1]["content"] == "he"
+    assert response.messages[-1]["tool_calls"] is None
+
+
+def test_async_cancel_interrupts_a_pending_request():
+    token = CancellationToken()
+    mock_client = MockAsyncOpenAIClient()
+
+    async def slow_create(**params):
+        await asyncio.sleep(5)
+
+    mock_client.chat.completions.create.side_effect = slow_create
+
+    async def main():
+        asyncio.get_running_loop().call_later(0.05, token.cancel)
+        return await AsyncSwarm(client=mock_client).run(
+            agent=Agent(), messages=[], budget=RunBudget(cancel_token=token))
+
+    start = time.monotonic()
+    response = asyncio.run(main())
+    assert response.stop_reason == "cancelled"
+    assert time.monotonic() - start < 1
+
+
+class Flaky(Exception):
+    pass
+
+
+def test_retries_and_backoff_stop_at_the_deadline():
+    mock_client = MockOpenAIClient()
+    timeouts = []
+
+    def create(**params):
+        timeouts.append(params["timeout"])
+        time.sleep(0.05)
+        raise Flaky()
+
+    mock_client.chat.completions.create.side_effect = create
+    policy = RequestPolicy(max_retries=3, backoff_base=0.02, jitter=False, retryable=(Flaky,))
+
+    start = time.monotonic()
+    response = Swarm(client=mock_client, request_policy=policy).run(
+        agent=Agent(), messages=[], budget=RunBudget(timeout=0.2))
+    elapsed = time.monotonic() - start
+
+    assert response.stop_reason == "deadline"
+    assert elapsed < 0.4
+    # a 4th attempt would start after the deadline; each attempt gets the time left at send time
+    assert len(timeouts) == 3
+    assert timeouts == sorted(timeouts, reverse=True) and timeouts[0] <= 0.2
+
+
+def test_rate_limiter_wait_respects_deadline_and_cancel():
+    limiter = RateLimiter(rpm=1)
+    limiter.acquire("m")
+
+    tracker = RunBudget(timeout=0.1).start()
+    start = time.monotonic()
+    with pytest.raises(BudgetExceeded):
+        limiter.acquire("m", tracker=tracker)
+    assert time.monotonic() - start < 0.5
+
+    token = CancellationToken()
+    threading.Timer(0.05, token.cancel).start()
+    start = time.monotonic()
+    with pytest.raises(BudgetExceeded):
+        limiter.acquire("m", tracker=RunBudget(cancel_token=token).start())
+    assert time.monotonic() - start < 0.5
+
+    async def main():
+        asyncio.get_running_loop().call_later(0.05, token2.cancel)
+        await limiter.aacquire("m", tracker=RunBudget(cancel_token=token2).start())
+
+    token2 = CancellationToken()
+    with pytest.raises(BudgetExceeded):
+        asyncio.run(main())
+
+
+def test_estimated_usage_counts_the_reply_once():
+    mock_client = MockOpenAIClient()
+    completion = create_mock_response({"role": "assistant", "content": "y" * 400})
+    completion.usage = None
+    mock_client.set_response(completion)
+    history = [{"role": "user", "content": "x" * 400}]
+
+    tracker = RunBudget(max_tokens=10 ** 6).start()
+    budget = RunBudget(max_tokens=10 ** 6)
+    budget.start = lambda: tracker
+    response = Swarm(client=mock_client).run(agent=Agent(), messages=history, budget=budget)
+
+    assert tracker.tokens == estimate_tokens(history) + estimate_message_tokens(response.messages[0])
+
+
+def test_async_stream_cancel_interrupts_a_pending_request():
+    token = CancellationToken()
+    mock_client = MockAsyncOpenAIClient()
+
+    async def slow_create(**params):
+        await asyncio.sleep(5)
+
+    mock_client.chat.completions.create.side_effect = slow_create
+
+    async def main():
+        asyncio.get_running_loop().call_later(0.05, token.cancel)
+        stream = AsyncSwarm(client=mock_client).run_and_stream(
+            agent=Agent(), messages=[], budget=RunBudget(cancel_token=token))
+        return [chunk async for chunk in stream]
+
+    start = time.monotonic()
+    chunks = asyncio.run(main())
+    assert chunks[-1]["response"].stop_reason == "cancelled"
+    assert time.monotonic() - start < 1
@@ -0,0 +1,121 @@
+import asyncio
+
+from swarm import AsyncSwarm, Swarm, Agent
+from swarm.budget import close_stream
+from swarm.cache import AsyncCompletionCache, CompletionCache, completion_cache_key
+from tests.mock_client import (
+    AsyncMockStream,
+    MockAsyncOpenAIClient,
+    MockOpenAIClient,
+    create_mock_response,
+    create_mock_stream,
+)
+
+
+def weather_response():
+    return create_mock_response(
+        {"role": "assistant", "content": ""},
+        [{"name": "get_weather", "args": {"location": "Paris"}}],
+    )
+
+
+def test_cache_key_is_canonical():
+    a = {"model": "gpt-4o", "messages": [{"role": "user", "content": "hi"}], "tools": None}
+    b = {"tools": None, "messages": [{"content": "hi", "role": "user"}], "model": "gpt-4o"}
+
+    assert completion_cache_key(a) == completion_cache_key(b)
+    assert completion_cache_key(a) != completion_cache_key(dict(a, model="gpt-4"))
+    assert completion_cache_key(a) == completion_cache_key(dict(a, timeout=5))
+
+
+def test_memory_and_disk_tiers(tmp_path):
+    mock_client = MockOpenAIClient()
+    mock_client.set_response(weather_response())
+    params = {"model": "gpt-4o", "messages": [{"role": "user", "content": "weather?"}]}
+    path = str(tmp_path / "completions.db")
+
+    cache = CompletionCache(mock_client, path=path)
+    first = cache.chat.completions.create(**params)
+    second = cache.chat.completions.create(**params)
+
+    restarted = CompletionCache(mock_client, path=path)
+    third = restarted.chat.completions.create(**params)
+
+    assert mock_client.chat.completions.create.call_count == 1
+    assert second == first and third == first
+    assert (cache.stats.memory_hits, cache.stats.misses) == (1, 1)
+    assert restarted.stats.disk_hits == 1
+
+
+def test_ttl_expires_entries():
+    mock_client = MockOpenAIClient()
+    mock_client.set_response(weather_response())
+    cache = CompletionCache(mock_client, ttl=0)
+    params = {"model": "gpt-4o", "messages": []}
+
+    cache.chat.completions.create(**params)
+    cache.chat.completions.create(**params)
+
+    assert mock_client.chat.completions.create.call_count == 2
+    assert cache.stats.expired == 1
+
+
+def test_stream_replay_is_identical():
+    chunks = create_mock_stream({"role": "assistant", "content": "cached stream"})
+    mock_client = MockOpenAIClient()
+    mock_client.set_response(iter(chunks))
+    cache = CompletionCache(mock_client)
+    client = Swarm(client=cache)
+    messages = [{"role": "user", "content": "hi"}]
+
+    live = list(client.run(agent=Agent(), messages=messages, stream=True))
+    replayed = list(client.run(agent=Agent(), messages=messages, stream=True))
+
+    assert mock_client.chat.completions.create.call_count == 1
+    assert live[:-1] == replayed[:-1]
+    assert replayed[-1]["response"].messages == live[-1]["response"].messages
+
+
+def test_async_cache_replays_stream():
+    mock_client = MockAsyncOpenAIClient()
+    mock_client.set_response(
+        AsyncMockStream(create_mock_stream({"role": "assistant", "content": "async"}))
+    )
+    client = AsyncSwarm(client=AsyncCompletionCache(mock_client))
+
+    async def collect():
+        stream = await client.run(agent=Agent(), messages=[], stream=True)
+        return [chunk async for chunk in stream]
+
+    live = asyncio.run(collect())
+    replayed = asyncio.run(collect())
+
+    assert mock_client.chat.completions.create.await_count == 1
+    assert live[:-1] == replayed[:-1]
+
+
+def test_closing_a_recorded_stream_closes_the_http_stream():
+    class ClosableStream:
+        def __init__(self, chunks):
+            self.chunks = iter(chunks)
+            self.closed = False
+
+        def __iter__(self):
+            return self.chunks
+
+        def close(self):
+            self.closed = True
+
+    upstream = ClosableStream(create_mock_stream({"role": "assistant", "content": "partial"}))
+    mock_client = MockOpenAIClient()
+    mock_client.set_response(upstream)
+    cache = CompletionCache(mock_client)
+    params = {"model": "gpt-4o", "messages": [], "stream": True}
+
+    stream = cache.chat.completions.create(**params)
+    next(stream)
+    close_stream(stream)
+
+    assert upstream.closed
+    assert list(stream) == []
+    assert cache.lookup(completion_cache_key(params)) is None
@@ -0,0 +1,88 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import pytest
+from swarm import Swarm
+from swarm import clients
+
+
+@pytest.fixture
+def fake_clients(monkeypatch):
+    created = []
+
+    def create(config, is_async, openai_kwargs):
+        client = SimpleNamespace(config=config, is_async=is_async, kwargs=openai_kwargs)
+        created.append(client)
+        return client
+
+    monkeypatch.setattr(clients, "_create_client", create)
+    clients.reset_clients()
+    yield created
+    clients.reset_clients()
+    clients.configure_client_pool()
+
+
+def test_swarm_instances_share_one_client(fake_clients):
+    a, b = Swarm(), Swarm()
+
+    assert a.client is b.client
+    assert clients.get_client(api_key="other") is not a.client
+    assert len(fake_clients) == 2
+
+
+def test_pool_config_applies_to_new_clients(fake_clients):
+    default = clients.get_client()
+    clients.configure_client_pool(max_connections=5, http2=True)
+    tuned = clients.get_client()
+
+    assert tuned is not default
+    assert (tuned.config.max_connections, tuned.config.http2) == (5, True)
+
+
+def test_registry_is_thread_safe(fake_clients):
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(clients.get_client()))
+               for _ in range(16)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(fake_clients) == 1
+    assert all(c is results[0] for c in results)
+
+
+def test_unhashable_kwargs_are_keyed(fake_clients):
+    a = clients.get_client(default_headers={"x-team": "a"})
+
+    assert clients.get_client(default_headers={"x-team": "a"}) is a
+    assert clients.get_client(default_headers={"x-team": "b"}) is not a
+
+
+def test_async_clients_are_per_event_loop(fake_clients):
+    async def get():
+        return clients.get_async_client(), clients.get_async_client()
+
+    first, again = asyncio.run(get())
+    other, _ = asyncio.run(get())
+
+    assert first is again
+    assert other is not first
+
+
+def test_warm_up_opens_connections():
+    calls = []
+    fake = SimpleNamespace(models=SimpleNamespace(list=lambda: calls.append(1)))
+
+    assert clients.warm_up(fake, connections=3) == 3
+    assert len(calls) == 3
+
+
+def test_warm_up_skips_failed_connections():
+    def refuse():
+        raise ConnectionError("refused")
+
+    fake = SimpleNamespace(models=SimpleNamespace(list=refuse))
+
+    assert clients.warm_up(fake, connections=2) == 0
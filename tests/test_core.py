@@ -143,3 +143,39 @@ def test_handoff(mock_openai_client: MockOpenAIClient):
     assert response.agent == agent2
     assert response.messages[-1]["role"] == "assistant"
     assert response.messages[-1]["content"] == DEFAULT_RESPONSE_CONTENT
+
+
+def test_async_tool_in_sync_run(mock_openai_client: MockOpenAIClient):
+    import asyncio
+
+    started = []
+
+    async def lookup(key):
+        started.append(key)
+        await asyncio.sleep(0.05)
+        return f"{key}:{len(started)}"
+
+    agent = Agent(name="Test Agent", functions=[lookup])
+    mock_openai_client.set_sequential_responses(
+        [
+            create_mock_response(
+                message={"role": "assistant", "content": ""},
+                function_calls=[
+                    {"name": "lookup", "args": {"key": "a"}},
+                    {"name": "lookup", "args": {"key": "b"}},
+                ],
+            ),
+            create_mock_response(
+                {"role": "assistant", "content": DEFAULT_RESPONSE_CONTENT}
+            ),
+        ]
+    )
+
+    client = Swarm(client=mock_openai_client)
+    response = client.run(agent=agent, messages=[])
+
+    # both coroutines were awaited together in one event loop
+    assert [m["content"] for m in response.messages if m["role"] == "tool"] == [
+        "a:2",
+        "b:2",
+    ]
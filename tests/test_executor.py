@@ -0,0 +1,79 @@
+import threading
+import time
+
+from swarm import Swarm, Agent, ToolExecutor
+from tests.mock_client import MockOpenAIClient, create_mock_response
+
+
+def test_map_runs_concurrently_and_keeps_order():
+    barrier = threading.Barrier(3, timeout=5)
+
+    def slow(value):
+        barrier.wait()
+        return value
+
+    executor = ToolExecutor(max_workers=3)
+    results = executor.map([("slow", slow, {"value": i}) for i in range(3)])
+    executor.shutdown()
+
+    assert results == [0, 1, 2]
+
+
+def test_per_tool_limit():
+    active = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def lookup():
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        time.sleep(0.02)
+        with lock:
+            active -= 1
+        return "ok"
+
+    executor = ToolExecutor(max_workers=8, tool_limits={"lookup": 2})
+    executor.map([("lookup", lookup, {}) for _ in range(6)])
+    executor.shutdown()
+
+    assert peak == 2
+
+
+def test_parallel_tool_calls_merge_in_order():
+    barrier = threading.Barrier(2, timeout=5)
+
+    def first_tool():
+        barrier.wait()
+        return "first"
+
+    def second_tool():
+        barrier.wait()
+        return agent2
+
+    agent1 = Agent(name="Test Agent 1", functions=[first_tool, second_tool])
+    agent2 = Agent(name="Test Agent 2")
+    mock_client = MockOpenAIClient()
+    mock_client.set_sequential_responses(
+        [
+            create_mock_response(
+                {"role": "assistant", "content": ""},
+                [{"name": "first_tool"}, {"name": "missing_tool"}, {"name": "second_tool"}],
+            ),
+            create_mock_response({"role": "assistant", "content": "done"}),
+        ]
+    )
+
+    client = Swarm(client=mock_client, tool_executor=ToolExecutor(max_workers=4))
+    response = client.run(agent=agent1, messages=[{"role": "user", "content": "go"}])
+
+    tool_messages = [m for m in response.messages if m["role"] == "tool"]
+    assert [m["tool_name"] for m in tool_messages] == [
+        "first_tool",
+        "missing_tool",
+        "second_tool",
+    ]
+    assert tool_messages[0]["content"] == "first"
+    assert tool_messages[1]["content"] == "Error: Tool missing_tool not found."
+    assert response.agent == agent2
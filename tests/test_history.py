@@ -0,0 +1,96 @@
+import copy
+
+import pytest
+from swarm import Swarm, Agent
+from swarm.history import History, Message
+from tests.mock_client import MockOpenAIClient, create_mock_response
+
+
+def test_history_borrows_prefix_without_mutating_it():
+    messages = [{"role": "user", "content": "hi"}]
+    history = History(messages)
+    history.append({"role": "assistant", "content": "hello"})
+
+    assert messages == [{"role": "user", "content": "hi"}]
+    assert len(history) == 2
+    assert history[0] is messages[0]
+    assert history[1:] == [{"role": "assistant", "content": "hello"}]
+    assert [{"role": "system", "content": "s"}] + history == [
+        {"role": "system", "content": "s"},
+        {"role": "user", "content": "hi"},
+        {"role": "assistant", "content": "hello"},
+    ]
+
+
+def test_snapshots_share_storage_and_copy_on_write():
+    history = History([{"role": "user", "content": "hi"}])
+    history.append({"role": "assistant", "content": "a"})
+    view = history.snapshot()
+
+    history.append({"role": "user", "content": "b"})
+    view.append({"role": "user", "content": "c"})
+
+    assert [m["content"] for m in history] == ["hi", "a", "b"]
+    assert [m["content"] for m in view] == ["hi", "a", "c"]
+    assert history[1] is view[1]
+
+
+def test_messages_are_immutable_records():
+    history = History()
+    history.append({"role": "user", "content": "hi"})
+
+    message = history[0]
+    assert isinstance(message, Message)
+    with pytest.raises(TypeError):
+        message["content"] = "changed"
+    assert dict(message) == {"role": "user", "content": "hi"}
+
+
+def test_deepcopy_and_to_dict_copy_nested_values():
+    history = History()
+    history.append({"role": "assistant", "tool_calls": [{"id": "1"}]})
+
+    record = history[0]
+    clone = copy.deepcopy(record)
+    assert clone == record and clone["tool_calls"] is not record["tool_calls"]
+
+    plain = history.to_list()[0]
+    plain["tool_calls"][0]["id"] = "2"
+    assert type(plain) is dict
+    assert record["tool_calls"][0]["id"] == "1"
+
+
+def test_run_does_not_touch_caller_messages():
+    mock_client = MockOpenAIClient()
+    mock_client.set_response(
+        create_mock_response({"role": "assistant", "content": "ok"})
+    )
+    messages = [{"role": "user", "content": "hi"}]
+
+    response = Swarm(client=mock_client).run(agent=Agent(), messages=messages)
+
+    assert messages == [{"role": "user", "content": "hi"}]
+    assert len(response.messages) == 1
+    assert response.messages[0]["content"] == "ok"
+    # the returned messages are plain dicts the caller may edit
+    response.messages[0]["content"] = "edited"
+
+
+def test_with_system_reuses_the_request_list():
+    messages = [{"role": "user", "content": "hi"}]
+    history = History(messages)
+
+    first = history.with_system({"role": "system", "content": "a"})
+    assert first == [{"role": "system", "content": "a"}, {"role": "user", "content": "hi"}]
+
+    history.append({"role": "assistant", "content": "ok"})
+    second = history.with_system({"role": "system", "content": "b"})
+    assert second is first
+    assert second == [
+        {"role": "system", "content": "b"},
+        {"role": "user", "content": "hi"},
+        {"role": "assistant", "content": "ok"},
+    ]
+    assert messages == [{"role": "user", "content": "hi"}]
+    # a snapshot builds its own list
+    assert history.snapshot().with_system({"role": "system", "content": "c"}) is not first
@@ -0,0 +1,192 @@
+import asyncio
+
+import pytest
+from openai.types.chat.chat_completion_chunk import ChatCompletionChunk
+from openai.types.completion_usage import CompletionUsage
+from swarm import Agent, AsyncSwarm, MetricsAggregator, Swarm
+from swarm.hooks import HookEvent
+from tests.mock_client import (
+    AsyncMockStream,
+    MockAsyncOpenAIClient,
+    MockOpenAIClient,
+    create_mock_response,
+    create_mock_stream,
+)
+
+
+def with_usage(response, prompt, completion):
+    response.usage = CompletionUsage(
+        prompt_tokens=prompt, completion_tokens=completion,
+        total_tokens=prompt + completion)
+    return response
+
+
+def handoff_setup():
+    agent_b = Agent(name="B")
+
+    def lookup(item):
+        return f"found {item}"
+
+    def transfer():
+        return agent_b
+
+    agent_a = Agent(name="A", functions=[lookup, transfer])
+    return agent_a, agent_b
+
+
+def test_run_emits_turn_tool_and_handoff_events():
+    agent_a, _ = handoff_setup()
+    mock_client = MockOpenAIClient()
+    mock_client.set_sequential_responses([
+        with_usage(create_mock_response(
+            {"role": "assistant", "content": ""},
+            [{"name": "lookup", "args": {"item": "x"}}, {"name": "transfer"}],
+        ), 10, 2),
+        with_usage(create_mock_response({"role": "assistant", "content": "done"}), 20, 3),
+    ])
+    events = []
+
+    response = Swarm(client=mock_client, hooks=[events.append]).run(
+        agent=agent_a, messages=[{"role": "user", "content": "hi"}])
+
+    assert response.agent.name == "B"
+    assert [e.kind for e in events] == [
+        "run_start",
+        "turn_start", "request_sent", "completion_end",
+        "tool_start", "tool_end", "tool_start", "tool_end",
+        "handoff", "turn_end",
+        "turn_start", "request_sent", "completion_end", "turn_end",
+        "run_end",
+    ]
+    assert len({e.run_id for e in events}) == 1
+    assert all(a.timestamp <= b.timestamp for a, b in zip(events, events[1:]))
+    assert [e.tool for e in events if e.kind == "tool_end"] == ["lookup", "transfer"]
+    handoff = next(e for e in events if e.kind == "handoff")
+    assert handoff.data == {"from": "A", "to": "B"}
+    assert [e.agent for e in events if e.kind == "turn_start"] == ["A", "B"]
+    assert events[-1].usage == {"prompt_tokens": 30, "completion_tokens": 5, "total_tokens": 35}
+    assert events[-1].data == {"turns": 2, "messages": 4, "stop_reason": "completed"}
+
+
+def test_run_end_is_emitted_when_the_run_fails():
+    mock_client = MockOpenAIClient()
+    mock_client.chat.completions.create.side_effect = RuntimeError("api down")
+    events = []
+
+    with pytest.raises(RuntimeError):
+        Swarm(client=mock_client, hooks=[events.append]).run(agent=Agent(), messages=[])
+
+    assert [e.kind for e in events] == ["run_start", "turn_start", "request_sent", "turn_end", "run_end"]
+    assert events[-2].data == {"error": "RuntimeError('api down')"}
+    assert events[-1].data["stop_reason"] == "error"
+    assert events[-1].data["error"] == "RuntimeError('api down')"
+
+
+def test_run_end_is_emitted_when_a_stream_is_abandoned():
+    mock_client = MockOpenAIClient()
+    mock_client.set_response(
+        iter(create_mock_stream({"role": "assistant", "content": "hello world"})))
+    events = []
+
+    stream = Swarm(client=mock_client, hooks=[events.append]).run(
+        agent=Agent(), messages=[], stream=True)
+    next(stream)
+    stream.close()
+
+    assert [e.kind for e in events][-2:] == ["turn_end", "run_end"]
+    assert events[-1].data["stop_reason"] == "cancelled"
+
+
+def test_async_run_end_is_emitted_when_the_run_fails():
+    mock_client = MockAsyncOpenAIClient()
+    mock_client.chat.completions.create.side_effect = RuntimeError("api down")
+    events = []
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(AsyncSwarm(client=mock_client, hooks=[events.append]).run(
+            agent=Agent(), messages=[]))
+
+    assert events[-1].kind == "run_end" and events[-1].data["stop_reason"] == "error"
+
+
+def test_stream_requests_usage_and_emits_first_token():
+    mock_client = MockOpenAIClient()
+    usage_chunk = ChatCompletionChunk(
+        id="mock_cc_id", created=1234567890, model="gpt-4o",
+        object="chat.completion.chunk", choices=[],
+        usage=CompletionUsage(prompt_tokens=7, completion_tokens=4, total_tokens=11),
+    )
+    mock_client.set_response(
+        iter(create_mock_stream({"role": "assistant", "content": "hello world"}) + [usage_chunk]))
+    events = []
+
+    chunks = list(Swarm(client=mock_client, hooks=[events.append]).run(
+        agent=Agent(), messages=[], stream=True))
+
+    assert chunks[-1]["response"].messages[-1]["content"] == "hello world"
+    assert mock_client.chat.completions.create.call_args.kwargs["stream_options"] == {
+        "include_usage": True}
+    kinds = [e.kind for e in events]
+    assert kinds.index("first_token") < kinds.index("completion_end")
+    first_token = events[kinds.index("first_token")]
+    end = events[kinds.index("completion_end")]
+    assert 0 <= first_token.duration <= end.duration
+    assert end.usage["total_tokens"] == 11
+
+
+def test_no_hooks_leaves_request_unchanged():
+    mock_client = MockOpenAIClient()
+    mock_client.set_response(iter(create_mock_stream({"role": "assistant", "content": "hi"})))
+    list(Swarm(client=mock_client).run(agent=Agent(), messages=[], stream=True))
+    assert "stream_options" not in mock_client.chat.completions.create.call_args.kwargs
+
+
+def test_failing_hook_does_not_break_run():
+    mock_client = MockOpenAIClient()
+    mock_client.set_response(create_mock_response({"role": "assistant", "content": "ok"}))
+
+    def broken(event):
+        raise RuntimeError("boom")
+
+    with pytest.warns(UserWarning):
+        response = Swarm(client=mock_client, hooks=[broken]).run(agent=Agent(), messages=[])
+    assert response.messages[-1]["content"] == "ok"
+
+
+def test_async_tools_are_timed():
+    async def fetch(item):
+        await asyncio.sleep(0.01)
+        return item
+
+    agent = Agent(name="A", functions=[fetch])
+    mock_client = MockAsyncOpenAIClient()
+    mock_client.set_sequential_responses([
+        create_mock_response({"role": "assistant", "content": ""},
+                             [{"name": "fetch", "args": {"item": "x"}}]),
+        create_mock_response({"role": "assistant", "content": "done"}),
+    ])
+    events = []
+
+    asyncio.run(AsyncSwarm(client=mock_client, hooks=[events.append]).run(
+        agent=agent, messages=[]))
+
+    tool_end = next(e for e in events if e.kind == "tool_end")
+    assert tool_end.tool == "fetch" and tool_end.duration >= 0.01
+
+
+def test_metrics_aggregator_reports_percentiles():
+    metrics = MetricsAggregator()
+    for i in range(1, 101):
+        metrics(HookEvent("completion_end", "r", 0.0, agent="A", duration=i / 100,
+                          usage={"prompt_tokens": 1, "completion_tokens": 2, "total_tokens": 3}))
+        metrics(HookEvent("tool_end", "r", 0.0, agent="A", tool="lookup", duration=i))
+    metrics(HookEvent("tool_end", "r", 0.0, agent="A", tool="lookup", duration=0.0,
+                      data={"error": "ValueError()"}))
+
+    report = metrics.report()
+    latency = report["agents"]["A"]["latency"]
+    assert latency["count"] == 100
+    assert (latency["p50"], latency["p95"], latency["p99"]) == (0.5, 0.95, 0.99)
+    assert report["agents"]["A"]["total_tokens"] == 300
+    assert report["tools"]["lookup"]["errors"] == 1
+    assert report["tools"]["lookup"]["duration"]["p99"] == 99
@@ -0,0 +1,28 @@
+import subprocess
+import sys
+
+
+def run_python(code):
+    return subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                          check=True).stdout.strip()
+
+
+def test_agent_and_swarm_construction_do_not_load_openai():
+    out = run_python(
+        "import sys\n"
+        "from swarm import Agent, Swarm\n"
+        "from swarm.util import function_to_json\n"
+        "Swarm(); Agent(functions=[function_to_json])\n"
+        "print('openai' in sys.modules, 'swarm.core' in sys.modules)"
+    )
+    assert out == "False True"
+
+
+def test_openai_types_resolve_on_first_access():
+    import swarm
+    from swarm.types import ChatCompletionMessageToolCall, Function
+
+    call = ChatCompletionMessageToolCall(
+        id="1", type="function", function=Function(name="f", arguments="{}"))
+    assert call.function.name == "f"
+    assert "Swarm" in dir(swarm)
@@ -0,0 +1,122 @@
+import asyncio
+import time
+
+import pytest
+from swarm import AsyncSwarm, Swarm, Agent
+from swarm import ratelimit
+from swarm.policy import RequestPolicy
+from swarm.ratelimit import RateLimiter
+from tests.mock_client import MockAsyncOpenAIClient, MockOpenAIClient, create_mock_response
+
+
+class Flaky(Exception):
+    pass
+
+
+def ok():
+    return create_mock_response({"role": "assistant", "content": "ok"})
+
+
+def test_retries_retryable_errors_with_backoff():
+    mock_client = MockOpenAIClient()
+    mock_client.set_sequential_responses([Flaky(), Flaky(), ok()])
+    policy = RequestPolicy(max_retries=2, backoff_base=0.001, retryable=(Flaky,))
+
+    response = Swarm(client=mock_client, request_policy=policy).run(
+        agent=Agent(), messages=[]
+    )
+
+    assert response.messages[-1]["content"] == "ok"
+    assert (policy.metrics.attempts, policy.metrics.retries) == (3, 2)
+
+
+def test_gives_up_after_max_retries_and_on_other_errors():
+    mock_client = MockOpenAIClient()
+    mock_client.set_sequential_responses([Flaky(), Flaky(), ValueError("bad request")])
+    policy = RequestPolicy(max_retries=1, backoff_base=0.001, retryable=(Flaky,))
+    client = Swarm(client=mock_client, request_policy=policy)
+
+    with pytest.raises(Flaky):
+        client.run(agent=Agent(), messages=[])
+    with pytest.raises(ValueError):
+        client.run(agent=Agent(), messages=[])
+    assert policy.metrics.failures == 2
+
+
+def test_backoff_is_bounded_and_jittered():
+    policy = RequestPolicy(backoff_base=1.0, backoff_max=4.0)
+    delays = [policy.backoff(10) for _ in range(50)]
+    assert all(0 <= d <= 4.0 for d in delays)
+    assert len(set(delays)) > 1
+
+
+def test_attempt_timeout_is_passed_to_client():
+    mock_client = MockOpenAIClient()
+    mock_client.set_response(ok())
+    Swarm(client=mock_client, request_policy=RequestPolicy(attempt_timeout=5)).run(
+        agent=Agent(), messages=[]
+    )
+    assert mock_client.chat.completions.create.call_args.kwargs["timeout"] == 5
+
+
+def test_hedge_fires_after_delay_and_wins():
+    calls = []
+
+    def create(**params):
+        calls.append(time.monotonic())
+        if len(calls) == 1:
+            time.sleep(0.3)
+            return "slow"
+        return "fast"
+
+    policy = RequestPolicy(hedge=True, hedge_delay=0.02)
+
+    assert policy.call(create, {}) == "fast"
+    assert (policy.metrics.hedges_fired, policy.metrics.hedges_won) == (1, 1)
+
+
+def test_hedged_attempts_keep_rate_limit_priority():
+    priorities = []
+
+    class RecordingLimiter(RateLimiter):
+        def acquire(self, model, tokens=0, tracker=None):
+            priorities.append(ratelimit._priority.get())
+            return super().acquire(model, tokens, tracker)
+
+    def create(**params):
+        if len(priorities) == 1:
+            time.sleep(0.2)
+        return "ok"
+
+    policy = RequestPolicy(hedge=True, hedge_delay=0.02)
+    with RateLimiter.priority(-5):
+        assert policy.call(RecordingLimiter(rpm=1000).wrap(create), {"model": "m"}) == "ok"
+
+    assert priorities == [-5, -5]
+
+
+def test_async_hedge_cancels_loser():
+    cancelled = []
+
+    async def create(**params):
+        if not cancelled:
+            cancelled.append(False)
+            try:
+                await asyncio.sleep(1)
+            except asyncio.CancelledError:
+                cancelled[0] = True
+                raise
+            return "slow"
+        return ok()
+
+    mock_client = MockAsyncOpenAIClient()
+    mock_client.chat.completions.create.side_effect = create
+    policy = RequestPolicy(hedge=True, hedge_delay=0.02)
+
+    response = asyncio.run(
+        AsyncSwarm(client=mock_client, request_policy=policy).run(agent=Agent(), messages=[])
+    )
+
+    assert response.messages[-1]["content"] == "ok"
+    assert cancelled == [True]
+    assert policy.metrics.hedges_won == 1
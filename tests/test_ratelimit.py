@@ -0,0 +1,83 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+from swarm import Agent, AsyncSwarm, Swarm
+from swarm.ratelimit import RateLimiter, parse_reset
+from tests.mock_client import MockAsyncOpenAIClient, MockOpenAIClient, create_mock_response
+
+
+def test_waits_for_token_budget_instead_of_failing():
+    limiter = RateLimiter(tpm=6000)  # 100 token/s
+    limiter.acquire("m", 6000)
+    waited = limiter.acquire("m", 5)
+    assert 0.03 <= waited < 0.5
+
+
+def test_priority_waiters_go_first_then_fifo():
+    limiter = RateLimiter(tpm=6000)
+    limiter.acquire("m", 6000)
+    order = []
+
+    def waiter(name, priority):
+        with RateLimiter.priority(priority):
+            limiter.acquire("m", 3)
+        order.append(name)
+
+    threads = []
+    for name, priority in [("low-1", 1), ("low-2", 1), ("high", 0)]:
+        thread = threading.Thread(target=waiter, args=(name, priority))
+        thread.start()
+        threads.append(thread)
+        time.sleep(0.005)
+    for thread in threads:
+        thread.join()
+    assert order == ["high", "low-1", "low-2"]
+
+
+def test_429_headers_pause_the_model():
+    limiter = RateLimiter(rpm=1000)
+    error = SimpleNamespace(
+        status_code=429,
+        response=SimpleNamespace(status_code=429, headers={
+            "retry-after": "0.05", "x-ratelimit-limit-requests": "600",
+            "x-ratelimit-remaining-requests": "0"}),
+    )
+    limiter.observe_error("m", error)
+    assert limiter._models["m"].requests.capacity == 600
+    assert limiter.acquire("m") >= 0.04
+    assert limiter.acquire("other") < 0.01
+
+
+def test_headers_create_buckets_for_unconfigured_limits():
+    limiter = RateLimiter()
+    limiter.update_from_headers("m", {"x-ratelimit-limit-tokens": "1000",
+                                      "x-ratelimit-remaining-tokens": "10"})
+    assert limiter._models["m"].tokens.tokens <= 10.1
+    assert parse_reset("6m0s") == 360 and parse_reset("20ms") == 0.02
+
+
+def test_swarm_charges_estimated_prompt_tokens():
+    limiter = RateLimiter(rpm=100, tpm=100000)
+    mock_client = MockOpenAIClient()
+    mock_client.set_response(create_mock_response({"role": "assistant", "content": "ok"}))
+    Swarm(client=mock_client, rate_limiter=limiter).run(
+        agent=Agent(), messages=[{"role": "user", "content": "x" * 400}])
+
+    limit = limiter._models[Agent().model]
+    assert 99 <= limit.requests.tokens < 100
+    assert limit.tokens.tokens < 100000 - 100
+
+
+def test_async_swarm_shares_the_limiter():
+    limiter = RateLimiter(rpm=60)
+    mock_client = MockAsyncOpenAIClient()
+    mock_client.set_response(create_mock_response({"role": "assistant", "content": "ok"}))
+    client = AsyncSwarm(client=mock_client, rate_limiter=limiter)
+
+    async def main():
+        await asyncio.gather(*(client.run(agent=Agent(), messages=[]) for _ in range(5)))
+
+    asyncio.run(main())
+    assert 54 < limiter._models[Agent().model].requests.tokens < 56
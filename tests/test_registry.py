@@ -0,0 +1,38 @@
+from swarm import Agent
+from swarm.registry import compile_tools
+
+
+def test_compiled_tools_are_cached_and_strip_context_variables():
+    def get_weather(location, context_variables):
+        """Get the weather."""
+        return "sunny"
+
+    agent = Agent(functions=[get_weather])
+    compiled = compile_tools(agent.functions)
+
+    assert compile_tools(agent.functions) is compiled
+    assert compiled.function_map == {"get_weather": get_weather}
+    assert compiled.accepts_context == {"get_weather": True}
+    assert compiled.tools[0]["function"]["parameters"] == {
+        "type": "object",
+        "properties": {"location": {"type": "string"}},
+        "required": ["location"],
+    }
+
+
+def test_compiled_tools_invalidated_when_functions_change():
+    def tool_a():
+        pass
+
+    def tool_b():
+        pass
+
+    agent = Agent(functions=[tool_a])
+    compiled = compile_tools(agent.functions)
+
+    agent.functions.append(tool_b)
+    recompiled = compile_tools(agent.functions)
+
+    assert recompiled is not compiled
+    assert [t["function"]["name"] for t in recompiled.tools] == ["tool_a", "tool_b"]
+    assert recompiled.accepts_context == {"tool_a": False, "tool_b": False}
@@ -0,0 +1,99 @@
+import json
+
+import pytest
+
+from swarm import Swarm, Agent
+from swarm.session import Session
+from tests.mock_client import MockOpenAIClient, create_mock_response, create_mock_stream
+
+
+def test_session_keeps_state_and_returns_delta():
+    def transfer_to_agent2():
+        return agent2
+
+    agent1 = Agent(name="Test Agent 1", functions=[transfer_to_agent2])
+    agent2 = Agent(name="Test Agent 2")
+    mock_client = MockOpenAIClient()
+    mock_client.set_sequential_responses(
+        [
+            create_mock_response(
+                {"role": "assistant", "content": ""}, [{"name": "transfer_to_agent2"}]
+            ),
+            create_mock_response({"role": "assistant", "content": "first"}),
+            create_mock_response({"role": "assistant", "content": "second"}),
+        ]
+    )
+    session = Swarm(client=mock_client).session(agent1, context_variables={"user": "a"})
+
+    first = session.send("hello")
+    assert [m["role"] for m in first.messages] == ["assistant", "tool", "assistant"]
+    assert session.agent == agent2
+
+    second = session.send("again")
+    assert [m["content"] for m in second.messages] == ["second"]
+    assert [m["role"] for m in session.messages] == [
+        "user", "assistant", "tool", "assistant", "user", "assistant",
+    ]
+    sent = mock_client.chat.completions.create.call_args.kwargs["messages"]
+    assert len(sent) == 1 + len(session.messages) - 1
+    assert session.context_variables == {"user": "a"}
+
+
+def test_session_stream_updates_state():
+    mock_client = MockOpenAIClient()
+    mock_client.set_response(
+        create_mock_stream({"role": "assistant", "content": "streamed reply"})
+    )
+    session = Swarm(client=mock_client).session(Agent())
+
+    chunks = list(session.stream("hi"))
+
+    assert chunks[-1]["response"].messages[-1]["content"] == "streamed reply"
+    assert [m["role"] for m in session.messages] == ["user", "assistant"]
+
+
+def test_session_round_trips_through_json():
+    agent = Agent(name="Support")
+    mock_client = MockOpenAIClient()
+    mock_client.set_response(create_mock_response({"role": "assistant", "content": "ok"}))
+    swarm = Swarm(client=mock_client)
+    session = swarm.session(agent, context_variables={"order": 42})
+    session.send("hi")
+
+    data = json.loads(json.dumps(session.to_dict()))
+    restored = Session.from_dict(swarm, data, agents=[agent])
+
+    assert restored.agent is agent
+    assert restored.context_variables == {"order": 42}
+    assert restored.messages == session.messages
+
+
+def test_failed_send_does_not_keep_the_user_message():
+    mock_client = MockOpenAIClient()
+    mock_client.set_sequential_responses([
+        RuntimeError("provider error"),
+        create_mock_response({"role": "assistant", "content": "hello"}),
+    ])
+    session = Swarm(client=mock_client).session(Agent())
+
+    with pytest.raises(RuntimeError):
+        session.send("hi")
+    assert session.messages == []
+
+    session.send("hi")
+
+    sent = mock_client.chat.completions.create.call_args.kwargs["messages"]
+    assert [m for m in sent if m["role"] == "user"] == [{"role": "user", "content": "hi"}]
+    assert [m["content"] for m in session.messages] == ["hi", "hello"]
+
+
+def test_abandoned_stream_does_not_keep_the_user_message():
+    mock_client = MockOpenAIClient()
+    mock_client.set_response(iter(create_mock_stream({"role": "assistant", "content": "hello"})))
+    session = Swarm(client=mock_client).session(Agent())
+
+    stream = session.stream("hi")
+    next(stream)
+    stream.close()
+
+    assert session.messages == []
@@ -0,0 +1,184 @@
+import asyncio
+import threading
+
+from swarm import Agent, AsyncSwarm, Swarm
+from swarm.registry import compile_tools
+from swarm.speculative import Speculation, ToolCallDetector, idempotent, is_idempotent
+from swarm.util import StreamAccumulator
+from tests.mock_client import (
+    AsyncMockStream,
+    MockAsyncOpenAIClient,
+    MockOpenAIClient,
+    create_mock_response,
+    create_mock_stream,
+)
+
+
+def tool_delta(index, arguments="", name=None, id=None):
+    function = {"arguments": arguments}
+    if name:
+        function["name"] = name
+    return {"tool_calls": [{"index": index, "id": id, "type": "function" if id else None,
+                            "function": function}]}
+
+
+def feed(accumulator, detector, delta):
+    accumulator.add(delta)
+    return detector.add(delta)
+
+
+def test_detector_reports_an_index_once_its_arguments_close():
+    accumulator = StreamAccumulator("agent")
+    detector = ToolCallDetector(accumulator)
+    assert feed(accumulator, detector, tool_delta(0, name="lookup", id="call_0")) == []
+    # braces and an escaped quote inside strings, split across fragments
+    for fragment in ['{"q": "a}', '\\', '"b{", "n"', ': [1, {"x": 2}]']:
+        assert feed(accumulator, detector, tool_delta(0, fragment)) == []
+    assert feed(accumulator, detector, tool_delta(0, "}")) == [0]
+    assert feed(accumulator, detector, tool_delta(1, "{}", name="other", id="call_1")) == [1]
+    assert accumulator.tool_call(0)["function"]["arguments"] == '{"q": "a}\\"b{", "n": [1, {"x": 2}]}'
+
+
+def test_detector_ignores_invalid_or_anonymous_calls():
+    accumulator = StreamAccumulator("agent")
+    detector = ToolCallDetector(accumulator)
+    assert feed(accumulator, detector, tool_delta(0, '{"a": }', name="lookup", id="call_0")) == []
+    assert feed(accumulator, detector, tool_delta(1, "{}")) == []
+
+
+def test_idempotent_marks_the_function():
+    @idempotent
+    def lookup():
+        pass
+
+    def transfer():
+        pass
+
+    assert lookup.__name__ == "lookup"
+    assert is_idempotent(lookup) and not is_idempotent(transfer)
+
+
+def test_claim_rejects_calls_whose_final_arguments_changed():
+    @idempotent
+    def lookup(q: str):
+        return q
+
+    calls = []
+    accumulator = StreamAccumulator("agent")
+    speculation = Speculation(
+        accumulator, compile_tools([lookup]),
+        prepare=lambda tool_call: (lookup, {"q": "x"}),
+        dispatch=lambda name, func, args: calls.append(name) or name,
+    )
+    for delta in [tool_delta(0, '{"q": "x"}', name="lookup", id="call_0"), tool_delta(0, " ")]:
+        accumulator.add(delta)
+        speculation.feed(delta)
+    assert calls == ["lookup"]
+
+    client = Swarm(client=MockOpenAIClient())
+    tool_calls = client.tool_call_objects(accumulator.message())
+    assert speculation.claim(tool_calls) == {}
+    tool_calls[0].function.arguments = '{"q": "x"}'
+    assert speculation.claim(tool_calls) == {0: "lookup"}
+
+
+class GatedStream:
+    """Sync stream that waits for `gate` before yielding its last chunk."""
+
+    def __init__(self, chunks, gate):
+        self.chunks = chunks
+        self.gate = gate
+        self.ready_before_end = None
+
+    def __iter__(self):
+        for chunk in self.chunks[:-1]:
+            yield chunk
+        self.ready_before_end = self.gate.wait(timeout=2)
+        yield self.chunks[-1]
+
+
+def test_idempotent_tool_runs_while_the_stream_continues():
+    started = threading.Event()
+    calls = []
+
+    @idempotent
+    def lookup(order_id: str):
+        calls.append(order_id)
+        started.set()
+        return f"order {order_id}"
+
+    def refund(order_id: str, context_variables):
+        calls.append("refund")
+        return f"refunded {context_variables['user']}"
+
+    function_calls = [{"name": "lookup", "args": {"order_id": "1"}},
+                      {"name": "refund", "args": {"order_id": "1"}}]
+    stream = GatedStream(create_mock_stream(
+        {"role": "assistant", "content": ""}, function_calls), started)
+    mock_client = MockOpenAIClient()
+    mock_client.set_sequential_responses([
+        stream,
+        create_mock_stream({"role": "assistant", "content": "done"}),
+    ])
+
+    chunks = list(Swarm(client=mock_client).run(
+        agent=Agent(functions=[lookup, refund], parallel_tool_calls=False),
+        messages=[], context_variables={"user": "ann"}, stream=True,
+    ))
+    response = chunks[-1]["response"]
+    assert stream.ready_before_end
+    assert calls == ["1", "refund"]
+    assert [(m["role"], m.get("content")) for m in response.messages[1:3]] == [
+        ("tool", "order 1"), ("tool", "refunded ann")]
+    assert [m["tool_call_id"] for m in response.messages[1:3]] == ["mock_tc_id_0", "mock_tc_id_1"]
+
+
+def test_async_speculative_handoff_is_reconciled_in_order():
+    spanish = Agent(name="Spanish Agent")
+    calls = []
+
+    @idempotent
+    async def lookup():
+        calls.append("lookup")
+        return "found"
+
+    @idempotent
+    def transfer():
+        calls.append("transfer")
+        return spanish
+
+    function_calls = [{"name": "transfer"}, {"name": "lookup"}]
+    mock_client = MockAsyncOpenAIClient()
+    mock_client.chat.completions.create.side_effect = [
+        AsyncMockStream(create_mock_stream({"role": "assistant", "content": ""}, function_calls)),
+        AsyncMockStream(create_mock_stream({"role": "assistant", "content": "hola"})),
+    ]
+
+    async def main():
+        chunks = []
+        async for chunk in await AsyncSwarm(client=mock_client).run(
+            agent=Agent(functions=[transfer, lookup]), messages=[], stream=True
+        ):
+            chunks.append(chunk)
+        return chunks[-1]["response"]
+
+    response = asyncio.run(main())
+    assert sorted(calls) == ["lookup", "transfer"]
+    assert response.agent is spanish
+    assert [m.get("content") for m in response.messages[1:3]] == [
+        '{"assistant": "Spanish Agent"}', "found"]
+    assert response.messages[-1]["sender"] == "Spanish Agent"
+
+
+def test_non_streaming_runs_are_unchanged():
+    @idempotent
+    def lookup():
+        return "x"
+
+    mock_client = MockOpenAIClient()
+    mock_client.set_sequential_responses([
+        create_mock_response({"role": "assistant", "content": ""}, [{"name": "lookup"}]),
+        create_mock_response({"role": "assistant", "content": "ok"}),
+    ])
+    response = Swarm(client=mock_client).run(agent=Agent(functions=[lookup]), messages=[])
+    assert [m["role"] for m in response.messages] == ["assistant", "tool", "assistant"]
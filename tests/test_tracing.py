@@ -0,0 +1,91 @@
+import json
+
+import pytest
+from swarm import Agent, Swarm
+from swarm.tracing import STATUS_ERROR, InMemorySpanExporter, OTLPFileExporter, Span, Tracer
+from tests.mock_client import MockOpenAIClient, create_mock_response
+
+
+def run_with_handoff(tracer):
+    agent_b = Agent(name="B")
+
+    def lookup(item):
+        return f"found {item}"
+
+    def transfer():
+        return agent_b
+
+    mock_client = MockOpenAIClient()
+    mock_client.set_sequential_responses([
+        create_mock_response(
+            {"role": "assistant", "content": ""},
+            [{"name": "lookup", "args": {"item": "x"}}, {"name": "transfer"}],
+        ),
+        create_mock_response({"role": "assistant", "content": "done"}),
+    ])
+    Swarm(client=mock_client, hooks=[tracer]).run(
+        agent=Agent(name="A", functions=[lookup, transfer]), messages=[])
+
+
+def test_run_produces_nested_spans_and_handoff_event():
+    exporter = InMemorySpanExporter()
+    run_with_handoff(Tracer(exporter))
+
+    spans = {span.name: span for span in exporter.spans}
+    root = spans["swarm.run"]
+    assert [span.name for span in exporter.spans].count("chat.completion") == 2
+    assert {"tool lookup", "tool transfer"} <= set(spans)
+    assert root.parent_span_id is None
+    children = [span for span in exporter.spans if span is not root]
+    assert all(span.parent_span_id == root.span_id for span in children)
+    assert all(span.trace_id == root.trace_id for span in exporter.spans)
+    assert all(root.start_time <= span.start_time <= span.end_time <= root.end_time
+               for span in children)
+    assert [event["name"] for event in root.events] == ["handoff"]
+    assert root.events[0]["attributes"] == {"swarm.handoff.from": "A", "swarm.handoff.to": "B"}
+    assert root.attributes["swarm.final_agent"] == "B"
+
+
+def test_failed_completion_is_exported_with_error_status():
+    exporter = InMemorySpanExporter()
+    mock_client = MockOpenAIClient()
+    mock_client.chat.completions.create.side_effect = RuntimeError("api down")
+
+    with pytest.raises(RuntimeError):
+        Swarm(client=mock_client, hooks=[Tracer(exporter)]).run(agent=Agent(), messages=[])
+
+    assert [span.name for span in exporter.spans] == ["chat.completion", "swarm.run"]
+    completion, root = exporter.spans
+    assert completion.parent_span_id == root.span_id
+    assert all(span.status_code == STATUS_ERROR for span in exporter.spans)
+    assert all(span.status_message == "RuntimeError('api down')" for span in exporter.spans)
+    assert root.attributes["swarm.stop_reason"] == "error"
+
+
+def test_otlp_file_exporter_writes_in_background(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    exporter = OTLPFileExporter(str(path), batch_size=2)
+    run_with_handoff(Tracer(exporter))
+    exporter.shutdown()
+
+    spans = [
+        span
+        for line in path.read_text().splitlines()
+        for resource in json.loads(line)["resourceSpans"]
+        for scope in resource["scopeSpans"]
+        for span in scope["spans"]
+    ]
+    assert len(spans) == 5
+    root = next(span for span in spans if span["name"] == "swarm.run")
+    assert len(root["traceId"]) == 32 and len(root["spanId"]) == 16
+    assert int(root["endTimeUnixNano"]) >= int(root["startTimeUnixNano"])
+    assert all(span["parentSpanId"] == root["spanId"] for span in spans if span is not root)
+
+
+def test_otlp_file_exporter_drops_instead_of_blocking(tmp_path):
+    exporter = OTLPFileExporter(str(tmp_path / "traces.jsonl"), max_queue=1)
+    for _ in range(1000):
+        exporter.export(Span("x", "0" * 32, "0" * 16, None, 0))
+    exporter.shutdown()
+    assert exporter.dropped > 0
+    exporter.export(Span("x", "0" * 32, "0" * 16, None, 0))  # 关闭后直接忽略
@@ -1,4 +1,8 @@
-from swarm.util import function_to_json
+import json
+from collections import defaultdict
+
+from swarm.util import StreamAccumulator, function_to_json, merge_chunk, model_to_dict
+from tests.mock_client import create_mock_response, create_mock_stream
 
 
 def test_basic_function():
@@ -48,3 +52,61 @@ def test_complex_function():
             },
         },
     }
+
+
+def test_stream_accumulator_matches_merge_chunk():
+    deltas = [
+        {"role": "assistant", "content": "Let me ", "tool_calls": None},
+        {"content": "check", "tool_calls": None},
+        {"content": None, "tool_calls": [
+            {"index": 0, "id": "call_1", "type": "function",
+             "function": {"name": "get_", "arguments": ""}}]},
+        {"content": None, "tool_calls": [
+            {"index": 0, "id": None, "type": None,
+             "function": {"name": "weather", "arguments": '{"city":'}}]},
+        {"content": None, "tool_calls": [
+            {"index": 1, "id": "call_2", "type": "function",
+             "function": {"name": "get_time", "arguments": "{}"}}]},
+        {"content": None, "tool_calls": [
+            {"index": 0, "id": None, "type": None,
+             "function": {"name": None, "arguments": '"Paris"}'}}]},
+    ]
+
+    message = {
+        "content": "",
+        "sender": "Agent",
+        "role": "assistant",
+        "function_call": None,
+        "tool_calls": defaultdict(
+            lambda: {"function": {"arguments": "", "name": ""}, "id": "", "type": ""}
+        ),
+    }
+    for delta in deltas:
+        delta = {k: (list(map(dict, v)) if k == "tool_calls" and v else v)
+                 for k, v in delta.items()}
+        merge_chunk(message, {k: v for k, v in delta.items() if k != "role"})
+    message["tool_calls"] = list(message["tool_calls"].values())
+
+    accumulator = StreamAccumulator("Agent")
+    for delta in deltas:
+        accumulator.add(delta)
+
+    assert accumulator.message() == message
+    assert accumulator.tool_call(0)["function"]["arguments"] == '{"city":"Paris"}'
+
+
+def test_model_to_dict_matches_json_round_trip():
+    message = create_mock_response(
+        {"role": "assistant", "content": "hi"},
+        [{"name": "get_weather", "args": {"location": "Paris"}}],
+    ).choices[0].message
+    message.sender = "Agent"
+    chunks = create_mock_stream(
+        {"role": "assistant", "content": "hello there"},
+        [{"name": "get_weather", "args": {"location": "Paris"}}],
+    )
+
+    assert model_to_dict(message) == json.loads(message.model_dump_json())
+    for chunk in chunks:
+        delta = chunk.choices[0].delta
+        assert model_to_dict(delta) == json.loads(delta.model_dump_json())
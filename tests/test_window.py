@@ -0,0 +1,126 @@
+import asyncio
+import copy
+import threading
+
+from swarm import AsyncSwarm, Swarm, Agent
+from swarm.window import TokenWindow, completion_summarizer
+from tests.mock_client import MockAsyncOpenAIClient, MockOpenAIClient, create_mock_response
+
+
+def message(role, content, **extra):
+    return {"role": role, "content": content, **extra}
+
+
+def long_history():
+    history = []
+    for i in range(10):
+        history.append(message("user", f"question {i} " * 10))
+        history.append(message("assistant", f"answer {i} " * 10))
+    history.append(message("assistant", "", tool_calls=[
+        {"id": "call_1", "type": "function",
+         "function": {"name": "lookup", "arguments": "{}"}}]))
+    history.append(message("tool", "result " * 10, tool_call_id="call_1"))
+    return history
+
+
+def test_window_keeps_recent_messages_and_tool_pairs():
+    history = long_history()
+    window = TokenWindow(max_tokens=40)
+
+    trimmed = window(history)
+
+    # the tool result is never separated from the assistant message that called it
+    assert trimmed[-1]["role"] == "tool"
+    assert trimmed[-2].get("tool_calls")
+    assert trimmed[0]["role"] == "system"
+    assert "omitted" in trimmed[0]["content"]
+    assert len(trimmed) < len(history)
+
+
+def test_window_returns_history_unchanged_when_within_budget():
+    history = long_history()
+    assert TokenWindow(max_tokens=10_000)(history) is history
+
+
+def test_rolling_summary_is_incremental():
+    calls = []
+
+    def summarizer(messages, previous):
+        calls.append((len(messages), previous))
+        return f"summary of {len(messages)}" + (f" after [{previous}]" if previous else "")
+
+    history = long_history()
+    window = TokenWindow(max_tokens=60, summarizer=summarizer)
+    first = window(history)
+    elided = len(history) - (len(first) - 1)
+
+    history += [message("user", "more " * 40), message("assistant", "ok " * 40)]
+    second = window(history)
+
+    assert calls[0] == (elided, None)
+    assert calls[1][1] == f"summary of {elided}"
+    assert second[0]["content"].startswith("Summary of the earlier conversation: ")
+    # unchanged window does not call the summarizer again
+    window(history)
+    assert len(calls) == 2
+
+
+def test_agent_history_policy_bounds_request_payload():
+    mock_client = MockOpenAIClient()
+    mock_client.set_response(create_mock_response({"role": "assistant", "content": "ok"}))
+    agent = Agent(history_policy=TokenWindow(max_tokens=40))
+
+    response = Swarm(client=mock_client).run(agent=agent, messages=long_history())
+
+    sent = mock_client.chat.completions.create.call_args.kwargs["messages"]
+    assert len(sent) < len(long_history())
+    assert response.messages[-1]["content"] == "ok"
+
+
+def test_summary_cache_hits_for_copied_histories():
+    calls = []
+
+    def summarizer(messages, previous):
+        calls.append(len(messages))
+        return f"summary of {len(messages)}"
+
+    window = TokenWindow(max_tokens=60, summarizer=summarizer)
+    history = long_history()
+    window(history)
+    # a plain Swarm.run caller passes back fresh copies of the same messages
+    window(copy.deepcopy(history))
+
+    assert len(calls) == 1
+
+
+def test_async_swarm_runs_async_summarizer():
+    summary_client = MockAsyncOpenAIClient()
+    summary_client.set_response(create_mock_response({"role": "assistant", "content": "earlier stuff"}))
+    mock_client = MockAsyncOpenAIClient()
+    mock_client.set_response(create_mock_response({"role": "assistant", "content": "ok"}))
+    window = TokenWindow(max_tokens=40, summarizer=completion_summarizer(summary_client))
+
+    response = asyncio.run(AsyncSwarm(client=mock_client).run(
+        agent=Agent(history_policy=window), messages=long_history()))
+
+    sent = mock_client.chat.completions.create.call_args.kwargs["messages"]
+    assert sent[1]["content"] == "Summary of the earlier conversation: earlier stuff"
+    assert summary_client.chat.completions.create.call_count == 1
+    assert response.messages[-1]["content"] == "ok"
+
+
+def test_async_swarm_runs_sync_summarizer_off_the_loop():
+    threads = []
+
+    def summarizer(messages, previous):
+        threads.append(threading.current_thread())
+        return "sync summary"
+
+    mock_client = MockAsyncOpenAIClient()
+    mock_client.set_response(create_mock_response({"role": "assistant", "content": "ok"}))
+    window = TokenWindow(max_tokens=40, summarizer=summarizer)
+
+    asyncio.run(AsyncSwarm(client=mock_client).run(
+        agent=Agent(history_policy=window), messages=long_history()))
+
+    assert threads and threads[0] is not threading.main_thread()